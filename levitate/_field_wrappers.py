@@ -104,6 +104,63 @@ A `MultiCostFieldMultiPoint` will sum the values and jacobians of the stored obj
     MultiFieldMultiPoint
     MultiCostFieldMultiPoint
 
+Multiple States
+---------------
+All the field types can evaluate several transducer states in one call,
+by passing the complex transducer amplitudes as an array of shape (N_transducers, S).
+The returned values and jacobians then have an additional last dimension for the states,
+and the array requests are applied to all the states in a single matrix product.
+
+Quadratic Forms
+---------------
+Most of the cost fields are real quadratic forms in the complex transducer amplitudes.
+Bound cost fields, i.e. `CostFieldPoint`, `MultiCostFieldPoint` and
+`MultiCostFieldMultiPoint`, can be compiled to a `QuadraticForm` using the
+`quadratic_form` method. The compiled object has the same call signature and
+return values as the cost field, but evaluates as a single matrix-vector product
+independent of the number of fields and the orders of the requirements.
+
+.. autosummary::
+    :nosignatures:
+
+    QuadraticForm
+
+Hessians
+--------
+Cost fields built from fields implementing `hessians` can also evaluate the second
+derivatives of the cost with respect to the transducers, using the `evaluate_hessians`
+method. This is implemented for the Gor'kov and radiation force fields, and for the
+squared magnitudes of these fields and of the complex valued linear fields.
+The hessians are used by the Newton-type and trust-region methods in
+`~levitate.optimization.minimize`.
+
+Constrained Transducers
+-----------------------
+Bound fields can be evaluated as functions of a subset of the transducers, with the
+remaining transducers fixed, using the `constrain` method. The constrained transducers
+are folded into a fixed background of the summed requirements, so the requirements
+and jacobians are only evaluated for the free transducers.
+Quadratic forms can be constrained in the same way.
+
+.. autosummary::
+    :nosignatures:
+
+    ConstrainedField
+
+Evaluation Plans
+----------------
+All bound fields can be compiled to an `EvaluationPlan` using the `compile` method.
+The plan flattens the nested structure of the field, merges the requirements
+for all the bound positions, shares the calls to the field implementations between
+the fields, and evaluates everything in preallocated buffers. This is suitable for
+cost functions which are called many times, e.g. in numerical optimizations,
+but which cannot be compiled to quadratic forms.
+
+.. autosummary::
+    :nosignatures:
+
+    EvaluationPlan
+
 Implementation Details
 ----------------------
 To make the API work as intended, there are a couple additional
@@ -125,6 +182,133 @@ calculation functions with the magnitude and square.
 
 import numpy as np
 import collections
+import collections.abc
+
+
+def _map_arrays(func, *results):
+    """Apply a function to matching arrays in (possibly nested) tuples or lists of arrays."""
+    if isinstance(results[0], (tuple, list)):
+        return type(results[0])(_map_arrays(func, *items) for items in zip(*results))
+    return func(*results)
+
+
+class _LazyRequirements(collections.abc.Mapping):
+    """Requirements which are evaluated when they are first accessed.
+
+    The requirements are calculated from the array requests and the transducer
+    amplitudes only when a field actually asks for them, and are cached after that.
+    The summed requirements are calculated as a contraction over the transducers,
+    without creating the individual requirements as an intermediate result.
+
+    Multiple transducer states can be evaluated at once by passing amplitudes
+    of shape (N_transducers, S). The requirements then have an additional
+    last dimension for the states, after the dimensions of the positions.
+
+    Parameters
+    ----------
+    evaluated_requests : dict
+        The requests evaluated by the array, see `TransducerArray.request`.
+    complex_transducer_amplitudes : complex ndarray
+        The transducer phase and amplitude on complex form, shape (N_transducers,)
+        or (N_transducers, S).
+    include_amplitudes : bool
+        If the amplitudes themselves should be available as a requirement.
+    background : dict, optional
+        Summed requirements from transducers which are not included in the requests,
+        e.g. transducers with fixed amplitudes. These are added to the summed requirements.
+
+    """
+
+    _transducer_axis = {'pressure_derivs': 1, 'spherical_harmonics': 1, 'spherical_harmonics_gradient': 2}
+
+    def __init__(self, evaluated_requests, complex_transducer_amplitudes, include_amplitudes=False, background=None):
+        self._requests = evaluated_requests
+        self._amplitudes = np.asarray(complex_transducer_amplitudes)
+        self._background = background
+        self._evaluated = {}
+        self._keys = []
+        if include_amplitudes:
+            self._keys.append('complex_transducer_amplitudes')
+            self._evaluated['complex_transducer_amplitudes'] = self._amplitudes
+        for name in self._transducer_axis:
+            if name in evaluated_requests:
+                self._keys.extend([name + '_individual', name + '_summed'])
+
+    def __getitem__(self, key):
+        try:
+            return self._evaluated[key]
+        except KeyError:
+            if key not in self._keys:
+                raise
+        name, _, kind = key.rpartition('_')
+        requests = self._requests[name]
+        axis = self._transducer_axis[name]
+        # Apply the input complex amplitudes, in the same precision as the requests were evaluated.
+        amplitudes = self._amplitudes.astype(requests.dtype, copy=False)
+        states = amplitudes.shape[1:]
+        if kind == 'individual':
+            value = requests.reshape(requests.shape + (1,) * len(states)) * amplitudes.reshape((-1,) + (1,) * (requests.ndim - axis - 1) + states)
+        elif len(states) == 0:
+            # Vector-matrix products over stacks of matrices, with the transducers as the contracted axis.
+            value = np.matmul(amplitudes, requests.reshape(requests.shape[:axis + 1] + (-1,)))
+            value = value.reshape(requests.shape[:axis] + requests.shape[axis + 1:])
+        else:
+            # Matrix-matrix products over stacks of matrices, contracting the transducers for all states at once.
+            value = np.matmul(np.swapaxes(requests.reshape(requests.shape[:axis + 1] + (-1,)), -1, -2), amplitudes.reshape((amplitudes.shape[0], -1)))
+            value = value.reshape(requests.shape[:axis] + requests.shape[axis + 1:] + states)
+        if kind == 'summed' and self._background is not None:
+            background = self._background[name]
+            value = value + background.reshape(background.shape + (1,) * len(states))
+        self._evaluated[key] = value
+        return value
+
+    def __iter__(self):
+        return iter(self._keys)
+
+    def __len__(self):
+        return len(self._keys)
+
+
+class _RequirementsView(collections.abc.Mapping):
+    """Requirements for a subset of the positions in other requirements.
+
+    The positions are selected as a slice of the flattened position dimensions,
+    and reshaped to the shape of the subset. The transducer amplitudes are
+    not position dependent and are passed through as is.
+    Requirements evaluated for multiple transducer states have the positions
+    before the dimensions of the states.
+
+    Parameters
+    ----------
+    requirements : Mapping
+        Requirements evaluated at positions of shape (3, P).
+    index : slice
+        The slice of the positions to select.
+    shape : tuple
+        The shape of the selected positions, excluding the first dimension.
+    states : int, default 0
+        The number of dimensions for the transducer states.
+
+    """
+
+    def __init__(self, requirements, index, shape, states=0):
+        self._requirements = requirements
+        self._index = (Ellipsis, index) + (slice(None),) * states
+        self._shape = shape
+        self._states = states
+
+    def __getitem__(self, key):
+        value = self._requirements[key]
+        if key == 'complex_transducer_amplitudes':
+            return value
+        positions_axis = value.ndim - 1 - self._states
+        return value[self._index].reshape(value.shape[:positions_axis] + self._shape + value.shape[positions_axis + 1:])
+
+    def __iter__(self):
+        return iter(self._requirements)
+
+    def __len__(self):
+        return len(self._requirements)
 
 
 class FieldImplementationMeta(type):
@@ -194,6 +378,10 @@ class FieldImplementation(metaclass=FieldImplementationMeta):
         Each key in this dictionary specifies a requirement for
         the `jacobians` method. The wrapper classes will manage
         calling the method with the specified arguments.
+    hessians_require : dict
+        Each key in this dictionary specifies a requirement for
+        the `hessians` method. Optional, and should not require
+        more than the `jacobians` method.
 
     Methods
     -------
@@ -203,6 +391,10 @@ class FieldImplementation(metaclass=FieldImplementationMeta):
         Method to calculate the jacobians for the field.
         This method is optional if the implementation is not used
         as a cost function in optimizations.
+    hessians
+        Method to calculate the hessians for the field, see `FieldBase.evaluate_hessians`.
+        This method is optional, and only supported for real valued fields
+        which are quadratic forms in the complex sound pressure.
 
     """
 
@@ -318,6 +510,23 @@ class FieldBase(metaclass=FieldMeta):
     This class should not be instantiated directly.
     """
 
+    def _requests(self, position=None):
+        """Evaluate the array requests, using the shared request cache for bound fields."""
+        from .arrays import request_cache
+        if position is not None:
+            return self.array.request(self.requires, position)
+        version = self.array.version
+        try:
+            key, parsed_requests, key_version = self._request_key
+        except AttributeError:
+            key_version = None
+        if key_version != version:
+            # The array has changed since the key was created.
+            key = request_cache.key(self.array, self.position)
+            parsed_requests = self.array._parse_requests(self.requires)
+            self._request_key = key, parsed_requests, version
+        return request_cache._request(self.array, parsed_requests, self.position, key)
+
     def evaluate_requirements(self, complex_transducer_amplitudes, position=None):
         """Evaluate requirements for given complex transducer amplitudes.
 
@@ -326,6 +535,7 @@ class FieldBase(metaclass=FieldMeta):
         complex_transducer_amplitudes: complex ndarray
             The transducer phase and amplitude on complex form,
             must correspond to the same array used to create the field.
+            Shape (N_transducers,), or (N_transducers, S) to evaluate S states at once.
         position: ndarray
             The position where to calculate the requirements needed.
             Shape (3,...). If position is `None` or not passed, it is assumed
@@ -333,48 +543,150 @@ class FieldBase(metaclass=FieldMeta):
 
         Returns
         -------
-        requirements : dict
+        requirements : Mapping
             Has (at least) the same fields as `self.requires`, but instead of values specifying the level
-            of the requirement, this dict has the evaluated requirement at the positions and
-            transducer amplitudes specified.
+            of the requirement, this mapping has the evaluated requirement at the positions and
+            transducer amplitudes specified. The requirements are evaluated lazily, i.e. when
+            they are first accessed.
 
         Note
         ----
         Fields which are bound to a position will cache the array requests, i.e. the requirements
-        without any transducer amplitudes applied. It is therefore important to not manually change
-        the position, since that will not clear the cache and the new position is not actually used.
+        without any transducer amplitudes applied, in the shared `~levitate.arrays.request_cache`.
+        The requests are recalculated when the `version` of the array changes, e.g. if the
+        frequency, the transducer positions, or the medium is changed. It is important to not
+        manually change the position, or to modify the array positions in-place, since that will
+        not be detected and the bound field will keep using the requests for the original state.
 
         """
-        if position is None:
-            try:
-                evaluated_requests = self._cached_requests
-            except AttributeError:
-                evaluated_requests = self._cached_requests = self.array.request(self.requires, self.position)
-        else:
-            evaluated_requests = self.array.request(self.requires, position)
-
-        complex_transducer_amplitudes = np.asarray(complex_transducer_amplitudes)
-        # Apply the input complex amplitudes
-        evaluated_requrements = {}
-        if 'complex_transducer_amplitudes' in self.requires:
-            evaluated_requrements['complex_transducer_amplitudes'] = complex_transducer_amplitudes
-        if 'pressure_derivs' in evaluated_requests:
-            evaluated_requrements['pressure_derivs_individual'] = np.einsum('i,ji...->ji...', complex_transducer_amplitudes, evaluated_requests['pressure_derivs'])
-            evaluated_requrements['pressure_derivs_summed'] = np.sum(evaluated_requrements['pressure_derivs_individual'], axis=1)
-        if 'spherical_harmonics' in evaluated_requests:
-            evaluated_requrements['spherical_harmonics_individual'] = np.einsum('i,ji...->ji...', complex_transducer_amplitudes, evaluated_requests['spherical_harmonics'])
-            evaluated_requrements['spherical_harmonics_summed'] = np.sum(evaluated_requrements['spherical_harmonics_individual'], axis=1)
-        if 'spherical_harmonics_gradient' in evaluated_requests:
-            evaluated_requrements['spherical_harmonics_gradient_individual'] = np.einsum('i,jki...->jki...', complex_transducer_amplitudes, evaluated_requests['spherical_harmonics_gradient'])
-            evaluated_requrements['spherical_harmonics_gradient_summed'] = np.sum(evaluated_requrements['spherical_harmonics_gradient_individual'], axis=2)
-        return evaluated_requrements
+        return _LazyRequirements(self._requests(position), complex_transducer_amplitudes, 'complex_transducer_amplitudes' in self.requires)
 
     def _clear_cache(self):
         try:
-            del self._cached_requests
+            del self._request_key
         except AttributeError:
             pass
 
+    def compile(self):
+        """Compile the field to a flat evaluation plan.
+
+        Returns
+        -------
+        plan : EvaluationPlan
+            Evaluates the same values as this object, using preallocated buffers.
+
+        Raises
+        ------
+        TypeError
+            If the field is not bound to a position.
+
+        """
+        return EvaluationPlan(self)
+
+    def constrain(self, constrain_transducers, complex_transducer_amplitudes):
+        """Fix some of the transducers in a bound field.
+
+        Parameters
+        ----------
+        constrain_transducers : array_like
+            The transducers to fix, used as the second argument in `np.delete`.
+        complex_transducer_amplitudes : complex ndarray
+            The amplitudes of all transducers, shape (N_transducers,).
+            Only the amplitudes of the constrained transducers are used.
+
+        Returns
+        -------
+        field : ConstrainedField
+            Evaluates the same values as this object, as a function of the free transducers.
+
+        Raises
+        ------
+        TypeError
+            If the field is not bound to a position.
+
+        """
+        return ConstrainedField(self, constrain_transducers, complex_transducer_amplitudes)
+
+    def evaluate_hessians(self, complex_transducer_amplitudes, position=None):
+        r"""Evaluate the hessians of a cost field.
+
+        The hessians are returned in a form consistent with the jacobians, i.e.
+
+        .. math::
+            H_{ij} = 2 x_i^* {\partial^2 V \over \partial x_i^* \partial x_j} x_j, \qquad
+            C_{ij} = 2 x_i^* {\partial^2 V \over \partial x_i^* \partial x_j^*} x_j^*
+
+        where :math:`x` is the complex transducer amplitudes.
+        The hessians with respect to e.g. the phases and amplitudes of the
+        transducers follow from these and the jacobians.
+
+        Parameters
+        ----------
+        complex_transducer_amplitudes: complex ndarray
+            The transducer phase and amplitude on complex form,
+            must correspond to the same array used to create the field.
+        position: ndarray
+            The position where to evaluate the hessians, only used for unbound fields.
+
+        Returns
+        -------
+        hessians : ndarray
+            The hessians :math:`H` of the cost, shape (N_transducers, N_transducers, ...).
+        conjugate_hessians : ndarray
+            The hessians :math:`C` with respect to the conjugated amplitudes, same shape as `hessians`.
+
+        Raises
+        ------
+        TypeError
+            If the field is not a cost field.
+        AttributeError
+            If any of the field implementations does not implement hessians.
+
+        """
+        if not self._is_cost:
+            raise TypeError('Hessians can only be evaluated for cost fields, not `{}`'.format(type(self).__name__))
+        requirements = self.evaluate_requirements(complex_transducer_amplitudes, position)
+        hessians, conjugate_hessians = self._evaluate_hessians(requirements)
+        if conjugate_hessians is None:
+            conjugate_hessians = np.zeros_like(hessians)
+        return hessians, conjugate_hessians
+
+    def _chunk_size(self, position):
+        """Calculate the number of positions that fit in the memory budget of the array.
+
+        Returns `None` if all the positions can be evaluated at once.
+        """
+        budget = self.array.memory_budget
+        if budget is None:
+            return None
+        num_positions = int(np.prod(np.shape(position)[1:]))
+        chunk_size = max(1, int(budget // self.array._request_memory(self.requires)))
+        if chunk_size >= num_positions:
+            return None
+        return chunk_size
+
+    def _evaluate_chunked(self, complex_transducer_amplitudes, position, chunk_size):
+        """Evaluate the field in chunks of positions.
+
+        The positions are flattened and split in chunks, which are evaluated one at the time.
+        The results are written to preallocated outputs, which are reshaped to match the
+        shape of the positions.
+        """
+        position = np.asarray(position)
+        flat_position = position.reshape((3, -1))
+        num_positions = flat_position.shape[1]
+        states = np.shape(complex_transducer_amplitudes)[1:]
+        axis = -1 - len(states)
+        output = None
+        for start in range(0, num_positions, chunk_size):
+            stop = min(start + chunk_size, num_positions)
+            result = self(complex_transducer_amplitudes, flat_position[:, start:stop])
+            if output is None:
+                output = _map_arrays(lambda values: np.empty(values.shape[:axis] + (num_positions,) + states, dtype=values.dtype), result)
+            index = (Ellipsis, slice(start, stop)) + (slice(None),) * len(states)
+            _map_arrays(lambda out, values: np.copyto(out[index], values), output, result)
+        return _map_arrays(lambda out: out.reshape(out.shape[:axis] + position.shape[1:] + states), output)
+
     @property
     def _type(self):  # noqa: D401
         """The type of the field.
@@ -488,6 +800,18 @@ class Field(FieldBase):
     def jacobians_require(self):
         return self.field.jacobians_require
 
+    @property
+    def hessians(self):
+        return self.field.hessians
+
+    @property
+    def hessians_require(self):
+        return self.field.hessians_require
+
+    @property
+    def _has_hessians(self):
+        return hasattr(self.field, 'hessians')
+
     @property
     def ndim(self):
         return self.field.ndim
@@ -514,11 +838,22 @@ class Field(FieldBase):
             The values of the implemented field used to create the wrapper.
 
         """
+        chunk_size = self._chunk_size(position)
+        if chunk_size is not None:
+            return self._evaluate_chunked(complex_transducer_amplitudes, position, chunk_size)
         # Prepare the requirements dict
         requirements = self.evaluate_requirements(complex_transducer_amplitudes, position)
+        return self._evaluate(requirements)
+
+    def _evaluate(self, requirements):
         # Call the function with the correct arguments
         return self.values(**{key: requirements[key] for key in self.values_require})
 
+    def _hessians(self, requirements):
+        # The implemented hessians are for quadratic forms in the pressure,
+        # which have no second derivatives with respect to the conjugated amplitudes.
+        return self.hessians(**{key: requirements[key] for key in self.hessians_require}), None
+
     def __add__(self, other):
         if other == 0:
             return self
@@ -613,8 +948,7 @@ class FieldPoint(Field):
             The values of the implemented field used to create the wrapper.
 
         """
-        requirements = self.evaluate_requirements(complex_transducer_amplitudes)
-        return self.values(**{key: requirements[key] for key in self.values_require})
+        return self._evaluate(self.evaluate_requirements(complex_transducer_amplitudes))
 
     def __add__(self, other):
         if other == 0:
@@ -712,11 +1046,23 @@ class CostField(Field):
             The jacobians of the values with respect to the transducers.
 
         """
-        requirements = self.evaluate_requirements(complex_transducer_amplitudes, position)
+        chunk_size = self._chunk_size(position)
+        if chunk_size is not None:
+            return self._evaluate_chunked(complex_transducer_amplitudes, position, chunk_size)
+        return self._evaluate(self.evaluate_requirements(complex_transducer_amplitudes, position))
+
+    def _evaluate(self, requirements):
         values = self.values(**{key: requirements[key] for key in self.values_require})
         jacobians = self.jacobians(**{key: requirements[key] for key in self.jacobians_require})
         return np.einsum(self._sum_str, self.weight, values), np.einsum(self._sum_str, self.weight, jacobians)
 
+    def _evaluate_hessians(self, requirements):
+        hessians, conjugate_hessians = self._hessians(requirements)
+        hessians = np.einsum(self._sum_str, self.weight, hessians)
+        if conjugate_hessians is not None:
+            conjugate_hessians = np.einsum(self._sum_str, self.weight, conjugate_hessians)
+        return hessians, conjugate_hessians
+
     def __add__(self, other):
         if other == 0:
             return self
@@ -809,10 +1155,24 @@ class CostFieldPoint(CostField, FieldPoint):
             The jacobians of the values with respect to the transducers.
 
         """
-        requirements = self.evaluate_requirements(complex_transducer_amplitudes)
-        values = self.values(**{key: requirements[key] for key in self.values_require})
-        jacobians = self.jacobians(**{key: requirements[key] for key in self.jacobians_require})
-        return np.einsum(self._sum_str, self.weight, values), np.einsum(self._sum_str, self.weight, jacobians)
+        return self._evaluate(self.evaluate_requirements(complex_transducer_amplitudes))
+
+    def quadratic_form(self):
+        """Compile the cost function to a quadratic form.
+
+        Returns
+        -------
+        quadratic_form : QuadraticForm
+            Evaluates the same values and jacobians as this object.
+
+        Raises
+        ------
+        ValueError
+            If the cost function is not a quadratic form in the transducer amplitudes,
+            or if the field is bound to more than one point.
+
+        """
+        return _quadratic_form(self)
 
     def __add__(self, other):
         if other == 0:
@@ -862,6 +1222,9 @@ class SquaredFieldBase(Field):
         self.values_require = field.values_require
         if hasattr(field, 'jacobians_require'):
             self.jacobians_require = field.jacobians_require + field.values_require
+            self.hessians_require = self.jacobians_require
+            if hasattr(field, 'hessians_require'):
+                self.hessians_require = self.hessians_require + field.hessians_require
 
         super().__init__(field=field, **kwargs)
         target = np.asarray(target)
@@ -887,7 +1250,8 @@ class SquaredFieldBase(Field):
         of the underlying objects, accessed through the `field` properties.
         """
         values = self.field.values(**kwargs)
-        values -= self.target.reshape(self.target.shape + (values.ndim - self.ndim) * (1,))
+        # Not in-place, the values might be a view of the requirements.
+        values = values - self.target.reshape(self.target.shape + (values.ndim - self.ndim) * (1,))
         return np.real(values * np.conj(values))
 
     def jacobians(self, **kwargs):
@@ -901,10 +1265,44 @@ class SquaredFieldBase(Field):
         of the underlying objects, accessed through the `field` properties.
         """
         values = self.field.values(**{key: kwargs[key] for key in self.field.values_require})
-        values -= self.target.reshape(self.target.shape + (values.ndim - self.ndim) * (1,))
+        values = values - self.target.reshape(self.target.shape + (values.ndim - self.ndim) * (1,))
         jacobians = self.field.jacobians(**{key: kwargs[key] for key in self.field.jacobians_require})
         return 2 * jacobians * np.conj(values.reshape(values.shape[:self.ndim] + (1,) + values.shape[self.ndim:]))
 
+    def hessians(self, **kwargs):
+        """Calculate hessians of the squared magnitude difference.
+
+        If the underlying field is real valued, returns :math:`A`, with jacobians :math:`dA`
+        and hessians :math:`H`, this function returns :math:`dA_i^* dA_j + 2 H (A - A_0)`
+        and :math:`dA_i^* dA_j^*`. Complex valued fields are assumed to be linear in the
+        transducer amplitudes, and the hessians are :math:`2 dA_i^* dA_j` and zero.
+        See `FieldBase.evaluate_hessians` for the definitions of the two hessians.
+
+        For information about parameters, see the documentation of the values function
+        of the underlying objects, accessed through the `field` properties.
+        """
+        values = self.field.values(**{key: kwargs[key] for key in self.field.values_require})
+        jacobians = self.field.jacobians(**{key: kwargs[key] for key in self.field.jacobians_require})
+        jacobians_i = np.conj(jacobians.reshape(jacobians.shape[:self.ndim + 1] + (1,) + jacobians.shape[self.ndim + 1:]))
+        jacobians_j = jacobians.reshape(jacobians.shape[:self.ndim] + (1,) + jacobians.shape[self.ndim:])
+        if np.iscomplexobj(values):
+            return 2 * jacobians_i * jacobians_j, None
+        values = values - self.target.reshape(self.target.shape + (values.ndim - self.ndim) * (1,))
+        hessians = self.field.hessians(**{key: kwargs[key] for key in self.field.hessians_require})
+        hessians = jacobians_i * jacobians_j + 2 * hessians * values.reshape(values.shape[:self.ndim] + (1, 1) + values.shape[self.ndim:])
+        return hessians, jacobians_i * np.conj(jacobians_j)
+
+    def _hessians(self, requirements):
+        return self.hessians(**{key: requirements[key] for key in self.hessians_require})
+
+    @property
+    def _has_hessians(self):
+        # Jacobians which only require the individual transducer contributions are independent
+        # of the transducer amplitudes, i.e. the field is linear and needs no hessians.
+        return super()._has_hessians or (
+            hasattr(self.field, 'jacobians_require')
+            and all(key.endswith('_individual') for key in self.field.jacobians_require))
+
     # These properties are needed to not overwrite the requirements defined in the field implementations.
     @property
     def values_require(self):
@@ -922,6 +1320,14 @@ class SquaredFieldBase(Field):
     def jacobians_require(self, val):
         self._jacobians_require = val
 
+    @property
+    def hessians_require(self):
+        return self._hessians_require
+
+    @hessians_require.setter
+    def hessians_require(self, val):
+        self._hessians_require = val
+
     def __sub__(self, target):
         kwargs = {}
         if self._is_bound:
@@ -1225,6 +1631,10 @@ class MultiField(FieldBase):
     def array(self):
         return self.fields[0].array
 
+    @property
+    def _has_hessians(self):
+        return all(field._has_hessians for field in self.fields)
+
     def __call__(self, complex_transducer_amplitudes, position):
         """Evaluate all fields.
 
@@ -1245,8 +1655,14 @@ class MultiField(FieldBase):
             arrays in the list might not have compatible shapes.
 
         """
+        chunk_size = self._chunk_size(position)
+        if chunk_size is not None:
+            return self._evaluate_chunked(complex_transducer_amplitudes, position, chunk_size)
         # Prepare the requirements dict
         requirements = self.evaluate_requirements(complex_transducer_amplitudes, position)
+        return self._evaluate(requirements)
+
+    def _evaluate(self, requirements):
         # Call the function with the correct arguments
         return [field.values(**{key: requirements[key] for key in field.values_require}) for field in self.fields]
 
@@ -1375,8 +1791,7 @@ class MultiFieldPoint(MultiField):
             arrays in the list might not have compatible shapes.
 
         """
-        requirements = self.evaluate_requirements(complex_transducer_amplitudes)
-        return [field.values(**{key: requirements[key] for key in field.values_require}) for field in self.fields]
+        return self._evaluate(self.evaluate_requirements(complex_transducer_amplitudes))
 
     def __add__(self, other):
         if other == 0:
@@ -1463,14 +1878,30 @@ class MultiCostField(MultiField):
             The the summed jacobians of all fields.
 
         """
-        requirements = self.evaluate_requirements(complex_transducer_amplitudes, position)
+        chunk_size = self._chunk_size(position)
+        if chunk_size is not None:
+            return self._evaluate_chunked(complex_transducer_amplitudes, position, chunk_size)
+        return self._evaluate(self.evaluate_requirements(complex_transducer_amplitudes, position))
+
+    def _evaluate(self, requirements):
         value = 0
         jacobians = 0
         for field in self.fields:
-            value += np.einsum(field._sum_str, field.weight, field.values(**{key: requirements[key] for key in field.values_require}))
-            jacobians += np.einsum(field._sum_str, field.weight, field.jacobians(**{key: requirements[key] for key in field.jacobians_require}))
+            # Not in-place, since the fields might have both real and complex values.
+            value = value + np.einsum(field._sum_str, field.weight, field.values(**{key: requirements[key] for key in field.values_require}))
+            jacobians = jacobians + np.einsum(field._sum_str, field.weight, field.jacobians(**{key: requirements[key] for key in field.jacobians_require}))
         return value, jacobians
 
+    def _evaluate_hessians(self, requirements):
+        hessians = 0
+        conjugate_hessians = None
+        for field in self.fields:
+            field_hessians, field_conjugate_hessians = field._evaluate_hessians(requirements)
+            hessians = hessians + field_hessians
+            if field_conjugate_hessians is not None:
+                conjugate_hessians = field_conjugate_hessians if conjugate_hessians is None else conjugate_hessians + field_conjugate_hessians
+        return hessians, conjugate_hessians
+
     def __add__(self, other):
         if other == 0:
             return self
@@ -1548,13 +1979,24 @@ class MultiCostFieldPoint(MultiCostField, MultiFieldPoint):
             The the summed jacobians of all cost functions.
 
         """
-        requirements = self.evaluate_requirements(complex_transducer_amplitudes)
-        value = 0
-        jacobians = 0
-        for field in self.fields:
-            value += np.einsum(field._sum_str, field.weight, field.values(**{key: requirements[key] for key in field.values_require}))
-            jacobians += np.einsum(field._sum_str, field.weight, field.jacobians(**{key: requirements[key] for key in field.jacobians_require}))
-        return value, jacobians
+        return self._evaluate(self.evaluate_requirements(complex_transducer_amplitudes))
+
+    def quadratic_form(self):
+        """Compile the cost function to a quadratic form.
+
+        Returns
+        -------
+        quadratic_form : QuadraticForm
+            Evaluates the same values and jacobians as this object.
+
+        Raises
+        ------
+        ValueError
+            If the cost function is not a quadratic form in the transducer amplitudes,
+            or if the field is bound to more than one point.
+
+        """
+        return _quadratic_form(self)
 
     def __add__(self, other):
         if other == 0:
@@ -1582,9 +2024,9 @@ class MultiFieldMultiPoint(FieldBase):
     """Collects fields bound to different positions.
 
     Convenience class to evaluate and manipulate fields bound to
-    different positions in space. Will not improve the computational
-    efficiency beyond the gains from merging the fields bound
-    to the same positions.
+    different positions in space. All the bound positions are stacked
+    and evaluated together, so the array requests and the transducer
+    amplitudes are only applied once for all the fields.
 
     Parameters
     ----------
@@ -1619,6 +2061,80 @@ class MultiFieldMultiPoint(FieldBase):
     def __eq__(self, other):
         return super().__eq__(other) and self.fields == other.fields
 
+    @property
+    def array(self):
+        return self.fields[0].array
+
+    @property
+    def _has_hessians(self):
+        return all(field._has_hessians for field in self.fields)
+
+    @property
+    def requires(self):
+        try:
+            return self._requires
+        except AttributeError:
+            requires = FieldImplementation.requirement()
+            for field in self.fields:
+                requires = requires + field.requires
+            self._requires = requires
+            return self._requires
+
+    @property
+    def _groups(self):
+        """Indices of fields which only differ in the bound position.
+
+        The fields in a group can be evaluated together, by stacking the positions.
+        """
+        try:
+            return self._cached_groups
+        except AttributeError:
+            groups = []
+            for idx, field in enumerate(self.fields):
+                for group in groups:
+                    reference = self.fields[group[0]]
+                    if np.shape(field.position) == np.shape(reference.position) and field @ reference.position == reference:
+                        group.append(idx)
+                        break
+                else:
+                    groups.append([idx])
+            self._cached_groups = groups
+            return self._cached_groups
+
+    @property
+    def position(self):
+        """All the bound positions, stacked to shape (3, P) with grouped fields next to each other."""
+        try:
+            return self._position
+        except AttributeError:
+            self._position = np.concatenate([np.reshape(self.fields[idx].position, (3, -1)) for group in self._groups for idx in group], axis=1)
+            return self._position
+
+    def _group_requirements(self, requirements, states=0):
+        """Split requirements for the stacked positions into requirements for each group of fields.
+
+        The requirements for a group have an additional dimension for the
+        fields in the group, before the dimensions of the bound positions.
+        The group dimension is found at index `-1 - len(shape) - states` of the values,
+        where `shape` is the shape of the bound positions without the first dimension,
+        and `states` is the number of dimensions for the transducer states.
+        """
+        start = 0
+        for group in self._groups:
+            field = self.fields[group[0]]
+            shape = np.shape(field.position)[1:]
+            stop = start + len(group) * int(np.prod(shape))
+            yield field, group, _RequirementsView(requirements, slice(start, stop), (len(group),) + shape, states), -1 - len(shape) - states
+            start = stop
+
+    def _clear_cache(self):
+        super()._clear_cache()
+        for attr in ('_requires', '_position', '_cached_groups'):
+            try:
+                delattr(self, attr)
+            except AttributeError:
+                pass
+
     def __call__(self, complex_transducer_amplitudes):
         """Evaluate all fields.
 
@@ -1637,9 +2153,15 @@ class MultiFieldMultiPoint(FieldBase):
             might be lists with values corresponding to the same point in space.
 
         """
-        values = []
-        for point in self.fields:
-            values.append(point(complex_transducer_amplitudes))
+        requirements = self.evaluate_requirements(complex_transducer_amplitudes)
+        return self._evaluate(requirements, np.ndim(complex_transducer_amplitudes) - 1)
+
+    def _evaluate(self, requirements, states=0):
+        values = [None] * len(self.fields)
+        for field, group, group_requirements, axis in self._group_requirements(requirements, states):
+            group_values = field._evaluate(group_requirements)
+            for group_idx, idx in enumerate(group):
+                values[idx] = _map_arrays(lambda values: np.take(values, group_idx, axis=axis), group_values)
         return values
 
     def __add__(self, other):
@@ -1665,6 +2187,8 @@ class MultiFieldMultiPoint(FieldBase):
                     break
             else:
                 self.fields.append(other)
+            # The stacked positions and requirements have to be recalculated at next call.
+            self._clear_cache()
             return self
 
     def __mul__(self, weight):
@@ -1692,9 +2216,9 @@ class MultiCostFieldMultiPoint(MultiFieldMultiPoint, MultiCostFieldPoint):
     """Collects cost fields bound to different positions.
 
     Convenience class to evaluate and manipulate cost fields bound to
-    different positions in space. Will not improve the computational
-    efficiency beyond the gains from merging the fields bound
-    to the same positions.
+    different positions in space. All the bound positions are stacked
+    and evaluated together, so the array requests and the transducer
+    amplitudes are only applied once for all the fields.
 
     Parameters
     ----------
@@ -1737,10 +2261,645 @@ class MultiCostFieldMultiPoint(MultiFieldMultiPoint, MultiCostFieldPoint):
             The the summed jacobians of all cost functions.
 
         """
+        requirements = self.evaluate_requirements(complex_transducer_amplitudes)
+        return self._evaluate(requirements, np.ndim(complex_transducer_amplitudes) - 1)
+
+    def _evaluate(self, requirements, states=0):
         values = 0
         jacobians = 0
-        for field in self.fields:
-            val, jac = field(complex_transducer_amplitudes)
-            values += val
-            jacobians += jac
+        for field, group, group_requirements, axis in self._group_requirements(requirements, states):
+            val, jac = field._evaluate(group_requirements)
+            values = values + np.sum(val, axis=axis)
+            jacobians = jacobians + np.sum(jac, axis=axis)
+        return values, jacobians
+
+    def evaluate_hessians(self, complex_transducer_amplitudes):
+        """Evaluate and sum the hessians of all cost fields.
+
+        See `FieldBase.evaluate_hessians` for the definitions of the hessians.
+
+        Parameters
+        ----------
+        complex_transducer_amplitudes : complex numpy.ndarray
+            Complex representation of the transducer phases and amplitudes of the
+            array used to create the field.
+
+        Returns
+        -------
+        hessians : ndarray
+            The summed hessians of all cost functions.
+        conjugate_hessians : ndarray
+            The summed hessians with respect to the conjugated amplitudes.
+
+        """
+        requirements = self.evaluate_requirements(complex_transducer_amplitudes)
+        hessians, conjugate_hessians = self._evaluate_hessians(requirements, np.ndim(complex_transducer_amplitudes) - 1)
+        if conjugate_hessians is None:
+            conjugate_hessians = np.zeros_like(hessians)
+        return hessians, conjugate_hessians
+
+    def _evaluate_hessians(self, requirements, states=0):
+        hessians = 0
+        conjugate_hessians = None
+        for field, group, group_requirements, axis in self._group_requirements(requirements, states):
+            field_hessians, field_conjugate_hessians = field._evaluate_hessians(group_requirements)
+            hessians = hessians + np.sum(field_hessians, axis=axis)
+            if field_conjugate_hessians is not None:
+                field_conjugate_hessians = np.sum(field_conjugate_hessians, axis=axis)
+                conjugate_hessians = field_conjugate_hessians if conjugate_hessians is None else conjugate_hessians + field_conjugate_hessians
+        return hessians, conjugate_hessians
+
+    def quadratic_form(self):
+        """Compile the cost function to a quadratic form.
+
+        The quadratic forms of the stored cost fields are compiled and summed.
+
+        Returns
+        -------
+        quadratic_form : QuadraticForm
+            Evaluates the same values and jacobians as this object.
+
+        Raises
+        ------
+        ValueError
+            If any of the cost functions is not a quadratic form in the transducer amplitudes.
+
+        """
+        return sum(field.quadratic_form() for field in self.fields)
+
+
+class QuadraticForm:
+    r"""Precompiled quadratic cost function.
+
+    Evaluates a cost function on the form
+
+    .. math:: V = x^H Q x + 2 \Re\{b^H x\} + c
+
+    where :math:`x` is the complex transducer amplitudes, :math:`Q` is a
+    Hermitian matrix, :math:`b` is a vector, and :math:`c` is a constant.
+    The jacobians are calculated as :math:`2 x (Qx + b)^*`, which is the same
+    form as the jacobians returned by the cost fields.
+    Objects of this class are created from bound cost fields using their
+    `quadratic_form` methods, and can be used in place of the cost fields,
+    e.g. in `~levitate.optimization.minimize`.
+    Quadratic forms can be added to each other.
+
+    Parameters
+    ----------
+    matrix : complex numpy.ndarray
+        The Hermitian matrix :math:`Q`, shape (N, N).
+    linear : complex numpy.ndarray, optional
+        The vector :math:`b`, shape (N,). Defaults to zeros.
+    constant : float, default 0
+        The constant :math:`c`.
+
+    Note
+    ----
+    The matrix is calculated for the state of the array and the field when the
+    quadratic form was compiled. Changes to the array or the field will not
+    update an existing quadratic form.
+
+    """
+
+    _has_hessians = True
+
+    def __init__(self, matrix, linear=None, constant=0):
+        self.matrix = np.asarray(matrix)
+        self.linear = np.zeros(self.matrix.shape[0], self.matrix.dtype) if linear is None else np.asarray(linear)
+        self.constant = constant
+
+    def __call__(self, complex_transducer_amplitudes):
+        """Evaluate the cost function.
+
+        Parameters
+        ----------
+        complex_transducer_amplitudes : complex numpy.ndarray
+            Complex representation of the transducer phases and amplitudes,
+            shape (N,) or (N, S) for S states.
+
+        Returns
+        -------
+        values : float or ndarray
+            The value of the cost function, shape (S,) for multiple states.
+        jacobians : ndarray
+            The jacobians of the value with respect to the transducers.
+
+        """
+        x = np.asarray(complex_transducer_amplitudes).astype(self.matrix.dtype, copy=False)
+        Qx = self.matrix @ x
+        value = np.real(np.sum(np.conj(x) * Qx, axis=0) + 2 * (np.conj(self.linear) @ x)) + self.constant
+        return value, 2 * x * np.conj(Qx + self.linear.reshape(self.linear.shape + (1,) * (x.ndim - 1)))
+
+    def evaluate_hessians(self, complex_transducer_amplitudes):
+        """Evaluate the hessians of the cost function.
+
+        See `FieldBase.evaluate_hessians` for the definitions of the hessians.
+        For a quadratic form :math:`H_{ij} = 2 x_i^* Q_{ij} x_j` and :math:`C = 0`.
+
+        Parameters
+        ----------
+        complex_transducer_amplitudes : complex numpy.ndarray
+            Complex representation of the transducer phases and amplitudes,
+            shape (N,) or (N, S) for S states.
+
+        Returns
+        -------
+        hessians : ndarray
+            The hessians, shape (N, N) or (N, N, S).
+        conjugate_hessians : ndarray
+            The hessians with respect to the conjugated amplitudes, all zeros.
+
+        """
+        x = np.asarray(complex_transducer_amplitudes).astype(self.matrix.dtype, copy=False)
+        hessians = 2 * np.conj(x[:, None]) * self.matrix.reshape(self.matrix.shape + (1,) * (x.ndim - 1)) * x[None, :]
+        return hessians, np.zeros_like(hessians)
+
+    def constrain(self, constrain_transducers, complex_transducer_amplitudes):
+        """Fix some of the transducers, creating a quadratic form in the free transducers.
+
+        Parameters
+        ----------
+        constrain_transducers : array_like
+            The transducers to fix, used as the second argument in `np.delete`.
+        complex_transducer_amplitudes : complex numpy.ndarray
+            The amplitudes of all transducers, shape (N,). Only the amplitudes
+            of the constrained transducers are used.
+
+        Returns
+        -------
+        quadratic_form : QuadraticForm
+            The cost function of the free transducers, in the same order as in the full array.
+
+        """
+        transducers = np.arange(self.matrix.shape[0])
+        free = np.delete(transducers, constrain_transducers)
+        fixed = np.setdiff1d(transducers, free)
+        x = np.asarray(complex_transducer_amplitudes)[fixed].astype(self.matrix.dtype, copy=False)
+        fixed_product = self.matrix[np.ix_(fixed, fixed)] @ x
+        return QuadraticForm(
+            self.matrix[np.ix_(free, free)],
+            self.linear[free] + self.matrix[np.ix_(free, fixed)] @ x,
+            self.constant + np.real(np.conj(x) @ fixed_product + 2 * np.conj(self.linear[fixed]) @ x),
+        )
+
+    def __add__(self, other):
+        if other == 0:
+            return self
+        if not isinstance(other, QuadraticForm):
+            return NotImplemented
+        return QuadraticForm(self.matrix + other.matrix, self.linear + other.linear, self.constant + other.constant)
+
+    __radd__ = __add__
+
+    def __eq__(self, other):
+        return (
+            isinstance(other, QuadraticForm)
+            and np.allclose(self.matrix, other.matrix)
+            and np.allclose(self.linear, other.linear)
+            and np.allclose(self.constant, other.constant)
+        )
+
+
+class ConstrainedField:
+    """Bound field with some of the transducers fixed.
+
+    The contributions from the constrained transducers to the summed requirements
+    are calculated once when the object is created, and are used as a fixed background.
+    The array requests for the free transducers are stored, so calling the object
+    only applies the free transducer amplitudes. Objects of this class are
+    created using the `constrain` method of bound fields, and are used
+    by `~levitate.optimization.minimize` when transducers are constrained.
+
+    Parameters
+    ----------
+    field : FieldBase
+        The bound field to constrain.
+    constrain_transducers : array_like
+        The transducers to fix, used as the second argument in `np.delete`.
+    complex_transducer_amplitudes : complex ndarray
+        The amplitudes of all transducers, shape (N_transducers,).
+        Only the amplitudes of the constrained transducers are used.
+
+    Attributes
+    ----------
+    free_transducers : ndarray
+        The indices of the free transducers in the array.
+
+    Note
+    ----
+    The requests are copied for the state of the array when the field was constrained.
+    Changes to the array or the field will not update an existing constrained field.
+
+    """
+
+    def __init__(self, field, constrain_transducers, complex_transducer_amplitudes):
+        if not field._is_bound:
+            raise TypeError('Only bound fields can be constrained, not `{}`'.format(type(field).__name__))
+        if 'complex_transducer_amplitudes' in field.requires:
+            raise ValueError('Cannot constrain fields which require the transducer amplitudes')
+        self.field = field
+        transducers = np.arange(field.array.num_transducers)
+        self.free_transducers = np.delete(transducers, constrain_transducers)
+        fixed_transducers = np.setdiff1d(transducers, self.free_transducers)
+        amplitudes = np.asarray(complex_transducer_amplitudes)
+
+        requests = field._requests()
+        axes = {name: axis for name, axis in _LazyRequirements._transducer_axis.items() if name in requests}
+        self._requests = {name: np.take(requests[name], self.free_transducers, axis=axis) for name, axis in axes.items()}
+        fixed = _LazyRequirements({name: np.take(requests[name], fixed_transducers, axis=axis) for name, axis in axes.items()}, amplitudes[fixed_transducers])
+        self._background = {name: fixed[name + '_summed'] for name in axes}
+
+    @property
+    def _has_hessians(self):
+        return self.field._has_hessians
+
+    def evaluate_requirements(self, complex_transducer_amplitudes):
+        """Evaluate requirements for the free transducers.
+
+        Parameters
+        ----------
+        complex_transducer_amplitudes: complex ndarray
+            The amplitudes of the free transducers, shape (N_free,) or (N_free, S).
+
+        Returns
+        -------
+        requirements : Mapping
+            The requirements, where the summed requirements include the constrained transducers.
+
+        """
+        return _LazyRequirements(self._requests, complex_transducer_amplitudes, background=self._background)
+
+    def __call__(self, complex_transducer_amplitudes):
+        """Evaluate the field.
+
+        Parameters
+        ----------
+        complex_transducer_amplitudes: complex ndarray
+            The amplitudes of the free transducers, shape (N_free,) or (N_free, S).
+
+        Returns
+        -------
+        values
+            The same values as the constrained field returns.
+            For cost fields the jacobians are only for the free transducers.
+
+        """
+        requirements = self.evaluate_requirements(complex_transducer_amplitudes)
+        if isinstance(self.field, MultiFieldMultiPoint):
+            return self.field._evaluate(requirements, np.ndim(complex_transducer_amplitudes) - 1)
+        return self.field._evaluate(requirements)
+
+    def evaluate_hessians(self, complex_transducer_amplitudes):
+        """Evaluate the hessians for the free transducers.
+
+        See `FieldBase.evaluate_hessians` for the definitions of the hessians.
+
+        Parameters
+        ----------
+        complex_transducer_amplitudes: complex ndarray
+            The amplitudes of the free transducers, shape (N_free,).
+
+        Returns
+        -------
+        hessians : ndarray
+            The hessians of the cost.
+        conjugate_hessians : ndarray
+            The hessians with respect to the conjugated amplitudes.
+
+        """
+        if not self.field._is_cost:
+            raise TypeError('Hessians can only be evaluated for cost fields, not `{}`'.format(type(self.field).__name__))
+        requirements = self.evaluate_requirements(complex_transducer_amplitudes)
+        if isinstance(self.field, MultiFieldMultiPoint):
+            hessians, conjugate_hessians = self.field._evaluate_hessians(requirements, np.ndim(complex_transducer_amplitudes) - 1)
+        else:
+            hessians, conjugate_hessians = self.field._evaluate_hessians(requirements)
+        if conjugate_hessians is None:
+            conjugate_hessians = np.zeros_like(hessians)
+        return hessians, conjugate_hessians
+
+
+def _quadratic_form(field):
+    """Compile a cost field bound to a single point to a `QuadraticForm`.
+
+    The summed requirements are linear in the transducer amplitudes, so
+    the cost function is a real quadratic polynomial in the summed requirements
+    if it is a quadratic form in the transducer amplitudes.
+    The coefficients of the polynomial are found by evaluating the cost
+    function for a set of probing requirements, using polarization identities.
+    The result is then transformed to the transducer amplitudes using the
+    array requests at the bound position.
+    The probes are scaled with the magnitude of the requests, so the
+    polynomial is found in normalized requirements.
+
+    Raises
+    ------
+    ValueError
+        If the field is not bound to a single point, or if the cost function
+        is not a real quadratic form.
+
+    """
+    if 'complex_transducer_amplitudes' in field.requires:
+        raise ValueError('Cannot compile quadratic forms of fields which require the transducer amplitudes')
+    if np.size(field.position) != 3:
+        raise ValueError('Quadratic forms can only be compiled for fields bound to a single point, not positions of shape {}'.format(np.shape(field.position)))
+    requests = field._requests()
+    names = [name for name in _LazyRequirements._transducer_axis if name in requests]
+    shapes = [requests[name].shape[:_LazyRequirements._transducer_axis[name]] for name in names]
+    sizes = [int(np.prod(shape)) for shape in shapes]
+    num_transducers = field.array.num_transducers
+    # The linear map from the transducer amplitudes to the summed requirements.
+    transfer = np.concatenate([requests[name].reshape((size, num_transducers)) for name, size in zip(names, sizes)], axis=0)
+    num_values = transfer.shape[0]
+    # The requirements have very different magnitudes, e.g. for derivatives of different order.
+    # The probes are scaled to the typical magnitude of each requirement to keep the polarization well conditioned.
+    scale = np.sum(np.abs(transfer)**2, axis=1)**0.5
+    scale = np.where(scale > 0, scale, 1)
+
+    def evaluate(probes):
+        probes = probes * scale[:, None]
+        requirements = {}
+        for name, shape, probe in zip(names, shapes, np.split(probes, np.cumsum(sizes)[:-1], axis=0)):
+            requirements[name + '_summed'] = probe.reshape(shape + probes.shape[1:])
+            requirements[name + '_individual'] = np.zeros(shape + (1,) + probes.shape[1:], dtype=probes.dtype)
+        values, _ = field._evaluate(requirements)
+        if np.shape(values) != probes.shape[1:]:
+            raise ValueError('Cannot compile quadratic forms of cost fields with values of shape {}'.format(np.shape(values)[:-1]))
+        return values
+
+    eye = np.eye(num_values)
+    row, col = np.triu_indices(num_values, 1)
+    probes = np.concatenate([np.zeros((num_values, 1)), eye, -eye, 1j * eye, eye[:, row] + eye[:, col], eye[:, row] + 1j * eye[:, col]], axis=1)
+    checks = np.random.RandomState(0).normal(size=(num_values, 4, 2)).view(complex)[..., 0]
+    values = evaluate(np.concatenate([probes, checks], axis=1))
+    if np.iscomplexobj(values):
+        if not np.allclose(np.imag(values), 0):
+            raise ValueError('Cannot compile quadratic forms of complex valued cost fields')
+        values = np.real(values)
+    constant, plus, minus, imag, real_pairs, imag_pairs, check_values = np.split(values, np.cumsum([1, num_values, num_values, num_values, len(row), len(row)]))
+    constant = constant[0]
+    # Polarization of a real quadratic polynomial d^H B d + 2 Re{b^H d} + c.
+    diagonal = (plus + minus) / 2 - constant
+    linear = (plus - minus) / 4 + 1j * (imag - constant - diagonal) / 2
+    real_pairs = (real_pairs - constant - diagonal[row] - diagonal[col] - 2 * linear.real[row] - 2 * linear.real[col]) / 2
+    imag_pairs = -(imag_pairs - constant - diagonal[row] - diagonal[col] - 2 * linear.real[row] - 2 * linear.imag[col]) / 2
+    quadratic = np.diag(diagonal).astype(complex)
+    quadratic[row, col] = real_pairs + 1j * imag_pairs
+    quadratic[col, row] = real_pairs - 1j * imag_pairs
+
+    predicted = np.real(np.einsum('ik, ij, jk -> k', np.conj(checks), quadratic, checks)) + 2 * np.real(np.conj(linear) @ checks) + constant
+    if not np.allclose(predicted, check_values, rtol=1e-6, atol=1e-9 * np.max(np.abs(values))):
+        raise ValueError('The cost field is not a quadratic form in the transducer amplitudes')
+
+    transfer = transfer / scale[:, None].astype(transfer.dtype)
+    transfer_h = np.conj(transfer.T)
+    dtype = transfer.dtype
+    return QuadraticForm(transfer_h @ quadratic.astype(dtype) @ transfer, transfer_h @ linear.astype(dtype), constant)
+
+
+class _PlanUnit:
+    """Fields evaluated at the same positions in an `EvaluationPlan`.
+
+    The field is decomposed into leaves, i.e. the basic or squared fields,
+    and the unique calls to the `values` and `jacobians` methods of the
+    field implementations. Leaves using equal field implementations share the calls.
+
+    Parameters
+    ----------
+    field : FieldPoint or MultiFieldPoint
+        The field(s) evaluated at the positions.
+    index : slice
+        The slice of the flattened bound positions for this unit.
+    shape : tuple
+        The shape of the positions for this unit.
+
+    """
+
+    def __init__(self, field, index, shape):
+        self.field = field
+        self.index = index
+        self.shape = shape
+        self.calls = []
+        self.leaves = []
+        for leaf in field.fields if isinstance(field, MultiField) else [field]:
+            if isinstance(leaf, SquaredFieldBase):
+                implementation, target = leaf.field.field, leaf.target
+            else:
+                implementation, target = leaf.field, None
+            values = self._call(implementation, 'values')
+            if leaf._is_cost:
+                self.leaves.append((values, self._call(implementation, 'jacobians'), target, leaf.weight, leaf._sum_str, leaf.ndim))
+            else:
+                self.leaves.append((values, None, target, None, None, leaf.ndim))
+        self.requires = set()
+        for implementation, kind in self.calls:
+            self.requires.update(getattr(implementation, kind + '_require'))
+
+    def _call(self, implementation, kind):
+        """Index of the call to a method of a field implementation, adding the call if needed."""
+        for idx, (other, other_kind) in enumerate(self.calls):
+            if kind == other_kind and implementation == other:
+                return idx
+        self.calls.append((implementation, kind))
+        return len(self.calls) - 1
+
+
+class EvaluationPlan:
+    """Flat evaluation plan for bound fields.
+
+    The nested structure of a bound field, e.g. squared cost fields inside
+    multi-fields inside multi-points, is flattened when the plan is created.
+    A call to the plan then runs a fixed sequence of steps:
+
+    1. The summed requirements for all the bound positions are calculated
+       as a single matrix product of the array requests and the transducer amplitudes.
+    2. The individual requirements are calculated as in-place products.
+    3. The `values` and `jacobians` methods of each unique field implementation
+       are called once per position, even if several fields use the same implementation.
+    4. The targets, squared magnitudes, weights, and sums are applied in preallocated buffers.
+
+    The buffers are allocated in the first call for each shape of the transducer
+    amplitudes, and reused by the following calls. Objects of this class are
+    created using the `compile` method of bound fields, and have the same
+    call signature and return values as the compiled field.
+
+    Parameters
+    ----------
+    field : FieldBase
+        The bound field to compile.
+
+    Raises
+    ------
+    TypeError
+        If the field is not bound to a position.
+
+    Note
+    ----
+    The returned arrays are buffers owned by the plan, and are overwritten by the
+    next call. Copy the returned values if they should be kept between calls.
+    The array requests are recalculated if the `version` of the array changes,
+    but modifications of the compiled field will not update an existing plan.
+
+    """
+
+    def __init__(self, field):
+        if not field._is_bound:
+            raise TypeError('Only bound fields can be compiled, not `{}`'.format(type(field).__name__))
+        self.field = field
+        self._units = []
+        if isinstance(field, MultiFieldMultiPoint):
+            start = 0
+            for group in field._groups:
+                unit_field = field.fields[group[0]]
+                shape = (len(group),) + np.shape(unit_field.position)[1:]
+                stop = start + int(np.prod(shape))
+                self._units.append(_PlanUnit(unit_field, slice(start, stop), shape))
+                start = stop
+        else:
+            self._units.append(_PlanUnit(field, slice(None), np.shape(field.position)[1:]))
+        self._buffers = {}
+        self._compile()
+
+    def _compile(self):
+        """Collect the array requests needed by the units in a single transfer matrix."""
+        requests = self.field._requests()
+        self._version = self.field.array.version
+        num_transducers = self.field.array.num_transducers
+        dtype = np.result_type(*[requests[name] for name in _LazyRequirements._transducer_axis if name in requests])
+        blocks = []
+        rows = 0
+        for unit in self._units:
+            unit.summed = {}
+            unit.individual = {}
+            for name, axis in _LazyRequirements._transducer_axis.items():
+                if name + '_summed' not in unit.requires and name + '_individual' not in unit.requires:
+                    continue
+                shape = requests[name].shape[:axis]
+                unit_requests = requests[name].reshape(shape + (num_transducers, -1))[..., unit.index].reshape(shape + (num_transducers,) + unit.shape)
+                if name + '_summed' in unit.requires:
+                    blocks.append(np.moveaxis(unit_requests, axis, -1).reshape((-1, num_transducers)))
+                    unit.summed[name] = (slice(rows, rows + blocks[-1].shape[0]), shape)
+                    rows += blocks[-1].shape[0]
+                if name + '_individual' in unit.requires:
+                    unit.individual[name] = unit_requests
+        self._transfer = np.concatenate(blocks, axis=0) if blocks else np.zeros((0, num_transducers), dtype)
+        self._prepared = {}
+
+    def _prepare(self, states):
+        """Allocate the requirements, and the arguments for the calls, for a shape of transducer states."""
+        num_transducers = self._transfer.shape[1]
+        amplitudes = np.empty((num_transducers,) + states, self._transfer.dtype)
+        summed = np.empty((self._transfer.shape[0],) + states, self._transfer.dtype)
+        individual = []
+        units = []
+        for unit in self._units:
+            requirements = {'complex_transducer_amplitudes': amplitudes}
+            for name, (rows, shape) in unit.summed.items():
+                requirements[name + '_summed'] = summed[rows].reshape(shape + unit.shape + states)
+            unit_amplitudes = amplitudes.reshape((num_transducers,) + (1,) * len(unit.shape) + states)
+            for name, requests in unit.individual.items():
+                requirements[name + '_individual'] = np.empty(requests.shape + states, self._transfer.dtype)
+                individual.append((requests.reshape(requests.shape + (1,) * len(states)), unit_amplitudes, requirements[name + '_individual']))
+            kwargs = [{key: requirements[key] for key in getattr(implementation, kind + '_require')} for implementation, kind in unit.calls]
+            targets = [None if leaf[2] is None else leaf[2].reshape(leaf[2].shape + (1,) * (len(unit.shape) + len(states))) for leaf in unit.leaves]
+            units.append((kwargs, targets))
+        return amplitudes, summed, individual, units
+
+    def _out(self, key, shape, dtype):
+        """Get a preallocated buffer, allocating it if there is no matching buffer."""
+        try:
+            out = self._buffers[key]
+        except KeyError:
+            pass
+        else:
+            if out.shape == shape and out.dtype == dtype:
+                return out
+        out = self._buffers[key] = np.empty(shape, dtype)
+        return out
+
+    def _sum(self, key, terms):
+        """Sum arrays of the same shape in a preallocated buffer."""
+        if len(terms) == 1:
+            return terms[0]
+        dtype = terms[0].dtype
+        for term in terms[1:]:
+            dtype = np.promote_types(dtype, term.dtype)
+        out = self._out(key, terms[0].shape, dtype)
+        np.copyto(out, terms[0])
+        for term in terms[1:]:
+            np.add(out, term, out=out)
+        return out
+
+    def _evaluate_leaf(self, key, leaf, target, results):
+        values_call, jacobians_call, _, weight, sum_str, ndim = leaf
+        values = results[values_call]
+        if target is not None:
+            # The values might be views of the requirements, or shared with other leaves.
+            difference = np.subtract(values, target, out=self._out(key + ('difference',), values.shape, np.result_type(values, target)))
+            values = np.absolute(difference, out=self._out(key + ('squared',), difference.shape, difference.real.dtype))
+            np.square(values, out=values)
+        if weight is None:
+            return values
+        jacobians = results[jacobians_call]
+        if target is not None:
+            conjugate = np.conjugate(difference, out=self._out(key + ('conjugate',), difference.shape, difference.dtype))
+            conjugate = conjugate.reshape(conjugate.shape[:ndim] + (1,) + conjugate.shape[ndim:])
+            jacobians = np.multiply(jacobians, conjugate, out=self._out(key + ('squared jacobians',), jacobians.shape, np.result_type(jacobians, conjugate)))
+            jacobians *= 2
+        values = np.einsum(sum_str, weight, values, out=self._out(key + ('weighted',), values.shape[ndim:], np.result_type(weight, values)))
+        jacobians = np.einsum(sum_str, weight, jacobians, out=self._out(key + ('weighted jacobians',), jacobians.shape[ndim:], np.result_type(weight, jacobians)))
         return values, jacobians
+
+    def _evaluate_unit(self, unit_idx, unit, kwargs, targets):
+        results = [getattr(implementation, kind)(**call_kwargs) for (implementation, kind), call_kwargs in zip(unit.calls, kwargs)]
+        leaves = [self._evaluate_leaf((unit_idx, leaf_idx), leaf, target, results) for leaf_idx, (leaf, target) in enumerate(zip(unit.leaves, targets))]
+        if not isinstance(unit.field, MultiField):
+            return leaves[0]
+        if not unit.field._is_cost:
+            return leaves
+        return self._sum((unit_idx, 'values'), [leaf[0] for leaf in leaves]), self._sum((unit_idx, 'jacobians'), [leaf[1] for leaf in leaves])
+
+    def __call__(self, complex_transducer_amplitudes):
+        """Evaluate the compiled field.
+
+        Parameters
+        ----------
+        complex_transducer_amplitudes : complex numpy.ndarray
+            Complex representation of the transducer phases and amplitudes,
+            shape (N_transducers,) or (N_transducers, S) for S states.
+
+        Returns
+        -------
+        The same values as the compiled field, see the documentation of the field type.
+
+        """
+        if self.field.array.version != self._version:
+            self._compile()
+        states = np.shape(complex_transducer_amplitudes)[1:]
+        try:
+            amplitudes, summed, individual, units = self._prepared[states]
+        except KeyError:
+            amplitudes, summed, individual, units = self._prepared[states] = self._prepare(states)
+        np.copyto(amplitudes, complex_transducer_amplitudes, casting='same_kind')
+        np.matmul(self._transfer, amplitudes, out=summed)
+        for requests, unit_amplitudes, out in individual:
+            np.multiply(requests, unit_amplitudes, out=out)
+        results = [self._evaluate_unit(unit_idx, unit, *prepared) for unit_idx, (unit, prepared) in enumerate(zip(self._units, units))]
+
+        if not isinstance(self.field, MultiFieldMultiPoint):
+            return results[0]
+        if self.field._is_cost:
+            values = []
+            jacobians = []
+            for unit_idx, (unit, (val, jac)) in enumerate(zip(self._units, results)):
+                # Sum over the group dimension, which is before the dimensions of the positions and states.
+                axis = -len(unit.shape) - len(states)
+                values.append(np.sum(val, axis=axis, out=self._out((unit_idx, 'group values'), val.shape[:val.ndim + axis] + val.shape[val.ndim + axis + 1:], val.dtype)))
+                jacobians.append(np.sum(jac, axis=axis, out=self._out((unit_idx, 'group jacobians'), jac.shape[:jac.ndim + axis] + jac.shape[jac.ndim + axis + 1:], jac.dtype)))
+            return self._sum('values', values), self._sum('jacobians', jacobians)
+        values = [None] * len(self.field.fields)
+        for unit, group, result in zip(self._units, self.field._groups, results):
+            trailing = (slice(None),) * (len(unit.shape) - 1 + len(states))
+            for group_idx, idx in enumerate(group):
+                values[idx] = _map_arrays(lambda values: values[(Ellipsis, group_idx) + trailing], result)
+        return values
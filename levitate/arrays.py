@@ -12,11 +12,24 @@ simplify the creation of the transducer positions for common array geometries.
     DoublesidedArray
     DragonflyArray
 
+Requests evaluated for bound fields are stored in a process-wide cache,
+`request_cache`, which is shared between all arrays and fields.
+
+.. autosummary::
+    :nosignatures:
+
+    RequestCache
+
 """
 
 import numpy as np
+import collections
+import itertools
+import threading
 from . import utils
 
+_versions = itertools.count(1)
+
 
 class TransducerArray:
     """Base class to handle transducer arrays.
@@ -36,6 +49,16 @@ class TransducerArray:
         Fallback transducer size if no transducer model object is given, or if no grid is given.
     transducer_kwargs : dict
         Extra keyword arguments used when instantiating a new transducer model.
+    precision : str, default 'double'
+        The numerical precision used to evaluate the sound field, 'double' or 'single'.
+        Single precision evaluates everything in float32 and complex64, which halves the memory
+        usage and is faster for large calculations, e.g. visualization grids and coarse
+        optimizations, at the cost of roughly 7 significant digits instead of 16.
+    memory_budget : int, optional
+        Approximate number of bytes allowed for the evaluation of fields at many positions.
+        Fields called with more positions than fits in the budget are evaluated in chunks
+        of positions, with the results written into a preallocated output.
+        The default `None` evaluates all positions at once.
 
     Attributes
     ----------
@@ -55,18 +78,28 @@ class TransducerArray:
         Wavenumber in air, corresponding to `freq`.
     wavelength : float
         Wavelength in air, corresponding to `freq`.
+    precision : str
+        As above.
+    memory_budget : int or None
+        As above.
+    version : tuple
+        Identifies the state of the array, the transducer model, and the medium.
+        Changes when any attribute is set, but not if arrays are modified in-place.
 
     """
 
     _repr_fmt_spec = '{:%cls(transducer=%transducer_full, transducer_size=%transducer_size,\n\tpositions=%positions,\n\tnormals=%normals)}'
     _str_fmt_spec = '{:%cls(transducer=%transducer): %num_transducers transducers}'
+    _precision_dtypes = {'double': np.float64, 'single': np.float32}
     from .visualizers import ArrayVisualizer, ForceDiagram
 
     def __init__(self, positions, normals,
                  transducer=None, transducer_size=10e-3, transducer_kwargs=None,
-                 medium=None, **kwargs
+                 medium=None, precision='double', memory_budget=None, **kwargs
                  ):
         self.transducer_size = transducer_size
+        self.precision = precision
+        self.memory_budget = memory_budget
         transducer_kwargs = transducer_kwargs or {}
         self._extra_print_args = {}
 
@@ -115,6 +148,15 @@ class TransducerArray:
     def __str__(self):
         return self._str_fmt_spec.format(self)
 
+    def __setattr__(self, name, value):
+        super().__setattr__(name, value)
+        # Any change of the array invalidates cached requests.
+        super().__setattr__('_version', next(_versions))
+
+    @property
+    def version(self):
+        return self._version, self.transducer.version
+
     @property
     def k(self):
         return self.transducer.k
@@ -155,6 +197,16 @@ class TransducerArray:
     def medium(self, val):
         self.transducer.medium = val
 
+    @property
+    def precision(self):
+        return self._precision
+
+    @precision.setter
+    def precision(self, value):
+        if value not in self._precision_dtypes:
+            raise ValueError("Unknown precision '{}', use 'double' or 'single'".format(value))
+        self._precision = value
+
     @property
     def positions(self):
         return self._positions
@@ -191,6 +243,11 @@ class TransducerArray:
         except AttributeError:
             return 0
 
+    def _cast_positions(self, positions):
+        """Cast the transducer and receiver positions to the precision of the array."""
+        dtype = self._precision_dtypes[self.precision]
+        return self.positions.astype(dtype, copy=False), self.normals.astype(dtype, copy=False), np.asarray(positions, dtype=dtype)
+
     def focus_phases(self, focus):
         """Focuses the phases to create a focus point.
 
@@ -235,7 +292,7 @@ class TransducerArray:
         focus_phases = self.focus_phases(position)
         return np.mod(phases - focus_phases + np.pi, 2 * np.pi) - np.pi
 
-    def pressure_derivs(self, positions, orders=3):
+    def pressure_derivs(self, positions, orders=3, **kwargs):
         """Calculate derivatives of the pressure.
 
         Calculates the spatial derivatives of the pressure from all individual
@@ -248,6 +305,8 @@ class TransducerArray:
             The first dimension must have length 3 and represent the coordinates of the points.
         orders : int
             How many orders of derivatives to calculate. Currently three orders are supported.
+        **kwargs
+            Passed to the `pressure_derivs` method of the transducer model, e.g. `fused=True`.
 
         Returns
         -------
@@ -257,9 +316,10 @@ class TransducerArray:
             and the remaining dimensions are the same as the `positions` input with the first dimension removed.
 
         """
-        return self.transducer.pressure_derivs(self.positions, self.normals, positions, orders)
+        source_positions, source_normals, positions = self._cast_positions(positions)
+        return self.transducer.pressure_derivs(source_positions, source_normals, positions, orders, **kwargs)
 
-    def spherical_harmonics(self, positions, orders=0):
+    def spherical_harmonics(self, positions, orders=0, **kwargs):
         """Spherical harmonics expansion of transducer sound fields.
 
         The sound fields generated by the individual transducers in the array are expanded
@@ -275,6 +335,8 @@ class TransducerArray:
             The first dimension must have length 3 and represent the coordinates of the points.
         orders : int, default 0
             The maximum order to expand to.
+        **kwargs
+            Passed to the `spherical_harmonics` method of the transducer model.
 
         Return
         ------
@@ -286,7 +348,8 @@ class TransducerArray:
             the same as the `positions` input with the first dimension removed.
 
         """
-        return self.transducer.spherical_harmonics(self.positions, self.normals, positions, orders)
+        source_positions, source_normals, positions = self._cast_positions(positions)
+        return self.transducer.spherical_harmonics(source_positions, source_normals, positions, orders, **kwargs)
 
     def request(self, requests, position):
         """Evaluate a set of requests.
@@ -318,24 +381,17 @@ class TransducerArray:
             A dictionary of the set of calculated data, according to the requests.
 
         """
+        from .transducers import TransducerGeometry
         position = np.asarray(position)
-        parsed_requests = {}
-        for key, value in requests.items():
-            if key.find('pressure_derivs') > -1:
-                parsed_requests['pressure_derivs'] = max(value, parsed_requests.get('pressure_derivs', -1))
-            elif key.find('spherical_harmonics_gradient') > -1:
-                parsed_requests['spherical_harmonics'] = max(value + 1, parsed_requests.get('spherical_harmonics', -1))
-                parsed_requests['spherical_harmonics_gradient'] = max(value, parsed_requests.get('spherical_harmonics_gradient', -1))
-            elif key.find('spherical_harmonics') > -1:
-                parsed_requests['spherical_harmonics'] = max(value, parsed_requests.get('spherical_harmonics', -1))
-            elif key != 'complex_transducer_amplitudes':
-                raise ValueError("Unknown request from `TransducerArray`: '{}'".format(key))
+        parsed_requests = self._parse_requests(requests)
+        # The geometry is shared between the requests, so that distances and angles are only calculated once.
+        geometry = TransducerGeometry(*self._cast_positions(position))
 
         evaluated_requests = {}
         if 'pressure_derivs' in parsed_requests:
-            evaluated_requests['pressure_derivs'] = self.pressure_derivs(position, orders=parsed_requests.pop('pressure_derivs'))
+            evaluated_requests['pressure_derivs'] = self.pressure_derivs(position, orders=parsed_requests.pop('pressure_derivs'), geometry=geometry)
         if 'spherical_harmonics' in parsed_requests:
-            evaluated_requests['spherical_harmonics'] = self.spherical_harmonics(position, orders=parsed_requests.pop('spherical_harmonics'))
+            evaluated_requests['spherical_harmonics'] = self.spherical_harmonics(position, orders=parsed_requests.pop('spherical_harmonics'), geometry=geometry)
         if 'spherical_harmonics_gradient' in parsed_requests:
             gradient_order = parsed_requests.pop('spherical_harmonics_gradient')
             sph_idx = utils.SphericalHarmonicsIndexer(gradient_order)
@@ -347,26 +403,23 @@ class TransducerArray:
                 return -((n + m + 1) * (n - m + 1) / (2 * n + 1) / (2 * n + 3)) ** 0.5
 
             S = evaluated_requests['spherical_harmonics']
-            dS_dxpiy = np.zeros((len(sph_idx), self.num_transducers) + position.shape[1:], dtype=complex)
-            dS_dxmiy = np.zeros((len(sph_idx), self.num_transducers) + position.shape[1:], dtype=complex)
-            dS_dz = np.zeros((len(sph_idx), self.num_transducers) + position.shape[1:], dtype=complex)
-
-            for idx, (n, m) in enumerate(sph_idx):
-                dS_dxpiy[idx] = A(n, -m) * S[sph_idx(n + 1, m - 1)]
-                dS_dxmiy[idx] = -A(n, m) * S[sph_idx(n + 1, m + 1)]
-                dS_dz[idx] = -B(n, m) * S[sph_idx(n + 1, m)]
-                try:
-                    dS_dxpiy[idx] += A(n - 1, m - 1) * S[sph_idx(n - 1, m - 1)]
-                except ValueError:
-                    pass
-                try:
-                    dS_dxmiy[idx] -= A(n - 1, - m - 1) * S[sph_idx(n - 1, m + 1)]
-                except ValueError:
-                    pass
-                try:
-                    dS_dz[idx] += B(n - 1, m) * S[sph_idx(n - 1, m)]
-                except ValueError:
-                    pass
+            n, m = sph_idx.n, sph_idx.m
+
+            def gather(order_shift, mode_shift, coefficients):
+                # Coefficients multiplied with the neighbouring harmonics, zero where the neighbours do not exist.
+                indices, valid = sph_idx.neighbours(order_shift, mode_shift)
+                values = S[indices]
+                values *= np.where(valid, coefficients, 0).astype(S.real.dtype).reshape((-1,) + (1,) * (S.ndim - 1))
+                return values
+
+            with np.errstate(invalid='ignore', divide='ignore'):
+                # Coefficients for neighbours which do not exist can be invalid, but are not used.
+                dS_dxpiy = gather(1, -1, A(n, -m))
+                dS_dxpiy += gather(-1, -1, A(n - 1, m - 1))
+                dS_dxmiy = gather(1, 1, -A(n, m))
+                dS_dxmiy -= gather(-1, 1, A(n - 1, -m - 1))
+                dS_dz = gather(1, 0, -B(n, m))
+                dS_dz += gather(-1, 0, B(n - 1, m))
 
             dS_dx = 0.5 * (dS_dxpiy + dS_dxmiy)
             dS_dy = -0.5j * (dS_dxpiy - dS_dxmiy)
@@ -378,6 +431,46 @@ class TransducerArray:
             raise ValueError('Unevaluated requests: {}'.format(parsed_requests))
         return evaluated_requests
 
+    def _parse_requests(self, requests):
+        """Collect the highest order needed for each kind of request."""
+        parsed_requests = {}
+        for key, value in requests.items():
+            if key.find('pressure_derivs') > -1:
+                parsed_requests['pressure_derivs'] = max(value, parsed_requests.get('pressure_derivs', -1))
+            elif key.find('spherical_harmonics_gradient') > -1:
+                parsed_requests['spherical_harmonics'] = max(value + 1, parsed_requests.get('spherical_harmonics', -1))
+                parsed_requests['spherical_harmonics_gradient'] = max(value, parsed_requests.get('spherical_harmonics_gradient', -1))
+            elif key.find('spherical_harmonics') > -1:
+                parsed_requests['spherical_harmonics'] = max(value, parsed_requests.get('spherical_harmonics', -1))
+            elif key != 'complex_transducer_amplitudes':
+                raise ValueError("Unknown request from `TransducerArray`: '{}'".format(key))
+        return parsed_requests
+
+    def _fingerprint(self):
+        """Identify the state of the array which affects evaluated requests."""
+        return (
+            type(self).__name__, self.precision, repr(self.transducer),
+            self.positions.tobytes(), self.normals.tobytes(),
+        )
+
+    def _request_memory(self, requests):
+        """Estimate the memory needed to evaluate requests, in bytes per receiver position.
+
+        Accounts for the evaluated requests, the copies with the transducer amplitudes applied,
+        and the temporary arrays used by the transducer models, which are of similar size.
+
+        """
+        parsed_requests = self._parse_requests(requests)
+        num_values = 0
+        if 'pressure_derivs' in parsed_requests:
+            num_values += utils.num_pressure_derivs[parsed_requests['pressure_derivs']]
+        if 'spherical_harmonics' in parsed_requests:
+            num_values += (parsed_requests['spherical_harmonics'] + 1)**2
+        if 'spherical_harmonics_gradient' in parsed_requests:
+            num_values += 3 * (parsed_requests['spherical_harmonics_gradient'] + 1)**2
+        itemsize = 2 * np.dtype(self._precision_dtypes[self.precision]).itemsize
+        return 4 * num_values * self.num_transducers * itemsize
+
 
 class NormalTransducerArray(TransducerArray):
     """Transducer array with a clearly defined normal.
@@ -693,6 +786,7 @@ class DoublesidedArray(TransducerArray):
             positions=np.concatenate([lower_positions, upper_positions], axis=1) + offset[:, None],
             normals=np.concatenate([lower_normals, upper_normals], axis=1),
             transducer=array.transducer, transducer_size=array.transducer_size,
+            precision=array.precision, memory_budget=array.memory_budget,
         )
         self._extra_print_args.update(extra_print_args)
 
@@ -759,3 +853,131 @@ class DragonflyArray(NormalTransducerArray):
         from .hardware import dragonfly_grid
         kwargs.update(transducer_size=10e-3, positions=dragonfly_grid[0], normals=dragonfly_grid[1])
         super().__init__(**kwargs)
+
+
+class RequestCache:
+    """Bounded cache of evaluated array requests.
+
+    The cache is shared between arrays, and stores requests for a fingerprint
+    of the array state and the position at which the requests were evaluated.
+    A cached request of a higher order also serves requests of lower orders.
+    The returned arrays are shared between all users of the cache, and are read-only.
+    When the stored requests exceed the byte budget, the least recently used
+    entries are removed. Use the module level `request_cache` object instead
+    of creating new instances. The cache can be used from several threads,
+    and requests are evaluated without holding the lock of the cache.
+
+    Parameters
+    ----------
+    max_bytes : int, default 256 MiB
+        The maximum size of the stored requests, in bytes.
+
+    Attributes
+    ----------
+    hits : int
+        The number of requests served from the cache.
+    misses : int
+        The number of requests which needed to be evaluated.
+    nbytes : int
+        The current size of the stored requests, in bytes.
+
+    """
+
+    def __init__(self, max_bytes=2**28):
+        self.max_bytes = max_bytes
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def key(self, array, position):
+        """Create the cache key for an array and a position."""
+        position = np.asarray(position)
+        return (array._fingerprint(), position.dtype.str, position.shape, position.tobytes())
+
+    def request(self, array, requests, position, key=None):
+        """Evaluate a set of requests, using cached results if possible.
+
+        Parameters
+        ----------
+        array : TransducerArray
+            The array to evaluate the requests for.
+        requests : mapping, e.g. dict
+            The desired requests, see `TransducerArray.request`.
+        position : ndarray
+            The position where to evaluate the requests, shape (3, ...).
+        key : tuple, optional
+            A key from `key`, to avoid creating the same key repeatedly.
+
+        Returns
+        -------
+        evaluated_requests : dict
+            A dictionary of the set of calculated data, according to the requests.
+
+        """
+        if key is None:
+            key = self.key(array, position)
+        return self._request(array, array._parse_requests(requests), position, key)
+
+    def _request(self, array, parsed_requests, position, key):
+        with self._lock:
+            entry = self._entries.get(key, {})
+            missing = {name: order for name, order in parsed_requests.items() if entry.get(name, (-1, None))[0] < order}
+            if not missing:
+                self.hits += 1
+                self._entries.move_to_end(key)
+        if missing:
+            evaluated_requests = array.request(missing, position)
+            with self._lock:
+                self.misses += 1
+                # Other threads might have stored requests for the same key in the meantime.
+                entry = self._store(key, self._entries.get(key, entry), array._parse_requests(missing), evaluated_requests)
+        return {name: self._truncate(name, *entry[name], order) for name, order in parsed_requests.items()}
+
+    def _store(self, key, entry, orders, evaluated_requests):
+        entry = dict(entry)
+        for name, value in evaluated_requests.items():
+            # The stored arrays are shared, so they cannot be modified by callers.
+            # Views of read-only arrays, e.g. truncated lower orders, are also read-only.
+            value.setflags(write=False)
+            if orders[name] > entry.get(name, (-1, None))[0]:
+                entry[name] = (orders[name], value)
+        self._remove(key)
+        nbytes = sum(value.nbytes for order, value in entry.values())
+        if nbytes > self.max_bytes:
+            return entry
+        self._entries[key] = entry
+        self.nbytes += nbytes
+        while self.nbytes > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+        return entry
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.nbytes -= sum(value.nbytes for order, value in entry.values())
+
+    @staticmethod
+    def _truncate(name, cached_order, value, order):
+        if cached_order == order:
+            return value
+        if name == 'pressure_derivs':
+            return value[:utils.num_pressure_derivs[order]]
+        if name == 'spherical_harmonics':
+            return value[:(order + 1)**2]
+        return value[:, :(order + 1)**2]
+
+    def clear(self):
+        """Remove all stored requests and reset the statistics."""
+        with self._lock:
+            self._entries.clear()
+            self.nbytes = 0
+            self.hits = 0
+            self.misses = 0
+
+
+request_cache = RequestCache()
@@ -38,6 +38,32 @@ from . import materials, utils
 from ._field_wrappers import FieldImplementation
 
 
+def _outer_sum(conjugated, plain, ndim):
+    """Sum of outer products over the transducers.
+
+    Calculates ``sum(conj(a)[..., :, None] * b[..., None, :] for a, b in zip(conjugated, plain))``
+    where the transducer dimension is located after the `ndim` value dimensions.
+    The factors are broadcast to a common shape and the sum is computed as a
+    single matrix product instead of one outer product per term.
+    """
+    factors = np.broadcast_arrays(*conjugated, *plain)
+    rows = np.stack(factors[:len(conjugated)], axis=-1)
+    columns = np.stack(factors[len(conjugated):], axis=-1)
+    products = np.conj(np.moveaxis(rows, ndim, -2)) @ np.moveaxis(columns, ndim, -1)
+    return np.moveaxis(products, (-2, -1), (ndim, ndim + 1))
+
+
+def _cast_coefficient(coefficient, requirement):
+    """Cast a coefficient to the precision of a requirement.
+
+    Numpy scalars and arrays in double precision would otherwise promote
+    single precision requirements to double precision.
+    Real coefficients are kept real.
+    """
+    dtype = requirement.dtype if np.iscomplexobj(coefficient) else requirement.real.dtype
+    return np.asarray(coefficient, dtype=dtype)
+
+
 class Pressure(FieldImplementation):
     """Complex sound pressure :math:`p`.
 
@@ -84,10 +110,12 @@ class Velocity(FieldImplementation):
         )
 
     def values(self, pressure_derivs_summed):  # noqa: D102
-        return self.pre_grad_2_vel * pressure_derivs_summed[1:4]
+        pre_grad_2_vel = _cast_coefficient(self.pre_grad_2_vel, pressure_derivs_summed)
+        return pre_grad_2_vel * pressure_derivs_summed[1:4]
 
     def jacobians(self, pressure_derivs_individual):  # noqa: D102
-        return self.pre_grad_2_vel * pressure_derivs_individual[1:4]
+        pre_grad_2_vel = _cast_coefficient(self.pre_grad_2_vel, pressure_derivs_individual)
+        return pre_grad_2_vel * pressure_derivs_individual[1:4]
 
 
 class GorkovPotential(FieldImplementation):
@@ -111,6 +139,7 @@ class GorkovPotential(FieldImplementation):
     ndim = 0
     values_require = FieldImplementation.requirement(pressure_derivs_summed=1)
     jacobians_require = FieldImplementation.requirement(pressure_derivs_summed=1, pressure_derivs_individual=1)
+    hessians_require = FieldImplementation.requirement(pressure_derivs_individual=1)
 
     def __init__(self, array, radius=1e-3, material=materials.styrofoam, *args, **kwargs):  # noqa: D205, D400
         """
@@ -141,15 +170,27 @@ class GorkovPotential(FieldImplementation):
         )
 
     def values(self, pressure_derivs_summed):  # noqa: D102
-        values = self.pressure_coefficient * np.real(pressure_derivs_summed[0] * np.conj(pressure_derivs_summed[0]))
-        values -= self.gradient_coefficient * np.real(pressure_derivs_summed[1:4] * np.conj(pressure_derivs_summed[1:4])).sum(axis=0)
+        pressure_coefficient = _cast_coefficient(self.pressure_coefficient, pressure_derivs_summed)
+        gradient_coefficient = _cast_coefficient(self.gradient_coefficient, pressure_derivs_summed)
+        values = pressure_coefficient * np.real(pressure_derivs_summed[0] * np.conj(pressure_derivs_summed[0]))
+        values -= gradient_coefficient * np.real(pressure_derivs_summed[1:4] * np.conj(pressure_derivs_summed[1:4])).sum(axis=0)
         return values
 
     def jacobians(self, pressure_derivs_summed, pressure_derivs_individual):  # noqa: D102
-        jacobians = self.pressure_coefficient * 2 * pressure_derivs_individual[0] * np.conj(pressure_derivs_summed[0])
-        jacobians -= self.gradient_coefficient * 2 * (pressure_derivs_individual[1:4] * np.conj(pressure_derivs_summed[1:4, None])).sum(axis=0)
+        pressure_coefficient = _cast_coefficient(self.pressure_coefficient, pressure_derivs_summed)
+        gradient_coefficient = _cast_coefficient(self.gradient_coefficient, pressure_derivs_summed)
+        jacobians = pressure_coefficient * 2 * pressure_derivs_individual[0] * np.conj(pressure_derivs_summed[0])
+        jacobians -= gradient_coefficient * 2 * (pressure_derivs_individual[1:4] * np.conj(pressure_derivs_summed[1:4, None])).sum(axis=0)
         return jacobians
 
+    def hessians(self, pressure_derivs_individual):  # noqa: D102
+        dp = pressure_derivs_individual
+        pc, gc = 2 * _cast_coefficient(self.pressure_coefficient, dp), 2 * _cast_coefficient(self.gradient_coefficient, dp)
+        return _outer_sum(
+            [dp[0], dp[1], dp[2], dp[3]],
+            [pc * dp[0], -gc * dp[1], -gc * dp[2], -gc * dp[3]],
+            self.ndim)
+
 
 class GorkovGradient(GorkovPotential):
     r"""Gradient of Gor'kov's potential, :math:`\nabla U`.
@@ -168,21 +209,40 @@ class GorkovGradient(GorkovPotential):
     ndim = 1
     values_require = FieldImplementation.requirement(pressure_derivs_summed=2)
     jacobians_require = FieldImplementation.requirement(pressure_derivs_summed=2, pressure_derivs_individual=2)
+    hessians_require = FieldImplementation.requirement(pressure_derivs_individual=2)
 
     def values(self, pressure_derivs_summed):  # noqa: D102
-        values = np.real(self.pressure_coefficient * np.conj(pressure_derivs_summed[0]) * pressure_derivs_summed[1:4])  # Pressure parts
-        values -= np.real(self.gradient_coefficient * np.conj(pressure_derivs_summed[1]) * pressure_derivs_summed[[4, 7, 8]])  # Vx parts
-        values -= np.real(self.gradient_coefficient * np.conj(pressure_derivs_summed[2]) * pressure_derivs_summed[[7, 5, 9]])  # Vy parts
-        values -= np.real(self.gradient_coefficient * np.conj(pressure_derivs_summed[3]) * pressure_derivs_summed[[8, 9, 6]])  # Vz parts
+        pressure_coefficient = _cast_coefficient(self.pressure_coefficient, pressure_derivs_summed)
+        gradient_coefficient = _cast_coefficient(self.gradient_coefficient, pressure_derivs_summed)
+        values = np.real(pressure_coefficient * np.conj(pressure_derivs_summed[0]) * pressure_derivs_summed[1:4])  # Pressure parts
+        values -= np.real(gradient_coefficient * np.conj(pressure_derivs_summed[1]) * pressure_derivs_summed[[4, 7, 8]])  # Vx parts
+        values -= np.real(gradient_coefficient * np.conj(pressure_derivs_summed[2]) * pressure_derivs_summed[[7, 5, 9]])  # Vy parts
+        values -= np.real(gradient_coefficient * np.conj(pressure_derivs_summed[3]) * pressure_derivs_summed[[8, 9, 6]])  # Vz parts
         return values * 2
 
     def jacobians(self, pressure_derivs_summed, pressure_derivs_individual):  # noqa: D102
-        jacobians = self.pressure_coefficient * (np.conj(pressure_derivs_summed[0]) * pressure_derivs_individual[1:4] + np.conj(pressure_derivs_summed[1:4, None]) * pressure_derivs_individual[0])  # Pressure parts
-        jacobians -= self.gradient_coefficient * (np.conj(pressure_derivs_summed[1]) * pressure_derivs_individual[[4, 7, 8]] + np.conj(pressure_derivs_summed[[4, 7, 8], None]) * pressure_derivs_individual[1])  # Vx parts
-        jacobians -= self.gradient_coefficient * (np.conj(pressure_derivs_summed[2]) * pressure_derivs_individual[[7, 5, 9]] + np.conj(pressure_derivs_summed[[7, 5, 9], None]) * pressure_derivs_individual[2])  # Vy parts
-        jacobians -= self.gradient_coefficient * (np.conj(pressure_derivs_summed[3]) * pressure_derivs_individual[[8, 9, 6]] + np.conj(pressure_derivs_summed[[8, 9, 6], None]) * pressure_derivs_individual[3])  # Vz parts
+        pressure_coefficient = _cast_coefficient(self.pressure_coefficient, pressure_derivs_summed)
+        gradient_coefficient = _cast_coefficient(self.gradient_coefficient, pressure_derivs_summed)
+        jacobians = pressure_coefficient * (np.conj(pressure_derivs_summed[0]) * pressure_derivs_individual[1:4] + np.conj(pressure_derivs_summed[1:4, None]) * pressure_derivs_individual[0])  # Pressure parts
+        jacobians -= gradient_coefficient * (np.conj(pressure_derivs_summed[1]) * pressure_derivs_individual[[4, 7, 8]] + np.conj(pressure_derivs_summed[[4, 7, 8], None]) * pressure_derivs_individual[1])  # Vx parts
+        jacobians -= gradient_coefficient * (np.conj(pressure_derivs_summed[2]) * pressure_derivs_individual[[7, 5, 9]] + np.conj(pressure_derivs_summed[[7, 5, 9], None]) * pressure_derivs_individual[2])  # Vy parts
+        jacobians -= gradient_coefficient * (np.conj(pressure_derivs_summed[3]) * pressure_derivs_individual[[8, 9, 6]] + np.conj(pressure_derivs_summed[[8, 9, 6], None]) * pressure_derivs_individual[3])  # Vz parts
         return jacobians * 2
 
+    def hessians(self, pressure_derivs_individual):  # noqa: D102
+        dp = pressure_derivs_individual
+        pc, gc = 2 * _cast_coefficient(self.pressure_coefficient, dp), 2 * _cast_coefficient(self.gradient_coefficient, dp)
+        return _outer_sum(
+            [dp[0], dp[1:4],  # Pressure parts
+             dp[1], dp[[4, 7, 8]],  # Vx parts
+             dp[2], dp[[7, 5, 9]],  # Vy parts
+             dp[3], dp[[8, 9, 6]]],  # Vz parts
+            [pc * dp[1:4], pc * dp[0],
+             -gc * dp[[4, 7, 8]], -gc * dp[1],
+             -gc * dp[[7, 5, 9]], -gc * dp[2],
+             -gc * dp[[8, 9, 6]], -gc * dp[3]],
+            self.ndim)
+
 
 class GorkovLaplacian(GorkovPotential):
     r"""Laplacian of Gor'kov's potential, :math:`\nabla^2 U`.
@@ -201,21 +261,40 @@ class GorkovLaplacian(GorkovPotential):
     ndim = 1
     values_require = FieldImplementation.requirement(pressure_derivs_summed=3)
     jacobians_require = FieldImplementation.requirement(pressure_derivs_summed=3, pressure_derivs_individual=3)
+    hessians_require = FieldImplementation.requirement(pressure_derivs_individual=3)
 
     def values(self, pressure_derivs_summed):  # noqa: D102
-        values = np.real(self.pressure_coefficient * (np.conj(pressure_derivs_summed[0]) * pressure_derivs_summed[[4, 5, 6]] + pressure_derivs_summed[[1, 2, 3]] * np.conj(pressure_derivs_summed[[1, 2, 3]])))
-        values -= np.real(self.gradient_coefficient * (np.conj(pressure_derivs_summed[1]) * pressure_derivs_summed[[10, 15, 17]] + pressure_derivs_summed[[4, 7, 8]] * np.conj(pressure_derivs_summed[[4, 7, 8]])))
-        values -= np.real(self.gradient_coefficient * (np.conj(pressure_derivs_summed[2]) * pressure_derivs_summed[[13, 11, 18]] + pressure_derivs_summed[[7, 5, 9]] * np.conj(pressure_derivs_summed[[7, 5, 9]])))
-        values -= np.real(self.gradient_coefficient * (np.conj(pressure_derivs_summed[3]) * pressure_derivs_summed[[14, 16, 12]] + pressure_derivs_summed[[8, 9, 6]] * np.conj(pressure_derivs_summed[[8, 9, 6]])))
+        pressure_coefficient = _cast_coefficient(self.pressure_coefficient, pressure_derivs_summed)
+        gradient_coefficient = _cast_coefficient(self.gradient_coefficient, pressure_derivs_summed)
+        values = np.real(pressure_coefficient * (np.conj(pressure_derivs_summed[0]) * pressure_derivs_summed[[4, 5, 6]] + pressure_derivs_summed[[1, 2, 3]] * np.conj(pressure_derivs_summed[[1, 2, 3]])))
+        values -= np.real(gradient_coefficient * (np.conj(pressure_derivs_summed[1]) * pressure_derivs_summed[[10, 15, 17]] + pressure_derivs_summed[[4, 7, 8]] * np.conj(pressure_derivs_summed[[4, 7, 8]])))
+        values -= np.real(gradient_coefficient * (np.conj(pressure_derivs_summed[2]) * pressure_derivs_summed[[13, 11, 18]] + pressure_derivs_summed[[7, 5, 9]] * np.conj(pressure_derivs_summed[[7, 5, 9]])))
+        values -= np.real(gradient_coefficient * (np.conj(pressure_derivs_summed[3]) * pressure_derivs_summed[[14, 16, 12]] + pressure_derivs_summed[[8, 9, 6]] * np.conj(pressure_derivs_summed[[8, 9, 6]])))
         return values * 2
 
     def jacobians(self, pressure_derivs_summed, pressure_derivs_individual):  # noqa: D102
-        jacobians = self.pressure_coefficient * (np.conj(pressure_derivs_summed[0]) * pressure_derivs_individual[[4, 5, 6]] + np.conj(pressure_derivs_summed[[4, 5, 6], None]) * pressure_derivs_individual[0] + 2 * np.conj(pressure_derivs_summed[[1, 2, 3], None]) * pressure_derivs_individual[[1, 2, 3]])
-        jacobians -= self.gradient_coefficient * (np.conj(pressure_derivs_summed[1]) * pressure_derivs_individual[[10, 15, 17]] + np.conj(pressure_derivs_summed[[10, 15, 17], None]) * pressure_derivs_individual[1] + 2 * np.conj(pressure_derivs_summed[[4, 7, 8], None]) * pressure_derivs_individual[[4, 7, 8]])
-        jacobians -= self.gradient_coefficient * (np.conj(pressure_derivs_summed[2]) * pressure_derivs_individual[[13, 11, 18]] + np.conj(pressure_derivs_summed[[13, 11, 18], None]) * pressure_derivs_individual[2] + 2 * np.conj(pressure_derivs_summed[[7, 5, 9], None]) * pressure_derivs_individual[[7, 5, 9]])
-        jacobians -= self.gradient_coefficient * (np.conj(pressure_derivs_summed[3]) * pressure_derivs_individual[[14, 16, 12]] + np.conj(pressure_derivs_summed[[14, 16, 12], None]) * pressure_derivs_individual[3] + 2 * np.conj(pressure_derivs_summed[[8, 9, 6], None]) * pressure_derivs_individual[[8, 9, 6]])
+        pressure_coefficient = _cast_coefficient(self.pressure_coefficient, pressure_derivs_summed)
+        gradient_coefficient = _cast_coefficient(self.gradient_coefficient, pressure_derivs_summed)
+        jacobians = pressure_coefficient * (np.conj(pressure_derivs_summed[0]) * pressure_derivs_individual[[4, 5, 6]] + np.conj(pressure_derivs_summed[[4, 5, 6], None]) * pressure_derivs_individual[0] + 2 * np.conj(pressure_derivs_summed[[1, 2, 3], None]) * pressure_derivs_individual[[1, 2, 3]])
+        jacobians -= gradient_coefficient * (np.conj(pressure_derivs_summed[1]) * pressure_derivs_individual[[10, 15, 17]] + np.conj(pressure_derivs_summed[[10, 15, 17], None]) * pressure_derivs_individual[1] + 2 * np.conj(pressure_derivs_summed[[4, 7, 8], None]) * pressure_derivs_individual[[4, 7, 8]])
+        jacobians -= gradient_coefficient * (np.conj(pressure_derivs_summed[2]) * pressure_derivs_individual[[13, 11, 18]] + np.conj(pressure_derivs_summed[[13, 11, 18], None]) * pressure_derivs_individual[2] + 2 * np.conj(pressure_derivs_summed[[7, 5, 9], None]) * pressure_derivs_individual[[7, 5, 9]])
+        jacobians -= gradient_coefficient * (np.conj(pressure_derivs_summed[3]) * pressure_derivs_individual[[14, 16, 12]] + np.conj(pressure_derivs_summed[[14, 16, 12], None]) * pressure_derivs_individual[3] + 2 * np.conj(pressure_derivs_summed[[8, 9, 6], None]) * pressure_derivs_individual[[8, 9, 6]])
         return jacobians * 2
 
+    def hessians(self, pressure_derivs_individual):  # noqa: D102
+        dp = pressure_derivs_individual
+        pc, gc = 2 * _cast_coefficient(self.pressure_coefficient, dp), 2 * _cast_coefficient(self.gradient_coefficient, dp)
+        return _outer_sum(
+            [dp[0], dp[[4, 5, 6]], dp[[1, 2, 3]],  # Pressure parts
+             dp[1], dp[[10, 15, 17]], dp[[4, 7, 8]],  # Vx parts
+             dp[2], dp[[13, 11, 18]], dp[[7, 5, 9]],  # Vy parts
+             dp[3], dp[[14, 16, 12]], dp[[8, 9, 6]]],  # Vz parts
+            [pc * dp[[4, 5, 6]], pc * dp[0], 2 * pc * dp[[1, 2, 3]],
+             -gc * dp[[10, 15, 17]], -gc * dp[1], -2 * gc * dp[[4, 7, 8]],
+             -gc * dp[[13, 11, 18]], -gc * dp[2], -2 * gc * dp[[7, 5, 9]],
+             -gc * dp[[14, 16, 12]], -gc * dp[3], -2 * gc * dp[[8, 9, 6]]],
+            self.ndim)
+
 
 class RadiationForce(FieldImplementation):
     r"""Radiation force calculation for small beads in arbitrary sound fields.
@@ -250,6 +329,7 @@ class RadiationForce(FieldImplementation):
     ndim = 1
     values_require = FieldImplementation.requirement(pressure_derivs_summed=2)
     jacobians_require = FieldImplementation.requirement(pressure_derivs_summed=2, pressure_derivs_individual=2)
+    hessians_require = FieldImplementation.requirement(pressure_derivs_individual=2)
 
     def __init__(self, array, radius=1e-3, material=materials.styrofoam, *args, **kwargs):  # noqa: D205, D400
         """
@@ -281,19 +361,37 @@ class RadiationForce(FieldImplementation):
         )
 
     def values(self, pressure_derivs_summed):  # noqa: D102
-        values = np.real(self.pressure_coefficient * pressure_derivs_summed[0] * np.conj(pressure_derivs_summed[[1, 2, 3]]))
-        values += np.real(self.velocity_coefficient * pressure_derivs_summed[1] * np.conj(pressure_derivs_summed[[4, 7, 8]]))
-        values += np.real(self.velocity_coefficient * pressure_derivs_summed[2] * np.conj(pressure_derivs_summed[[7, 5, 9]]))
-        values += np.real(self.velocity_coefficient * pressure_derivs_summed[3] * np.conj(pressure_derivs_summed[[8, 9, 6]]))
+        pressure_coefficient = _cast_coefficient(self.pressure_coefficient, pressure_derivs_summed)
+        velocity_coefficient = _cast_coefficient(self.velocity_coefficient, pressure_derivs_summed)
+        values = np.real(pressure_coefficient * pressure_derivs_summed[0] * np.conj(pressure_derivs_summed[[1, 2, 3]]))
+        values += np.real(velocity_coefficient * pressure_derivs_summed[1] * np.conj(pressure_derivs_summed[[4, 7, 8]]))
+        values += np.real(velocity_coefficient * pressure_derivs_summed[2] * np.conj(pressure_derivs_summed[[7, 5, 9]]))
+        values += np.real(velocity_coefficient * pressure_derivs_summed[3] * np.conj(pressure_derivs_summed[[8, 9, 6]]))
         return values
 
     def jacobians(self, pressure_derivs_summed, pressure_derivs_individual):  # noqa: D102
-        jacobians = self.pressure_coefficient * pressure_derivs_individual[0] * np.conj(pressure_derivs_summed[[1, 2, 3], None]) + np.conj(self.pressure_coefficient) * np.conj(pressure_derivs_summed[0]) * pressure_derivs_individual[[1, 2, 3]]
-        jacobians += self.velocity_coefficient * pressure_derivs_individual[1] * np.conj(pressure_derivs_summed[[4, 7, 8], None]) + np.conj(self.velocity_coefficient) * np.conj(pressure_derivs_summed[1]) * pressure_derivs_individual[[4, 7, 8]]
-        jacobians += self.velocity_coefficient * pressure_derivs_individual[2] * np.conj(pressure_derivs_summed[[7, 5, 9], None]) + np.conj(self.velocity_coefficient) * np.conj(pressure_derivs_summed[2]) * pressure_derivs_individual[[7, 5, 9]]
-        jacobians += self.velocity_coefficient * pressure_derivs_individual[3] * np.conj(pressure_derivs_summed[[8, 9, 6], None]) + np.conj(self.velocity_coefficient) * np.conj(pressure_derivs_summed[3]) * pressure_derivs_individual[[8, 9, 6]]
+        pressure_coefficient = _cast_coefficient(self.pressure_coefficient, pressure_derivs_summed)
+        velocity_coefficient = _cast_coefficient(self.velocity_coefficient, pressure_derivs_summed)
+        jacobians = pressure_coefficient * pressure_derivs_individual[0] * np.conj(pressure_derivs_summed[[1, 2, 3], None]) + np.conj(pressure_coefficient) * np.conj(pressure_derivs_summed[0]) * pressure_derivs_individual[[1, 2, 3]]
+        jacobians += velocity_coefficient * pressure_derivs_individual[1] * np.conj(pressure_derivs_summed[[4, 7, 8], None]) + np.conj(velocity_coefficient) * np.conj(pressure_derivs_summed[1]) * pressure_derivs_individual[[4, 7, 8]]
+        jacobians += velocity_coefficient * pressure_derivs_individual[2] * np.conj(pressure_derivs_summed[[7, 5, 9], None]) + np.conj(velocity_coefficient) * np.conj(pressure_derivs_summed[2]) * pressure_derivs_individual[[7, 5, 9]]
+        jacobians += velocity_coefficient * pressure_derivs_individual[3] * np.conj(pressure_derivs_summed[[8, 9, 6], None]) + np.conj(velocity_coefficient) * np.conj(pressure_derivs_summed[3]) * pressure_derivs_individual[[8, 9, 6]]
         return jacobians
 
+    def hessians(self, pressure_derivs_individual):  # noqa: D102
+        dp = pressure_derivs_individual
+        pc, vc = _cast_coefficient(self.pressure_coefficient, dp), _cast_coefficient(self.velocity_coefficient, dp)
+        return _outer_sum(
+            [dp[[1, 2, 3]], dp[0],
+             dp[[4, 7, 8]], dp[1],
+             dp[[7, 5, 9]], dp[2],
+             dp[[8, 9, 6]], dp[3]],
+            [pc * dp[0], np.conj(pc) * dp[[1, 2, 3]],
+             vc * dp[1], np.conj(vc) * dp[[4, 7, 8]],
+             vc * dp[2], np.conj(vc) * dp[[7, 5, 9]],
+             vc * dp[3], np.conj(vc) * dp[[8, 9, 6]]],
+            self.ndim)
+
 
 class RadiationForceStiffness(RadiationForce):
     r"""Radiation force gradient for small beads in arbitrary sound fields.
@@ -310,21 +408,40 @@ class RadiationForceStiffness(RadiationForce):
     ndim = 1
     values_require = FieldImplementation.requirement(pressure_derivs_summed=3)
     jacobians_require = FieldImplementation.requirement(pressure_derivs_summed=3, pressure_derivs_individual=3)
+    hessians_require = FieldImplementation.requirement(pressure_derivs_individual=3)
 
     def values(self, pressure_derivs_summed):  # noqa: D102
-        values = np.real(self.pressure_coefficient * (pressure_derivs_summed[0] * np.conj(pressure_derivs_summed[[4, 5, 6]]) + pressure_derivs_summed[[1, 2, 3]] * np.conj(pressure_derivs_summed[[1, 2, 3]])))
-        values += np.real(self.velocity_coefficient * (pressure_derivs_summed[1] * np.conj(pressure_derivs_summed[[10, 15, 17]]) + pressure_derivs_summed[[4, 7, 8]] * np.conj(pressure_derivs_summed[[4, 7, 8]])))
-        values += np.real(self.velocity_coefficient * (pressure_derivs_summed[2] * np.conj(pressure_derivs_summed[[13, 11, 18]]) + pressure_derivs_summed[[7, 5, 9]] * np.conj(pressure_derivs_summed[[7, 5, 9]])))
-        values += np.real(self.velocity_coefficient * (pressure_derivs_summed[3] * np.conj(pressure_derivs_summed[[14, 16, 12]]) + pressure_derivs_summed[[8, 9, 6]] * np.conj(pressure_derivs_summed[[8, 9, 6]])))
+        pressure_coefficient = _cast_coefficient(self.pressure_coefficient, pressure_derivs_summed)
+        velocity_coefficient = _cast_coefficient(self.velocity_coefficient, pressure_derivs_summed)
+        values = np.real(pressure_coefficient * (pressure_derivs_summed[0] * np.conj(pressure_derivs_summed[[4, 5, 6]]) + pressure_derivs_summed[[1, 2, 3]] * np.conj(pressure_derivs_summed[[1, 2, 3]])))
+        values += np.real(velocity_coefficient * (pressure_derivs_summed[1] * np.conj(pressure_derivs_summed[[10, 15, 17]]) + pressure_derivs_summed[[4, 7, 8]] * np.conj(pressure_derivs_summed[[4, 7, 8]])))
+        values += np.real(velocity_coefficient * (pressure_derivs_summed[2] * np.conj(pressure_derivs_summed[[13, 11, 18]]) + pressure_derivs_summed[[7, 5, 9]] * np.conj(pressure_derivs_summed[[7, 5, 9]])))
+        values += np.real(velocity_coefficient * (pressure_derivs_summed[3] * np.conj(pressure_derivs_summed[[14, 16, 12]]) + pressure_derivs_summed[[8, 9, 6]] * np.conj(pressure_derivs_summed[[8, 9, 6]])))
         return values
 
     def jacobians(self, pressure_derivs_summed, pressure_derivs_individual):  # noqa: D102
-        jacobians = self.pressure_coefficient * pressure_derivs_individual[0] * np.conj(pressure_derivs_summed[[4, 5, 6], None]) + np.conj(self.pressure_coefficient) * np.conj(pressure_derivs_summed[0]) * pressure_derivs_individual[[4, 5, 6]] + (self.pressure_coefficient + np.conj(self.pressure_coefficient)) * np.conj(pressure_derivs_summed[[1, 2, 3], None]) * pressure_derivs_individual[[1, 2, 3]]
-        jacobians += self.velocity_coefficient * pressure_derivs_individual[1] * np.conj(pressure_derivs_summed[[10, 15, 17], None]) + np.conj(self.velocity_coefficient) * np.conj(pressure_derivs_summed[1]) * pressure_derivs_individual[[10, 15, 17]] + (self.velocity_coefficient + np.conj(self.velocity_coefficient)) * np.conj(pressure_derivs_summed[[4, 7, 8], None]) * pressure_derivs_individual[[4, 7, 8]]
-        jacobians += self.velocity_coefficient * pressure_derivs_individual[2] * np.conj(pressure_derivs_summed[[13, 11, 18], None]) + np.conj(self.velocity_coefficient) * np.conj(pressure_derivs_summed[2]) * pressure_derivs_individual[[13, 11, 18]] + (self.velocity_coefficient + np.conj(self.velocity_coefficient)) * np.conj(pressure_derivs_summed[[7, 5, 9], None]) * pressure_derivs_individual[[7, 5, 9]]
-        jacobians += self.velocity_coefficient * pressure_derivs_individual[3] * np.conj(pressure_derivs_summed[[14, 16, 12], None]) + np.conj(self.velocity_coefficient) * np.conj(pressure_derivs_summed[3]) * pressure_derivs_individual[[14, 16, 12]] + (self.velocity_coefficient + np.conj(self.velocity_coefficient)) * np.conj(pressure_derivs_summed[[8, 9, 6], None]) * pressure_derivs_individual[[8, 9, 6]]
+        pressure_coefficient = _cast_coefficient(self.pressure_coefficient, pressure_derivs_summed)
+        velocity_coefficient = _cast_coefficient(self.velocity_coefficient, pressure_derivs_summed)
+        jacobians = pressure_coefficient * pressure_derivs_individual[0] * np.conj(pressure_derivs_summed[[4, 5, 6], None]) + np.conj(pressure_coefficient) * np.conj(pressure_derivs_summed[0]) * pressure_derivs_individual[[4, 5, 6]] + (pressure_coefficient + np.conj(pressure_coefficient)) * np.conj(pressure_derivs_summed[[1, 2, 3], None]) * pressure_derivs_individual[[1, 2, 3]]
+        jacobians += velocity_coefficient * pressure_derivs_individual[1] * np.conj(pressure_derivs_summed[[10, 15, 17], None]) + np.conj(velocity_coefficient) * np.conj(pressure_derivs_summed[1]) * pressure_derivs_individual[[10, 15, 17]] + (velocity_coefficient + np.conj(velocity_coefficient)) * np.conj(pressure_derivs_summed[[4, 7, 8], None]) * pressure_derivs_individual[[4, 7, 8]]
+        jacobians += velocity_coefficient * pressure_derivs_individual[2] * np.conj(pressure_derivs_summed[[13, 11, 18], None]) + np.conj(velocity_coefficient) * np.conj(pressure_derivs_summed[2]) * pressure_derivs_individual[[13, 11, 18]] + (velocity_coefficient + np.conj(velocity_coefficient)) * np.conj(pressure_derivs_summed[[7, 5, 9], None]) * pressure_derivs_individual[[7, 5, 9]]
+        jacobians += velocity_coefficient * pressure_derivs_individual[3] * np.conj(pressure_derivs_summed[[14, 16, 12], None]) + np.conj(velocity_coefficient) * np.conj(pressure_derivs_summed[3]) * pressure_derivs_individual[[14, 16, 12]] + (velocity_coefficient + np.conj(velocity_coefficient)) * np.conj(pressure_derivs_summed[[8, 9, 6], None]) * pressure_derivs_individual[[8, 9, 6]]
         return jacobians
 
+    def hessians(self, pressure_derivs_individual):  # noqa: D102
+        dp = pressure_derivs_individual
+        pc, vc = _cast_coefficient(self.pressure_coefficient, dp), _cast_coefficient(self.velocity_coefficient, dp)
+        return _outer_sum(
+            [dp[[4, 5, 6]], dp[0], dp[[1, 2, 3]],
+             dp[[10, 15, 17]], dp[1], dp[[4, 7, 8]],
+             dp[[13, 11, 18]], dp[2], dp[[7, 5, 9]],
+             dp[[14, 16, 12]], dp[3], dp[[8, 9, 6]]],
+            [pc * dp[0], np.conj(pc) * dp[[4, 5, 6]], 2 * np.real(pc) * dp[[1, 2, 3]],
+             vc * dp[1], np.conj(vc) * dp[[10, 15, 17]], 2 * np.real(vc) * dp[[4, 7, 8]],
+             vc * dp[2], np.conj(vc) * dp[[13, 11, 18]], 2 * np.real(vc) * dp[[7, 5, 9]],
+             vc * dp[3], np.conj(vc) * dp[[14, 16, 12]], 2 * np.real(vc) * dp[[8, 9, 6]]],
+            self.ndim)
+
 
 class RadiationForceCurl(RadiationForce):
     r"""Curl or rotation of the radiation force.
@@ -343,6 +460,7 @@ class RadiationForceCurl(RadiationForce):
     ndim = 1
     values_require = FieldImplementation.requirement(pressure_derivs_summed=2)
     jacobians_require = FieldImplementation.requirement(pressure_derivs_summed=2, pressure_derivs_individual=2)
+    hessians_require = FieldImplementation.requirement(pressure_derivs_individual=2)
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -350,19 +468,37 @@ class RadiationForceCurl(RadiationForce):
         self.velocity_coefficient = -2 * np.imag(self.velocity_coefficient)
 
     def values(self, pressure_derivs_summed):  # noqa: D102
-        values = self.pressure_coefficient * np.imag(pressure_derivs_summed[[2, 3, 1]] * np.conj(pressure_derivs_summed[[3, 1, 2]]))
-        values += self.velocity_coefficient * np.imag(pressure_derivs_summed[[7, 8, 4]] * np.conj(pressure_derivs_summed[[8, 4, 7]]))
-        values += self.velocity_coefficient * np.imag(pressure_derivs_summed[[5, 9, 7]] * np.conj(pressure_derivs_summed[[9, 7, 5]]))
-        values += self.velocity_coefficient * np.imag(pressure_derivs_summed[[9, 6, 8]] * np.conj(pressure_derivs_summed[[6, 8, 9]]))
+        pressure_coefficient = _cast_coefficient(self.pressure_coefficient, pressure_derivs_summed)
+        velocity_coefficient = _cast_coefficient(self.velocity_coefficient, pressure_derivs_summed)
+        values = pressure_coefficient * np.imag(pressure_derivs_summed[[2, 3, 1]] * np.conj(pressure_derivs_summed[[3, 1, 2]]))
+        values += velocity_coefficient * np.imag(pressure_derivs_summed[[7, 8, 4]] * np.conj(pressure_derivs_summed[[8, 4, 7]]))
+        values += velocity_coefficient * np.imag(pressure_derivs_summed[[5, 9, 7]] * np.conj(pressure_derivs_summed[[9, 7, 5]]))
+        values += velocity_coefficient * np.imag(pressure_derivs_summed[[9, 6, 8]] * np.conj(pressure_derivs_summed[[6, 8, 9]]))
         return values
 
     def jacobians(self, pressure_derivs_summed, pressure_derivs_individual):  # noqa: D102
-        jacobians = 1j * self.pressure_coefficient * (np.conj(pressure_derivs_summed[[2, 3, 1], None]) * pressure_derivs_individual[[3, 1, 2]] - np.conj(pressure_derivs_summed[[3, 1, 2], None]) * pressure_derivs_individual[[2, 3, 1]])
-        jacobians += 1j * self.velocity_coefficient * (np.conj(pressure_derivs_summed[[7, 8, 4], None]) * pressure_derivs_individual[[8, 4, 7]] - np.conj(pressure_derivs_summed[[8, 4, 7], None]) * pressure_derivs_individual[[7, 8, 4]])
-        jacobians += 1j * self.velocity_coefficient * (np.conj(pressure_derivs_summed[[5, 9, 7], None]) * pressure_derivs_individual[[9, 7, 5]] - np.conj(pressure_derivs_summed[[9, 7, 5], None]) * pressure_derivs_individual[[5, 9, 7]])
-        jacobians += 1j * self.velocity_coefficient * (np.conj(pressure_derivs_summed[[9, 6, 8], None]) * pressure_derivs_individual[[6, 8, 9]] - np.conj(pressure_derivs_summed[[6, 8, 9], None]) * pressure_derivs_individual[[9, 6, 8]])
+        pressure_coefficient = _cast_coefficient(self.pressure_coefficient, pressure_derivs_summed)
+        velocity_coefficient = _cast_coefficient(self.velocity_coefficient, pressure_derivs_summed)
+        jacobians = 1j * pressure_coefficient * (np.conj(pressure_derivs_summed[[2, 3, 1], None]) * pressure_derivs_individual[[3, 1, 2]] - np.conj(pressure_derivs_summed[[3, 1, 2], None]) * pressure_derivs_individual[[2, 3, 1]])
+        jacobians += 1j * velocity_coefficient * (np.conj(pressure_derivs_summed[[7, 8, 4], None]) * pressure_derivs_individual[[8, 4, 7]] - np.conj(pressure_derivs_summed[[8, 4, 7], None]) * pressure_derivs_individual[[7, 8, 4]])
+        jacobians += 1j * velocity_coefficient * (np.conj(pressure_derivs_summed[[5, 9, 7], None]) * pressure_derivs_individual[[9, 7, 5]] - np.conj(pressure_derivs_summed[[9, 7, 5], None]) * pressure_derivs_individual[[5, 9, 7]])
+        jacobians += 1j * velocity_coefficient * (np.conj(pressure_derivs_summed[[9, 6, 8], None]) * pressure_derivs_individual[[6, 8, 9]] - np.conj(pressure_derivs_summed[[6, 8, 9], None]) * pressure_derivs_individual[[9, 6, 8]])
         return jacobians
 
+    def hessians(self, pressure_derivs_individual):  # noqa: D102
+        dp = pressure_derivs_individual
+        pc, vc = 1j * _cast_coefficient(self.pressure_coefficient, dp), 1j * _cast_coefficient(self.velocity_coefficient, dp)
+        return _outer_sum(
+            [dp[[2, 3, 1]], dp[[3, 1, 2]],
+             dp[[7, 8, 4]], dp[[8, 4, 7]],
+             dp[[5, 9, 7]], dp[[9, 7, 5]],
+             dp[[9, 6, 8]], dp[[6, 8, 9]]],
+            [pc * dp[[3, 1, 2]], -pc * dp[[2, 3, 1]],
+             vc * dp[[8, 4, 7]], -vc * dp[[7, 8, 4]],
+             vc * dp[[9, 7, 5]], -vc * dp[[5, 9, 7]],
+             vc * dp[[6, 8, 9]], -vc * dp[[9, 6, 8]]],
+            self.ndim)
+
 
 class RadiationForceGradient(RadiationForce):
     r"""Full matrix gradient of the radiation force.
@@ -378,6 +514,7 @@ class RadiationForceGradient(RadiationForce):
     ndim = 2
     values_require = FieldImplementation.requirement(pressure_derivs_summed=3)
     jacobians_require = FieldImplementation.requirement(pressure_derivs_summed=3, pressure_derivs_individual=3)
+    hessians_require = FieldImplementation.requirement(pressure_derivs_individual=3)
 
     _0 = (0, None, None)
     _x = (1, None, None)
@@ -400,11 +537,13 @@ class RadiationForceGradient(RadiationForce):
     _zqw = ([[14, 19, 17], [19, 16, 18], [17, 18, 12]], )
 
     def values(self, pressure_derivs_summed):  # noqa: D102
+        pressure_coefficient = _cast_coefficient(self.pressure_coefficient, pressure_derivs_summed)
+        velocity_coefficient = _cast_coefficient(self.velocity_coefficient, pressure_derivs_summed)
         p = pressure_derivs_summed
 
         return np.real(
-            self.pressure_coefficient * (p[self._0] * np.conj(p[self._qw]) + p[self._w] * np.conj(p[self._q]))
-            + self.velocity_coefficient * (
+            pressure_coefficient * (p[self._0] * np.conj(p[self._qw]) + p[self._w] * np.conj(p[self._q]))
+            + velocity_coefficient * (
                 p[self._xw] * np.conj(p[self._xq]) + p[self._x] * np.conj(p[self._xqw])
                 + p[self._yw] * np.conj(p[self._yq]) + p[self._y] * np.conj(p[self._yqw])
                 + p[self._zw] * np.conj(p[self._zq]) + p[self._z] * np.conj(p[self._zqw])
@@ -412,24 +551,40 @@ class RadiationForceGradient(RadiationForce):
         )
 
     def jacobians(self, pressure_derivs_summed, pressure_derivs_individual):  # noqa: D102
+        pressure_coefficient = _cast_coefficient(self.pressure_coefficient, pressure_derivs_summed)
+        velocity_coefficient = _cast_coefficient(self.velocity_coefficient, pressure_derivs_summed)
         p = pressure_derivs_summed[:, None]
         dp = pressure_derivs_individual
 
         return (
-            self.pressure_coefficient * (dp[self._0] * np.conj(p[self._qw]) + dp[self._w] * np.conj(p[self._q]))
-            + np.conj(self.pressure_coefficient) * (np.conj(p[self._0]) * dp[self._qw] + np.conj(p[self._w]) * dp[self._q])
-            + self.velocity_coefficient * (
+            pressure_coefficient * (dp[self._0] * np.conj(p[self._qw]) + dp[self._w] * np.conj(p[self._q]))
+            + np.conj(pressure_coefficient) * (np.conj(p[self._0]) * dp[self._qw] + np.conj(p[self._w]) * dp[self._q])
+            + velocity_coefficient * (
                 dp[self._xw] * np.conj(p[self._xq]) + dp[self._x] * np.conj(p[self._xqw])
                 + dp[self._yw] * np.conj(p[self._yq]) + dp[self._y] * np.conj(p[self._yqw])
                 + dp[self._zw] * np.conj(p[self._zq]) + dp[self._z] * np.conj(p[self._zqw])
             )
-            + np.conj(self.velocity_coefficient) * (
+            + np.conj(velocity_coefficient) * (
                 np.conj(p[self._xw]) * dp[self._xq] + np.conj(p[self._x]) * dp[self._xqw]
                 + np.conj(p[self._yw]) * dp[self._yq] + np.conj(p[self._y]) * dp[self._yqw]
                 + np.conj(p[self._zw]) * dp[self._zq] + np.conj(p[self._z]) * dp[self._zqw]
             )
         )
 
+    def hessians(self, pressure_derivs_individual):  # noqa: D102
+        dp = pressure_derivs_individual
+        pc, vc = _cast_coefficient(self.pressure_coefficient, dp), _cast_coefficient(self.velocity_coefficient, dp)
+        return _outer_sum(
+            [dp[self._qw], dp[self._q], dp[self._0], dp[self._w],
+             dp[self._xq], dp[self._xqw], dp[self._xw], dp[self._x],
+             dp[self._yq], dp[self._yqw], dp[self._yw], dp[self._y],
+             dp[self._zq], dp[self._zqw], dp[self._zw], dp[self._z]],
+            [pc * dp[self._0], pc * dp[self._w], np.conj(pc) * dp[self._qw], np.conj(pc) * dp[self._q],
+             vc * dp[self._xw], vc * dp[self._x], np.conj(vc) * dp[self._xq], np.conj(vc) * dp[self._xqw],
+             vc * dp[self._yw], vc * dp[self._y], np.conj(vc) * dp[self._yq], np.conj(vc) * dp[self._yqw],
+             vc * dp[self._zw], vc * dp[self._z], np.conj(vc) * dp[self._zq], np.conj(vc) * dp[self._zqw]],
+            self.ndim)
+
 
 class SphericalHarmonicsForceDecomposition(FieldImplementation):
     r"""Radiation force decomposed in spherical harmonics.
@@ -468,17 +623,11 @@ class SphericalHarmonicsForceDecomposition(FieldImplementation):
         sph_idx = utils.SphericalHarmonicsIndexer(self.orders)
         from scipy.special import spherical_jn, spherical_yn
         # Create indexing arrays for sound field harmonics
-        self.N_M = []  # Indices for the S_n^m coefficients
-        self.Nr_M = []  # Indices for the S_(n+1)^m coefficients
-        self.Nr_Mr = []  # Indices for the S_(n+1)^(m+1) coefficients
-        self.N_mM = []  # Indices for the S_n^-m coefficients
-        self.Nr_mMr = []  # Indices for the S_(n+1)^-(m+1) coefficients
-        for n, m in sph_idx:
-            self.N_M.append(sph_idx(n, m))
-            self.Nr_M.append(sph_idx(n + 1, m))
-            self.Nr_Mr.append(sph_idx(n + 1, m + 1))
-            self.N_mM.append(sph_idx(n, -m))
-            self.Nr_mMr.append(sph_idx(n + 1, -1 - m))
+        self.N_M = sph_idx(sph_idx.n, sph_idx.m)  # Indices for the S_n^m coefficients
+        self.Nr_M = sph_idx.neighbours(1, 0)[0]  # Indices for the S_(n+1)^m coefficients
+        self.Nr_Mr = sph_idx.neighbours(1, 1)[0]  # Indices for the S_(n+1)^(m+1) coefficients
+        self.N_mM = sph_idx(sph_idx.n, -sph_idx.m)  # Indices for the S_n^-m coefficients
+        self.Nr_mMr = sph_idx(sph_idx.n + 1, -1 - sph_idx.m)  # Indices for the S_(n+1)^-(m+1) coefficients
 
         # Calculate bessel functions, hankel functions, and their derivatives
         ka = array.k * radius
@@ -535,9 +684,9 @@ class SphericalHarmonicsForceDecomposition(FieldImplementation):
         )
 
     def values(self, spherical_harmonics_summed):  # noqa: D102
-        # Reshape coefficients to allow multiple receiver positions
-        xy_coefs = self.xy_coefficients[self.N_M].reshape((-1,) + (1,) * (spherical_harmonics_summed.ndim - 1))
-        z_coefs = self.z_coefficients[self.N_M].reshape((-1,) + (1,) * (spherical_harmonics_summed.ndim - 1))
+        # Reshape coefficients to allow multiple receiver positions, and match the precision of the expansion
+        xy_coefs = self.xy_coefficients[self.N_M].reshape((-1,) + (1,) * (spherical_harmonics_summed.ndim - 1)).astype(spherical_harmonics_summed.dtype, copy=False)
+        z_coefs = self.z_coefficients[self.N_M].reshape((-1,) + (1,) * (spherical_harmonics_summed.ndim - 1)).astype(spherical_harmonics_summed.dtype, copy=False)
         S = spherical_harmonics_summed
 
         Fxy = xy_coefs * S[self.N_M] * np.conj(S[self.Nr_Mr]) - np.conj(xy_coefs) * np.conj(S[self.N_mM]) * S[self.Nr_mMr]
@@ -548,8 +697,8 @@ class SphericalHarmonicsForceDecomposition(FieldImplementation):
         return np.stack([Fx, Fy, Fz])
 
     def jacobians(self, spherical_harmonics_summed, spherical_harmonics_individual):  # noqa: D102
-        xy_coefs = self.xy_coefficients[self.N_M].reshape((-1,) + (1,) * (spherical_harmonics_individual.ndim - 1))
-        z_coefs = self.z_coefficients[self.N_M].reshape((-1,) + (1,) * (spherical_harmonics_individual.ndim - 1))
+        xy_coefs = self.xy_coefficients[self.N_M].reshape((-1,) + (1,) * (spherical_harmonics_individual.ndim - 1)).astype(spherical_harmonics_individual.dtype, copy=False)
+        z_coefs = self.z_coefficients[self.N_M].reshape((-1,) + (1,) * (spherical_harmonics_individual.ndim - 1)).astype(spherical_harmonics_individual.dtype, copy=False)
 
         S = spherical_harmonics_summed[:, None]
         dS = spherical_harmonics_individual
@@ -608,9 +757,9 @@ class SphericalHarmonicsForceGradientDecomposition(SphericalHarmonicsForceDecomp
             spherical_harmonics_individual=self.orders + 1, spherical_harmonics_gradient_individual=self.orders + 1)
 
     def values(self, spherical_harmonics_summed, spherical_harmonics_gradient_summed):  # noqa: D102
-        # Reshape coefficients to allow multiple receiver positions
-        xy_coefs = self.xy_coefficients[self.N_M].reshape((-1,) + (1,) * (spherical_harmonics_summed.ndim - 1))
-        z_coefs = self.z_coefficients[self.N_M].reshape((-1,) + (1,) * (spherical_harmonics_summed.ndim - 1))
+        # Reshape coefficients to allow multiple receiver positions, and match the precision of the expansion
+        xy_coefs = self.xy_coefficients[self.N_M].reshape((-1,) + (1,) * (spherical_harmonics_summed.ndim - 1)).astype(spherical_harmonics_summed.dtype, copy=False)
+        z_coefs = self.z_coefficients[self.N_M].reshape((-1,) + (1,) * (spherical_harmonics_summed.ndim - 1)).astype(spherical_harmonics_summed.dtype, copy=False)
         S = spherical_harmonics_summed
         DS = spherical_harmonics_gradient_summed
 
@@ -626,8 +775,8 @@ class SphericalHarmonicsForceGradientDecomposition(SphericalHarmonicsForceDecomp
 
     def jacobians(self, spherical_harmonics_summed, spherical_harmonics_individual,
                   spherical_harmonics_gradient_summed, spherical_harmonics_gradient_individual):  # noqa: D102
-        xy_coefs = self.xy_coefficients[self.N_M].reshape((-1,) + (1,) * (spherical_harmonics_individual.ndim - 1))
-        z_coefs = self.z_coefficients[self.N_M].reshape((-1,) + (1,) * (spherical_harmonics_individual.ndim - 1))
+        xy_coefs = self.xy_coefficients[self.N_M].reshape((-1,) + (1,) * (spherical_harmonics_individual.ndim - 1)).astype(spherical_harmonics_individual.dtype, copy=False)
+        z_coefs = self.z_coefficients[self.N_M].reshape((-1,) + (1,) * (spherical_harmonics_individual.ndim - 1)).astype(spherical_harmonics_individual.dtype, copy=False)
 
         S = spherical_harmonics_summed[:, None]
         DS = spherical_harmonics_gradient_summed[:, :, None]
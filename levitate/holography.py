@@ -0,0 +1,399 @@
+"""Iterative solvers for acoustic holograms.
+
+Many applications, e.g. mid-air haptics or multiple levitation traps, only
+need a sound field with target pressure magnitudes at a number of points.
+This can be solved with the general cost function minimization in `~levitate.optimization`,
+but the dedicated algorithms in this module are much faster, and are suitable for
+recalculation of the transducer amplitudes in real time.
+
+All solvers precompute the propagation matrix from the transducer amplitudes to the
+complex sound pressure at the target points when they are created.
+Calling the solver with target pressure magnitudes returns complex transducer
+amplitudes, which can be used with the rest of the package.
+
+.. autosummary::
+    :nosignatures:
+
+    Backpropagation
+    GerchbergSaxton
+    WeightedGerchbergSaxton
+    LevenbergMarquardt
+
+Solutions from previous minimizations can be stored in a `HologramLibrary`, which
+finds the closest previous solution to use as start values for similar problems.
+
+References
+----------
+.. [Marzo] A. Marzo and B. W. Drinkwater, "Holographic acoustic tweezers"
+           Proc. Natl. Acad. Sci. USA, vol. 116, no. 1, pp. 84–89, Jan. 2019.
+
+.. [Plasencia] D. M. Plasencia, R. Hirayama, R. Montano-Murillo, and S. Subramanian,
+               "GS-PAT: High-speed Multi-point Sound-fields for Phased Arrays of Transducers"
+               ACM Trans. Graph., vol. 39, no. 4, Jul. 2020.
+
+"""
+
+import numpy as np
+import scipy.spatial
+import hashlib
+from ._field_wrappers import MultiFieldMultiPoint
+
+
+class HologramSolver:
+    """Base class for hologram solvers.
+
+    Precomputes the propagation matrix :math:`H`, such that the complex sound pressure
+    at the target points is :math:`p = Hx`, where :math:`x` is the complex transducer amplitudes.
+    Subclasses implement the `solve` method, which is called with the target
+    pressure magnitudes and the start values.
+
+    Parameters
+    ----------
+    array : TransducerArray
+        The array to calculate transducer amplitudes for.
+    positions : array_like
+        The target points, shape (3, M) for M points.
+    iterations : int, optional
+        The number of iterations to run, defaults to a value suitable for the algorithm.
+    variable_amplitudes : bool, default False
+        Toggles if the transducer amplitudes can vary between 0 and 1,
+        or if all transducers have unit amplitude.
+
+    Attributes
+    ----------
+    propagation_matrix : complex ndarray
+        The matrix :math:`H`, shape (M, N) for N transducers.
+
+    """
+
+    iterations = 20
+
+    def __init__(self, array, positions, iterations=None, variable_amplitudes=False):
+        self.array = array
+        self.positions = np.asarray(positions).reshape((3, -1))
+        if iterations is not None:
+            self.iterations = iterations
+        self.variable_amplitudes = variable_amplitudes
+        self.propagation_matrix = array.pressure_derivs(self.positions, orders=0)[0].T
+        # Backpropagation which exactly recreates the pressure at a single point.
+        self._backpropagation_matrix = np.conj(self.propagation_matrix.T) / np.sum(np.abs(self.propagation_matrix)**2, axis=1)
+
+    def __call__(self, target, start_values=None):
+        """Calculate transducer amplitudes for target pressure magnitudes.
+
+        Parameters
+        ----------
+        target : array_like
+            The target pressure magnitudes at the points, shape (M,).
+        start_values : complex ndarray, optional
+            Start values for the transducer amplitudes, shape (N,).
+            Defaults to the backpropagation of the target.
+
+        Returns
+        -------
+        complex_transducer_amplitudes : complex ndarray
+            The transducer amplitudes, shape (N,).
+
+        """
+        target = np.broadcast_to(np.asarray(target, dtype=float), self.positions.shape[1:])
+        if start_values is None:
+            start_values = self._constrain(self._backpropagation_matrix @ target.astype(self.propagation_matrix.dtype))
+        return self.solve(target, np.asarray(start_values, dtype=self.propagation_matrix.dtype))
+
+    def solve(self, target, start_values):
+        """Run the algorithm, see `__call__`."""
+        raise NotImplementedError('Hologram solvers must implement `solve`')
+
+    def _constrain(self, complex_transducer_amplitudes):
+        """Project transducer amplitudes to unit amplitudes, or to amplitudes at most one."""
+        magnitudes = np.abs(complex_transducer_amplitudes)
+        if self.variable_amplitudes:
+            return complex_transducer_amplitudes / max(1, np.max(magnitudes))
+        return complex_transducer_amplitudes / np.where(magnitudes > 0, magnitudes, 1)
+
+
+class Backpropagation(HologramSolver):
+    """Direct backpropagation of the target pressures.
+
+    The target pressures, with zero phase, are propagated back to the transducers
+    and the amplitudes are constrained. This is a single step, and is
+    the start value for the iterative solvers.
+    """
+
+    iterations = 0
+
+    def solve(self, target, start_values):  # noqa: D102
+        return start_values
+
+
+class GerchbergSaxton(HologramSolver):
+    """Iterative backpropagation, similar to the Gerchberg-Saxton algorithm.
+
+    Each iteration propagates the transducer amplitudes to the target points,
+    replaces the pressure magnitudes with the target magnitudes while keeping
+    the phases, propagates back to the transducers, and constrains the amplitudes.
+    See e.g. [Plasencia]_.
+    """
+
+    def solve(self, target, start_values):  # noqa: D102
+        forward, backward = self.propagation_matrix, self._backpropagation_matrix
+        x = start_values
+        for _ in range(self.iterations):
+            pressure = forward @ x
+            x = self._constrain(backward @ (target * pressure / np.maximum(np.abs(pressure), np.finfo(float).tiny)))
+        return x
+
+
+class WeightedGerchbergSaxton(HologramSolver):
+    """Weighted Gerchberg-Saxton algorithm.
+
+    Similar to `GerchbergSaxton`, but the target magnitudes used in the backpropagation
+    are weighted to compensate for the deviations from the target in the previous iterations.
+    This gives a more uniform ratio between the achieved and the target pressures
+    when the transducer amplitudes are constrained, see [Plasencia]_.
+    """
+
+    def solve(self, target, start_values):  # noqa: D102
+        forward, backward = self.propagation_matrix, self._backpropagation_matrix
+        x = start_values
+        weights = np.ones(target.shape)
+        active = target > 0
+        for _ in range(self.iterations):
+            pressure = forward @ x
+            magnitudes = np.maximum(np.abs(pressure), np.finfo(float).tiny)
+            ratio = np.where(active, magnitudes / np.where(active, target, 1), 1)
+            weights = weights * np.mean(ratio[active]) / ratio
+            x = self._constrain(backward @ (weights * target * pressure / magnitudes))
+        return x
+
+
+class LevenbergMarquardt(HologramSolver):
+    r"""Levenberg-Marquardt least squares on the pressure magnitudes.
+
+    Minimizes :math:`\sum_m (|p_m| - A_m)^2` where :math:`A_m` is the target magnitudes,
+    using Levenberg-Marquardt steps in the transducer phases, and optionally the amplitudes,
+    see e.g. [Marzo]_. Since there are usually fewer points than transducers, the damped
+    normal equations are solved in the space of the points, which only requires
+    the solution of an M by M system in each iteration.
+    Variable amplitudes are clipped to the interval [0, 1] after each step.
+
+    Parameters
+    ----------
+    *args
+        Passed to `HologramSolver`.
+    damping : float, default 1e-3
+        The initial damping, relative to the largest diagonal element of the normal equations.
+    **kwargs
+        Passed to `HologramSolver`.
+
+    """
+
+    iterations = 50
+
+    def __init__(self, *args, damping=1e-3, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.damping = damping
+
+    def _residuals(self, phases, amplitudes, target):
+        x = amplitudes * np.exp(1j * phases)
+        pressure = self.propagation_matrix @ x
+        return np.abs(pressure) - target, pressure, x
+
+    def solve(self, target, start_values):  # noqa: D102
+        phases = np.angle(start_values)
+        amplitudes = np.abs(start_values) if self.variable_amplitudes else np.ones(phases.shape)
+        residuals, pressure, x = self._residuals(phases, amplitudes, target)
+        cost = np.sum(residuals**2)
+        damping = None
+        for _ in range(self.iterations):
+            # Derivatives of the pressure magnitudes with respect to the phases and the amplitudes.
+            normalized = np.conj(pressure / np.maximum(np.abs(pressure), np.finfo(float).tiny))[:, None] * self.propagation_matrix
+            jacobians = -np.imag(normalized * x)
+            if self.variable_amplitudes:
+                jacobians = np.concatenate([jacobians, np.real(normalized * np.exp(1j * phases))], axis=1)
+            normal = jacobians @ jacobians.T
+            scale = np.max(np.diag(normal))
+            if scale == 0:
+                break
+            if damping is None:
+                damping = self.damping * scale
+            while True:
+                step = -jacobians.T @ np.linalg.solve(normal + damping * np.eye(normal.shape[0]), residuals)
+                new_phases = phases + step[:phases.size]
+                new_amplitudes = np.clip(amplitudes + step[phases.size:], 0, 1) if self.variable_amplitudes else amplitudes
+                new_residuals, new_pressure, new_x = self._residuals(new_phases, new_amplitudes, target)
+                new_cost = np.sum(new_residuals**2)
+                if new_cost < cost:
+                    damping /= 10
+                    break
+                damping *= 10
+                if damping > 1e16 * scale:
+                    # No step decreases the cost, i.e. a local minimum.
+                    return x
+            phases, amplitudes, residuals, pressure, x, cost = new_phases, new_amplitudes, new_residuals, new_pressure, new_x, new_cost
+        return x
+
+
+class HologramLibrary:
+    """Store of previous solutions, used as start values for similar problems.
+
+    The solutions are stored for the signature of a bound cost field, i.e. the fields and
+    weights without the positions, together with the bound positions. Queries find the
+    stored solution with the closest positions for the same signature, using a KD-tree.
+    Pass the library to `~levitate.optimization.minimize` to use the closest solution
+    as start values, and to store the result.
+
+    Parameters
+    ----------
+    max_entries : int, optional
+        The maximum number of stored solutions. The least recently used solutions are
+        removed when more solutions are added. Defaults to no limit.
+    max_distance : float, optional
+        The largest distance between the positions for a stored solution to be used,
+        in meters. The distance is the euclidean norm of the differences of all positions
+        in the cost field. Defaults to no limit.
+
+    """
+
+    def __init__(self, max_entries=None, max_distance=None):
+        self.max_entries = max_entries
+        self.max_distance = max_distance
+        # Maps the signatures to the positions (K, 3P), the solutions (K, N), and the last use (K,) of K entries.
+        self._entries = {}
+        self._trees = {}
+        self._clock = 0
+
+    def __len__(self):
+        return sum(len(used) for positions, states, used in self._entries.values())
+
+    @staticmethod
+    def _key(field):
+        """Split a bound cost field into the signature and the positions."""
+        if isinstance(field, MultiFieldMultiPoint):
+            points = field.fields
+        elif getattr(field, '_is_bound', False):
+            points = [field]
+        else:
+            raise TypeError('The library can only store solutions for fields bound to positions, not {}'.format(type(field).__name__))
+        signature = ' + '.join('{:%cls%name%fields%weight}'.format(point).replace('%fields', '') + ' @ ' + str(np.shape(point.position)) for point in points)
+        fingerprint = hashlib.sha1(repr(field.array._fingerprint()).encode()).hexdigest()
+        positions = np.concatenate([np.ravel(point.position) for point in points])
+        return signature + ' for ' + fingerprint, positions
+
+    def query(self, field):
+        """Find the closest stored solution.
+
+        Parameters
+        ----------
+        field
+            A cost field bound to positions.
+
+        Returns
+        -------
+        complex_transducer_amplitudes : complex ndarray or None
+            The stored solution with the closest positions, or None if there is no
+            stored solution for the signature within the maximum distance.
+
+        """
+        signature, positions = self._key(field)
+        if signature not in self._entries:
+            return None
+        stored_positions, states, used = self._entries[signature]
+        if signature not in self._trees:
+            self._trees[signature] = scipy.spatial.cKDTree(stored_positions)
+        distance, index = self._trees[signature].query(positions, distance_upper_bound=np.inf if self.max_distance is None else self.max_distance)
+        if index == len(states):
+            # No neighbour within the maximum distance.
+            return None
+        self._clock += 1
+        used[index] = self._clock
+        return states[index].copy()
+
+    def add(self, field, complex_transducer_amplitudes):
+        """Store a solution.
+
+        A stored solution with identical positions for the same signature is replaced.
+
+        Parameters
+        ----------
+        field
+            The cost field bound to positions.
+        complex_transducer_amplitudes : complex ndarray
+            The solution, shape (N_transducers,).
+
+        """
+        signature, positions = self._key(field)
+        state = np.asarray(complex_transducer_amplitudes, dtype=complex)
+        self._clock += 1
+        if signature in self._entries:
+            stored_positions, states, used = self._entries[signature]
+            existing = np.flatnonzero(np.all(stored_positions == positions, axis=1))
+            if len(existing):
+                states[existing[0]] = state
+                used[existing[0]] = self._clock
+                return
+            self._entries[signature] = (
+                np.concatenate([stored_positions, positions[None]]),
+                np.concatenate([states, state[None]]),
+                np.append(used, self._clock),
+            )
+        else:
+            self._entries[signature] = (positions[None].copy(), state[None].copy(), np.array([self._clock]))
+        self._trees.pop(signature, None)
+        if self.max_entries is not None:
+            self.evict(self.max_entries)
+
+    def evict(self, max_entries=0):
+        """Remove the least recently used solutions.
+
+        Parameters
+        ----------
+        max_entries : int, default 0
+            The number of solutions to keep.
+
+        """
+        excess = len(self) - max_entries
+        if excess <= 0:
+            return
+        last_used = np.sort(np.concatenate([used for positions, states, used in self._entries.values()]))
+        # The clock is unique for each entry, so this removes exactly the excess entries.
+        threshold = last_used[excess - 1]
+        for signature, (positions, states, used) in list(self._entries.items()):
+            keep = used > threshold
+            if not np.all(keep):
+                self._trees.pop(signature, None)
+                if np.any(keep):
+                    self._entries[signature] = (positions[keep], states[keep], used[keep])
+                else:
+                    del self._entries[signature]
+
+    def save(self, filename):
+        """Save the stored solutions to a compressed ``.npz`` file."""
+        arrays = {'signatures': np.array(list(self._entries), dtype=str), 'clock': self._clock}
+        for idx, (positions, states, used) in enumerate(self._entries.values()):
+            arrays['positions_{}'.format(idx)] = positions
+            arrays['states_{}'.format(idx)] = states
+            arrays['used_{}'.format(idx)] = used
+        np.savez_compressed(filename, **arrays)
+
+    @classmethod
+    def load(cls, filename, **kwargs):
+        """Load solutions saved with `save`.
+
+        Parameters
+        ----------
+        filename : str
+            The file to load.
+        **kwargs
+            Passed to the constructor, e.g. `max_entries`.
+
+        """
+        library = cls(**kwargs)
+        with np.load(filename) as data:
+            for idx, signature in enumerate(data['signatures']):
+                library._entries[str(signature)] = (
+                    data['positions_{}'.format(idx)], data['states_{}'.format(idx)], data['used_{}'.format(idx)])
+            library._clock = int(data['clock'])
+        if library.max_entries is not None:
+            library.evict(library.max_entries)
+        return library
@@ -22,6 +22,8 @@ the entire package, but some classes (notably the fields) pre-calculate
 a lot of material-dependent properties. These properties will **NOT** be
 updated after a material update. It is therefore highly recommended to
 define the material properties once in the beginning of a session.
+Cached array requests are not affected by this, they track the `~Material.version`
+of the materials and are recalculated after a material update.
 
 .. autosummary:
     :nosignatures:
@@ -32,6 +34,10 @@ define the material properties once in the beginning of a session.
 """
 
 import warnings
+import itertools
+
+# Shared between all materials, so that a version is never reused for a different state.
+_versions = itertools.count(1)
 
 
 class MaterialMeta(type):
@@ -58,6 +64,7 @@ class MaterialMeta(type):
             dct[prop] = cls.class_instance_property(prop, dct['properties'][prop])
             dct.setdefault('_' + prop, None)  # We need at least a placeholder value not to break the first instance.
         dct['properties'] = set(dct['properties'].keys())
+        dct['_global_version'] = next(_versions)
         return super().__new__(cls, name, bases, dct)
 
     @staticmethod
@@ -71,9 +78,11 @@ class MaterialMeta(type):
                 return getattr(self, key)
         def setter(self, val):
             if self._use_global:
-                return setattr(self.__class__, key, val)
+                setattr(self.__class__, key, val)
+                self.__class__._global_version = next(_versions)
             else:
-                return setattr(self, key, val)
+                setattr(self, key, val)
+                self._local_version = next(_versions)
         return property(getter, setter, doc=doc)
 
 
@@ -94,6 +103,7 @@ class Material(metaclass=MaterialMeta):
     _str_fmt_spec = '{:%name}'
     _repr_fmt_spec = '{:%name(%props)}'
     _use_global_bool = True
+    _local_version = 0
     properties = {
         'c': 'The (longitudinal) speed of sound in the material, in m/s.',
         'rho': 'The density of the material, in kg/m^3.',
@@ -115,6 +125,16 @@ class Material(metaclass=MaterialMeta):
         r"""(Specific) Acoustic (wave) impedance :math:`\rho c`, non settable."""
         return self.rho * self.c
 
+    @property
+    def version(self):
+        """Version of the material properties, changes when any of the properties change.
+
+        Global and local properties have separate versions.
+        """
+        if self._use_global:
+            return self.__class__._global_version
+        return self._local_version
+
     @property
     def _use_global(self):
         return self._use_global_bool
@@ -153,6 +173,7 @@ class Material(metaclass=MaterialMeta):
         self._use_global = True
         for prop in self.properties:
             setattr(self.__class__, '_' + prop, getattr(self, '_' + prop))
+        self.__class__._global_version = next(_versions)
 
     @classmethod
     def force_all_to_global(cls):
@@ -8,6 +8,27 @@ should be constructed using the `~levitate.fields` module.
 import numpy as np
 import scipy.optimize
 import itertools
+import collections
+import concurrent.futures
+import os
+import time
+
+# Methods in `scipy.optimize.minimize` which use the hessians of the cost function.
+_hessian_methods = ('newton-cg', 'dogleg', 'trust-ncg', 'trust-krylov', 'trust-exact', 'trust-constr')
+
+
+def _phase_amplitude_hessians(hessians, conjugate_hessians, jacobians, amplitudes, variable_amplitudes):
+    """Transform hessians with respect to the complex amplitudes to phases and amplitudes.
+
+    Uses the hessians as returned by `~levitate._field_wrappers.FieldBase.evaluate_hessians`.
+    The variables are ordered as the phases followed by the amplitudes.
+    """
+    phases_phases = np.real(hessians - conjugate_hessians) - np.diag(np.real(jacobians))
+    if not variable_amplitudes:
+        return phases_phases
+    amplitudes_amplitudes = np.real(hessians + conjugate_hessians) / (amplitudes[:, None] * amplitudes[None, :])
+    amplitudes_phases = -(np.imag(hessians - conjugate_hessians) + np.diag(np.imag(jacobians))) / amplitudes[:, None]
+    return np.block([[phases_phases, amplitudes_phases.T], [amplitudes_phases, amplitudes_amplitudes]])
 
 
 def _minimize_sequence(function_sequence, array,
@@ -110,6 +131,37 @@ def _minimize_phase_amplitude(function, array, start_values,
         bounds = [(None, None)] * num_unconstrained_transducers  # Use bounds even if the problem is unbounded since the L-BFGS-B is faster than normal BFGS
 
     opt_args = {'jac': True, 'method': 'L-BFGS-B', 'bounds': bounds, 'options': {'gtol': 1e-9, 'ftol': 1e-15}}
+    method = (minimize_kwargs or {}).get('method', opt_args['method'])
+    # The point and complex jacobians of the last function evaluation, reused for the hessians.
+    last_evaluation = []
+    if isinstance(method, str) and method.lower() in _hessian_methods:
+        if not hasattr(function, 'evaluate_hessians') or not getattr(function, '_has_hessians', True):
+            raise TypeError('Method {} requires a cost function which can evaluate hessians'.format(method))
+
+        def hess(phases_amplitudes):
+            call_phases[unconstrained_transducers] = phases_amplitudes[:num_unconstrained_transducers]
+            if variable_amplitudes:
+                call_amplitudes[unconstrained_transducers] = phases_amplitudes[num_unconstrained_transducers:]
+            call_complex = call_amplitudes * np.exp(1j * call_phases)
+
+            # The minimizers evaluate the hessians at the point of the last function evaluation.
+            if last_evaluation and np.array_equal(last_evaluation[0], phases_amplitudes):
+                jacobians = last_evaluation[1]
+            else:
+                _, jacobians = function(call_complex)
+                last_evaluation[:] = [np.array(phases_amplitudes), jacobians]
+            hessians, conjugate_hessians = function.evaluate_hessians(call_complex)
+            indices = np.ix_(unconstrained_transducers, unconstrained_transducers)
+            return _phase_amplitude_hessians(
+                hessians[indices], conjugate_hessians[indices], jacobians[unconstrained_transducers],
+                call_amplitudes[unconstrained_transducers], variable_amplitudes)
+
+        # The default options are for L-BFGS-B, and only trust-constr can handle the bounds.
+        opt_args = {'jac': True, 'hess': hess}
+        if variable_amplitudes:
+            if method.lower() != 'trust-constr':
+                raise ValueError('Method {} cannot bound the amplitudes, use trust-constr for variable amplitudes'.format(method))
+            opt_args['bounds'] = bounds
     if minimize_kwargs is not None:
         opt_args.update(minimize_kwargs)
 
@@ -120,6 +172,7 @@ def _minimize_phase_amplitude(function, array, start_values,
             call_complex = call_amplitudes * np.exp(1j * call_phases)
 
             value, jacobians = function(call_complex)
+            last_evaluation[:] = [np.array(phases_amplitudes), jacobians]
             jacobians = np.concatenate((
                 -np.imag(jacobians[unconstrained_transducers]),
                 np.einsum('i, i...->i...', 1 / call_amplitudes[unconstrained_transducers], np.real(jacobians[unconstrained_transducers]))
@@ -131,6 +184,7 @@ def _minimize_phase_amplitude(function, array, start_values,
             call_complex = call_amplitudes * np.exp(1j * call_phases)
 
             value, jacobians = function(call_complex)
+            last_evaluation[:] = [np.array(phases), jacobians]
             jacobians = -np.imag(jacobians[unconstrained_transducers])
             return value, jacobians
     else:
@@ -152,11 +206,78 @@ def _minimize_phase_amplitude(function, array, start_values,
         return call_amplitudes * np.exp(1j * call_phases)
 
 
-def _minimize_real_imag(functions, start_values,
+def _minimize_real_imag(function, array, start_values,
                         constrain_transducers, variable_amplitudes,
                         basinhopping, minimize_kwargs,
                         return_optim_status):
-    raise NotImplementedError('Optimization using real and imag not implemented')
+    if variable_amplitudes == [False, True]:
+        result, status = minimize([function, function], array, start_values=start_values, use_real_imag=True,
+                                  constrain_transducers=constrain_transducers, variable_amplitudes=[False, True],
+                                  basinhopping=basinhopping, minimize_kwargs=minimize_kwargs, return_optim_status=True)
+        if return_optim_status:
+            return result[-1], status[-1]
+        else:
+            return result[-1]
+    elif not isinstance(variable_amplitudes, bool):
+        raise TypeError('the `variable_amplitudes` argument should be a bool or "phases first"')
+
+    num_total_transducers = len(start_values)
+    unconstrained_transducers = np.delete(np.arange(num_total_transducers), constrain_transducers)
+    num_unconstrained_transducers = len(unconstrained_transducers)
+    call_complex = np.array(start_values, dtype=complex)
+    start = np.concatenate((np.real(call_complex[unconstrained_transducers]), np.imag(call_complex[unconstrained_transducers])))
+
+    def project(real_imag):
+        # The amplitude constraints are handled by radially projecting the variables onto the allowed amplitudes,
+        # i.e. the unit circle for fixed amplitudes and the unit disk for variable amplitudes.
+        values = real_imag[:num_unconstrained_transducers] + 1j * real_imag[num_unconstrained_transducers:]
+        values[values == 0] = np.finfo(float).tiny  # The jacobians are divided by the values below
+        magnitudes = np.abs(values)
+        if variable_amplitudes:
+            projected = magnitudes > 1
+        else:
+            projected = np.ones(num_unconstrained_transducers, dtype=bool)
+        return values / np.where(projected, magnitudes, 1), magnitudes, projected
+
+    opt_args = {'jac': True, 'method': 'L-BFGS-B', 'options': {'gtol': 1e-9, 'ftol': 1e-15}}
+    if minimize_kwargs is not None:
+        opt_args.update(minimize_kwargs)
+
+    if opt_args['jac']:
+        # The cost is invariant to the radial part of the projected variables, which would
+        # drift freely. A penalty on the distance to the allowed amplitudes keeps them close
+        # without changing the projected solution. The penalty is scaled to the initial jacobians.
+        call_complex[unconstrained_transducers] = project(start)[0]
+        penalty_weight = np.mean(np.abs(function(call_complex)[1][unconstrained_transducers])) or 1
+
+        def func(real_imag):
+            values, magnitudes, projected = project(real_imag)
+            call_complex[unconstrained_transducers] = values
+
+            value, jacobians = function(call_complex)
+            gradient = np.conj(jacobians[unconstrained_transducers] / values)
+            # Only the tangential part of the gradient remains for the projected transducers.
+            tangents = 1j * values
+            distance = np.where(projected, magnitudes - 1, 0)
+            gradient = np.where(projected, np.real(np.conj(tangents) * gradient) * tangents / magnitudes, gradient)
+            value += penalty_weight * np.sum(distance**2)
+            gradient += 2 * penalty_weight * distance * values
+            return value, np.concatenate((np.real(gradient), np.imag(gradient)))
+    else:
+        raise NotImplementedError('Minimiation without jacobians currently not supported')
+
+    if basinhopping:
+        if basinhopping is True:
+            basinhopping = 20
+        opt_result = scipy.optimize.basinhopping(func, start, T=1e-7, minimizer_kwargs=opt_args, niter=basinhopping)
+    else:
+        opt_result = scipy.optimize.minimize(func, start, **opt_args)
+
+    call_complex[unconstrained_transducers] = project(opt_result.x)[0]
+    if return_optim_status:
+        return call_complex, opt_result
+    else:
+        return call_complex
 
 
 def minimize(functions, array,
@@ -164,7 +285,7 @@ def minimize(functions, array,
              constrain_transducers=None, variable_amplitudes=False,
              callback=None, precall=None,
              basinhopping=False, minimize_kwargs=None,
-             return_optim_status=False,
+             return_optim_status=False, library=None,
              ):
     """Minimizes a set of cost functions.
 
@@ -173,6 +294,15 @@ def minimize(functions, array,
     The function should return `value, jacobians` where the jacobians are the
     derivatives of the value w.r.t the transducers as defined in the full documentation.
     Also see the documentation of the field wrappers for further details.
+    Bound cost fields which are quadratic forms in the transducer amplitudes can
+    be compiled using their `quadratic_form` method, and the compiled objects
+    can be passed here instead of the cost fields for faster evaluation.
+
+    The default minimizer is L-BFGS-B. Methods using second derivatives, i.e.
+    'Newton-CG', 'dogleg', 'trust-ncg', 'trust-krylov', 'trust-exact', and
+    'trust-constr', can be chosen using the `minimize_kwargs`. The hessians
+    are then evaluated using the `evaluate_hessians` method of the cost function.
+    Only 'trust-constr' can be used with variable amplitudes, since the amplitudes are bounded.
 
     This function supports minimization sequences. Pass an iterable of functions
     to start sequenced minimization, e.g. a list of cost functions.
@@ -193,14 +323,19 @@ def minimize(functions, array,
         sequences can overrule this value.
     use_real_imag : bool, default False
         Toggles if the optimization should run using the phase-amplitude formulation
-        or the real-imag formulation.
+        or the real-imag formulation. The real-imag formulation optimizes the real and
+        imaginary parts of the complex amplitudes, which are radially projected onto the
+        allowed amplitudes, i.e. unit amplitudes or amplitudes at most one.
+        This avoids the trigonometric chain rule, but does not support hessians.
     constrain_transducers : array_like
         Specifies a number of transducers which are constant elements in the
-        minimization. Will be used as the second argument in `np.delete`
+        minimization. Will be used as the second argument in `np.delete`.
+        Cost functions with a `constrain` method, e.g. bound cost fields and
+        quadratic forms, are then only evaluated for the free transducers.
     variable_amplitudes : bool
         Toggles the usage of varying amplitudes in the minimization.
-        If `use_real_imag` is False 'phases first' is also a valid argument for this
-        parameter. The minimizer will then automatically sequence to optimize first with
+        'phases first' is also a valid argument for this parameter.
+        The minimizer will then automatically sequence to optimize first with
         fixed then with variable amplitudes, returning only the last result.
     callback : callable
         A callback function which will be called after each step in sequenced
@@ -222,6 +357,10 @@ def minimize(functions, array,
         Toggles the `optim_status` output.
     minimize_kwargs : dict
         Extra keyword arguments which will be passed to `scipy.minimize`.
+    library : `~levitate.holography.HologramLibrary`, optional
+        A library of previous solutions. If no start values are given, the closest
+        previous solution is used as start values. The result is stored in the library.
+        Only bound cost fields, not sequences, can be used with a library.
 
     Returns
     -------
@@ -234,6 +373,18 @@ def minimize(functions, array,
 
 
     """
+    if library is not None:
+        if start_values is None:
+            start_values = library.query(functions)
+        result, opt_result = minimize(functions, array, start_values=start_values, use_real_imag=use_real_imag,
+                                      constrain_transducers=constrain_transducers, variable_amplitudes=variable_amplitudes,
+                                      callback=callback, precall=precall, basinhopping=basinhopping,
+                                      minimize_kwargs=minimize_kwargs, return_optim_status=True)
+        library.add(functions, result)
+        if return_optim_status:
+            return result, opt_result
+        else:
+            return result
     if start_values is None:
         start_values = np.ones(array.num_transducers, dtype=complex)
     else:
@@ -249,6 +400,19 @@ def minimize(functions, array,
         do_sequence = True
 
     if not do_sequence:
+        free_transducers = np.delete(np.arange(len(start_values)), constrain_transducers)
+        if len(free_transducers) < len(start_values) and hasattr(functions, 'constrain'):
+            # Fold the constrained transducers into a fixed background, and optimize only the free transducers.
+            result, opt_result = minimize(functions.constrain(constrain_transducers, start_values), array,
+                                          start_values=start_values[free_transducers], use_real_imag=use_real_imag,
+                                          variable_amplitudes=variable_amplitudes, basinhopping=basinhopping,
+                                          minimize_kwargs=minimize_kwargs, return_optim_status=True)
+            start_values = np.array(start_values, dtype=complex)
+            start_values[free_transducers] = result
+            if return_optim_status:
+                return start_values, opt_result
+            else:
+                return start_values
         if use_real_imag is True:
             return _minimize_real_imag(function=functions, array=array, start_values=start_values,
                                        constrain_transducers=constrain_transducers, variable_amplitudes=variable_amplitudes,
@@ -274,3 +438,326 @@ def minimize(functions, array,
                                   callback=callback, precall=precall,
                                   basinhopping=basinhopping, minimize_kwargs=minimize_kwargs,
                                   return_optim_status=return_optim_status)
+
+
+# The cost functions and minimization arguments in the worker processes of `minimize_multistart`.
+_multistart_state = {}
+
+
+def _multistart_initializer(functions, array, kwargs):
+    _multistart_state.update(functions=functions, array=array, kwargs=kwargs)
+
+
+def _multistart_minimize(start_values):
+    functions = _multistart_state['functions']
+    result, status = minimize(functions, _multistart_state['array'], start_values=start_values,
+                              return_optim_status=True, **_multistart_state['kwargs'])
+    if isinstance(functions, list):
+        value = functions[-1](result[-1])[0]
+    else:
+        value = functions(result)[0]
+    return result, np.real(value), status
+
+
+def minimize_multistart(functions, array, start_values=None, num_starts=None,
+                        processes=None, seed=None, return_optim_status=False, **kwargs):
+    """Minimize cost functions from several start values in parallel.
+
+    Runs independent minimizations, see `minimize`, from a number of
+    start values in a pool of worker processes. Each start can also be a
+    basinhopping chain, using the `basinhopping` argument.
+    The cost functions are sent to the workers once, when the pool is created.
+    The array requests of bound fields are evaluated in this process before the
+    pool is created, and are inherited by the workers on platforms which fork
+    new processes. Otherwise the workers evaluate the requests once each.
+
+    Parameters
+    ----------
+    functions
+        The cost function or sequence of cost functions, see `minimize`.
+    array : `TransducerArray`
+        The array from which the cost functions are created.
+    start_values : complex ndarray, optional
+        The start values, shape (N_transducers, S) for S starts.
+    num_starts : int, optional
+        The number of random starts to use if no start values are given.
+        The starts have random phases and unit amplitudes. Defaults to the
+        number of processes.
+    processes : int, optional
+        The number of worker processes, defaults to the number of cores.
+        Use a single process to run the starts in this process, without a pool.
+    seed : int, optional
+        Seed for the random start values.
+    return_optim_status : bool
+        Toggles the `optim_status` output.
+    **kwargs
+        Remaining keyword arguments are passed to `minimize`, e.g. `variable_amplitudes`,
+        `constrain_transducers`, `basinhopping`, or `minimize_kwargs`.
+
+    Returns
+    -------
+    results : ndarray
+        The results from the starts, ranked from the lowest final cost, shape (S, N_transducers).
+        Sequenced results are stacked in the second dimension.
+    values : ndarray
+        The final cost for each of the results, shape (S,).
+        For sequences this is the cost of the last function in the sequence.
+    optim_status : list
+        The scipy optimization result structures for each of the results.
+        Optional output, toggle with the corresponding input argument.
+
+    Note
+    ----
+    Numerical libraries can use several threads for each process.
+    Limiting them to one thread per process, e.g. using the environment
+    variable `OMP_NUM_THREADS=1`, typically scales better.
+
+    """
+    if processes is None:
+        processes = os.cpu_count()
+    if start_values is None:
+        if num_starts is None:
+            num_starts = processes
+        phases = np.random.default_rng(seed).uniform(-np.pi, np.pi, (array.num_transducers, num_starts))
+        start_values = np.exp(1j * phases)
+    start_values = np.asarray(start_values)
+    if start_values.ndim == 1:
+        start_values = start_values[:, None]
+    starts = [start_values[:, idx] for idx in range(start_values.shape[1])]
+
+    # The array requests for bound fields are evaluated by calling the functions once, before the pool is created.
+    try:
+        iter(functions)
+    except TypeError:
+        functions(starts[0])
+    else:
+        # Sequences are sent to the workers, which requires e.g. generators to be evaluated.
+        functions = list(functions)
+        for function in functions:
+            function(starts[0])
+
+    if processes == 1:
+        _multistart_initializer(functions, array, kwargs)
+        outputs = list(map(_multistart_minimize, starts))
+        _multistart_state.clear()
+    else:
+        with concurrent.futures.ProcessPoolExecutor(
+            max_workers=min(processes, len(starts)),
+            initializer=_multistart_initializer, initargs=(functions, array, kwargs),
+        ) as executor:
+            outputs = list(executor.map(_multistart_minimize, starts))
+
+    results, values, status = zip(*outputs)
+    order = np.argsort(values)
+    results = np.asarray(results)[order]
+    values = np.asarray(values)[order]
+    if return_optim_status:
+        return results, values, [status[idx] for idx in order]
+    else:
+        return results, values
+
+
+def minimize_trajectory(template, array, path, start_values=None, prefetch=2,
+                        return_optim_status=False, **kwargs):
+    """Minimize a cost field along a path of positions.
+
+    The cost field template is bound to each of the waypoints in the path,
+    and minimized with `minimize`, using the result at the previous waypoint as
+    the start values. The array requests for the upcoming waypoints are evaluated
+    in a background thread while the current waypoint is minimized, and are stored
+    in the shared `~levitate.arrays.request_cache`.
+
+    Parameters
+    ----------
+    template
+        An unbound cost field, which will be bound to the waypoints using `template @ position`.
+    array : `TransducerArray`
+        The array from which the cost field is created.
+    path : array_like
+        The waypoints, shape (3, T) for T waypoints.
+    start_values : complex ndarray, optional
+        The start values for the first waypoint, see `minimize`.
+    prefetch : int, default 2
+        The number of upcoming waypoints to evaluate the array requests for in
+        the background. Use 0 to evaluate the requests when they are needed.
+    return_optim_status : bool
+        Toggles the `optim_status` output.
+    **kwargs
+        Remaining keyword arguments are passed to `minimize`, e.g. `variable_amplitudes`,
+        `constrain_transducers`, or `minimize_kwargs`.
+
+    Returns
+    -------
+    states : complex ndarray
+        The results at the waypoints, shape (T, N_transducers), e.g. for `TCPArray.states`.
+    optim_status : list
+        The scipy optimization result structures for each waypoint.
+        Optional output, toggle with the corresponding input argument.
+
+    """
+    path = np.asarray(path).reshape((3, -1))
+    fields = [template @ path[:, idx] for idx in range(path.shape[1])]
+    states = []
+    status = []
+    with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
+        # Only a few waypoints are prefetched, so that the cache budget is not filled with requests for the entire path.
+        pending = collections.deque()
+        for idx, field in enumerate(fields):
+            while len(pending) < prefetch + 1 and idx + len(pending) < len(fields):
+                pending.append(executor.submit(fields[idx + len(pending)]._requests))
+            if pending:
+                # Raises errors from the background evaluation.
+                pending.popleft().result()
+            start_values, opt_res = minimize(field, array, start_values=start_values, return_optim_status=True, **kwargs)
+            states.append(start_values)
+            status.append(opt_res)
+    states = np.asarray(states)
+    if return_optim_status:
+        return states, status
+    else:
+        return states
+
+
+class _BudgetExhausted(Exception):
+    """Raised by `_BudgetedFunction` to abort a minimization."""
+
+
+class _BudgetedFunction:
+    """Wraps a cost function to track the best iterate and to enforce a budget.
+
+    Raises `_BudgetExhausted` when called after the budget is used, i.e. after the
+    deadline, after the maximum number of evaluations, or if the callback
+    returned False. The first evaluation is always allowed.
+    """
+
+    def __init__(self, function, array, time_budget=None, max_evaluations=None, callback=None, interval=0):
+        self.function = function
+        self.array = array
+        self.start = time.perf_counter()
+        self.deadline = np.inf if time_budget is None else self.start + time_budget
+        self.max_evaluations = np.inf if max_evaluations is None else max_evaluations
+        self.callback = callback
+        self.interval = interval
+        self.evaluations = 0
+        self.iterations = 0
+        self.best_value = np.inf
+        self.best_result = None
+        self.stopped = False
+        self._published = -np.inf
+
+    def __getattr__(self, name):
+        # Gives access to e.g. `evaluate_hessians` of the wrapped function.
+        return getattr(self.function, name)
+
+    def __call__(self, complex_transducer_amplitudes):
+        now = time.perf_counter()
+        if self.evaluations and (self.stopped or now >= self.deadline or self.evaluations >= self.max_evaluations):
+            raise _BudgetExhausted()
+        value, jacobians = self.function(complex_transducer_amplitudes)
+        self.evaluations += 1
+        if np.real(value) < self.best_value:
+            self.best_value = np.real(value)
+            self.best_result = np.array(complex_transducer_amplitudes, dtype=complex)
+            if self.callback is not None and now - self._published >= self.interval:
+                self._published = now
+                if self.callback(array=self.array, result=self.best_result.copy(), value=self.best_value,
+                                 elapsed=now - self.start, evaluations=self.evaluations) is False:
+                    self.stopped = True
+        return value, jacobians
+
+
+def minimize_budget(functions, array, time_budget=None, max_evaluations=None,
+                    callback=None, interval=0, start_values=None,
+                    constrain_transducers=None, return_optim_status=False, **kwargs):
+    """Minimize a cost function within a time budget or a number of evaluations.
+
+    Runs `minimize`, but stops when the budget is used and returns the best iterate found
+    so far. The budget is checked before each evaluation of the cost function, so the
+    final evaluation can overrun the time budget slightly.
+    The minimization stops earlier if the minimizer converges.
+
+    Intermediate solutions can be streamed through a callback, which is called with
+    the best iterate each time the cost improves, at most once every `interval` seconds.
+    Combined with `basinhopping`, this keeps improving the state until the budget is used.
+
+    Parameters
+    ----------
+    functions
+        The cost function to minimize, see `minimize`. Sequences are not supported.
+    array : `TransducerArray`
+        The array from which the cost function is created.
+    time_budget : float, optional
+        The maximum wall-clock time to use, in seconds.
+    max_evaluations : int, optional
+        The maximum number of evaluations of the cost function.
+    callback : callable, optional
+        Called with improved iterates. Return False from the callback to stop the minimization.
+        Should have the signature :
+        `callback(array=array, result=result, value=value, elapsed=elapsed, evaluations=evaluations)`
+    interval : float, default 0
+        The minimum time between calls to the callback, in seconds.
+    start_values : complex ndarray, optional
+        The start values for the optimization, see `minimize`.
+    constrain_transducers : array_like
+        Transducers which are constant elements in the minimization, see `minimize`.
+    return_optim_status : bool
+        Toggles the `optim_status` output.
+    **kwargs
+        Remaining keyword arguments are passed to `minimize`, e.g. `variable_amplitudes`,
+        `use_real_imag`, `basinhopping`, or `minimize_kwargs`.
+
+    Returns
+    -------
+    result : `ndarray`
+        The best transducer amplitudes found.
+    optim_status : `OptimizeResult`
+        The scipy optimization result structure, with the additional fields
+        `elapsed` (seconds), `nit` (iterations), `nfev` (evaluations of the cost function),
+        and `budget_exhausted`. If the budget was exhausted, `fun` is the best value
+        and the remaining fields are not available.
+        Optional output, toggle with the corresponding input argument.
+
+    """
+    if start_values is None:
+        start_values = np.ones(array.num_transducers, dtype=complex)
+    result = np.array(start_values, dtype=complex)
+    if constrain_transducers is None or constrain_transducers is False:
+        constrain_transducers = []
+    free_transducers = np.delete(np.arange(len(result)), constrain_transducers)
+    if len(free_transducers) < len(result) and hasattr(functions, 'constrain'):
+        # Constrain before wrapping, since the wrapper cannot be constrained.
+        functions = functions.constrain(constrain_transducers, result)
+        constrain_transducers = []
+    else:
+        free_transducers = slice(None)
+
+    budgeted = _BudgetedFunction(functions, array, time_budget=time_budget, max_evaluations=max_evaluations,
+                                 callback=callback, interval=interval)
+    minimize_kwargs = dict(kwargs.pop('minimize_kwargs', None) or {})
+    user_callback = minimize_kwargs.get('callback')
+
+    def count_iteration(*args, **kw):
+        budgeted.iterations += 1
+        if user_callback is not None:
+            return user_callback(*args, **kw)
+    minimize_kwargs['callback'] = count_iteration
+
+    try:
+        free_result, status = minimize(budgeted, array, start_values=result[free_transducers],
+                                       constrain_transducers=constrain_transducers, minimize_kwargs=minimize_kwargs,
+                                       return_optim_status=True, **kwargs)
+    except _BudgetExhausted:
+        free_result = budgeted.best_result
+        status = scipy.optimize.OptimizeResult(
+            fun=budgeted.best_value, success=False, budget_exhausted=True,
+            message='Stopped by callback' if budgeted.stopped else 'Budget exhausted')
+    else:
+        status.budget_exhausted = False
+    status.elapsed = time.perf_counter() - budgeted.start
+    status.nit = budgeted.iterations
+    status.nfev = budgeted.evaluations
+    result[free_transducers] = free_result
+    if return_optim_status:
+        return result, status
+    else:
+        return result
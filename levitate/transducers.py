@@ -15,16 +15,122 @@ sound fields for any number of source positions and receiver positions at once.
     CircularPiston
     CircularRing
     TransducerReflector
+    TransducerGeometry
 """
 
 import numpy as np
 import logging
-from scipy.special import j0, j1
-from scipy.special import spherical_jn, spherical_yn, sph_harm
+import itertools
+import functools
+import math
+from scipy.special import j0, j1, comb
 from .materials import air
 from . import utils
 
 logger = logging.getLogger(__name__)
+_versions = itertools.count(1)
+
+
+def _complex_dtype(*arrays):
+    """Complex dtype matching the precision of the input arrays.
+
+    Single precision inputs are calculated in single precision, anything else,
+    e.g. double precision or integer inputs, is calculated in double precision.
+
+    """
+    return np.result_type(np.complex64, *arrays)
+
+
+@functools.lru_cache(maxsize=None)
+def _product_rule_terms(orders):
+    """Terms in the general Leibniz rule for the pressure derivatives.
+
+    The derivatives of a product of two functions, e.g. the spherical spreading
+    and the directivity of a transducer, can be written as a weighted sum of
+    products of the derivatives of the two functions.
+    This calculates the terms in the sums for the derivatives in
+    `~levitate.utils.pressure_derivs_order`.
+
+    Parameters
+    ----------
+    orders : int
+        How many orders of derivatives to calculate the terms for.
+
+    Returns
+    -------
+    terms : tuple
+        One tuple for each derivative, with `(coefficient, first_idx, second_idx)`
+        triplets. The first triplet for each derivative always has a unit coefficient.
+
+    """
+    def multi_index(derivative):
+        return tuple(derivative.count(axis) for axis in 'xyz')
+    derivatives = utils.pressure_derivs_order[:utils.num_pressure_derivs[orders]]
+    indices = {multi_index(derivative): idx for idx, derivative in enumerate(derivatives)}
+    terms = []
+    for derivative in derivatives:
+        alpha = multi_index(derivative)
+        derivative_terms = []
+        for beta in itertools.product(*[range(a + 1) for a in alpha]):
+            coefficient = np.prod([comb(a, b, exact=True) for a, b in zip(alpha, beta)])
+            derivative_terms.append((coefficient, indices[beta], indices[tuple(a - b for a, b in zip(alpha, beta))]))
+        terms.append(tuple(derivative_terms))
+    return tuple(terms)
+
+
+_finite_difference_coefficients = {
+    '': (np.array([[0, 0, 0]]).T, np.array([1])),
+    'x': (np.array([[1, 0, 0], [-1, 0, 0]]).T, np.array([0.5, -0.5])),
+    'y': (np.array([[0, 1, 0], [0, -1, 0]]).T, np.array([0.5, -0.5])),
+    'z': (np.array([[0, 0, 1], [0, 0, -1]]).T, np.array([0.5, -0.5])),
+    'xx': (np.array([[1, 0, 0], [0, 0, 0], [-1, 0, 0]]).T, np.array([1, -2, 1])),  # Alt -- (np.array([[2, 0, 0], [0, 0, 0], [-2, 0, 0]]), [0.25, -0.5, 0.25])
+    'yy': (np.array([[0, 1, 0], [0, 0, 0], [0, -1, 0]]).T, np.array([1, -2, 1])),  # Alt-- (np.array([[0, 2, 0], [0, 0, 0], [0, -2, 0]]), [0.25, -0.5, 0.25])
+    'zz': (np.array([[0, 0, 1], [0, 0, 0], [0, 0, -1]]).T, np.array([1, -2, 1])),  # Alt -- (np.array([[0, 0, 2], [0, 0, 0], [0, 0, -2]]), [0.25, -0.5, 0.25])
+    'xy': (np.array([[1, 1, 0], [-1, -1, 0], [1, -1, 0], [-1, 1, 0]]).T, np.array([0.25, 0.25, -0.25, -0.25])),
+    'xz': (np.array([[1, 0, 1], [-1, 0, -1], [1, 0, -1], [-1, 0, 1]]).T, np.array([0.25, 0.25, -0.25, -0.25])),
+    'yz': (np.array([[0, 1, 1], [0, -1, -1], [0, -1, 1], [0, 1, -1]]).T, np.array([0.25, 0.25, -0.25, -0.25])),
+    'xxx': (np.array([[2, 0, 0], [-2, 0, 0], [1, 0, 0], [-1, 0, 0]]).T, np.array([0.5, -0.5, -1, 1])),  # Alt -- (np.array([[3, 0, 0], [-3, 0, 0], [1, 0, 0], [-1, 0, 0]]), [0.125, -0.125, -0.375, 0.375])
+    'yyy': (np.array([[0, 2, 0], [0, -2, 0], [0, 1, 0], [0, -1, 0]]).T, np.array([0.5, -0.5, -1, 1])),  # Alt -- (np.array([[0, 3, 0], [0, -3, 0], [0, 1, 0], [0, -1, 0]]), [0.125, -0.125, -0.375, 0.375])
+    'zzz': (np.array([[0, 0, 2], [0, 0, -2], [0, 0, 1], [0, 0, -1]]).T, np.array([0.5, -0.5, -1, 1])),  # Alt -- (np.array([[0, 0, 3], [0, 0, -3], [0, 0, 1], [0, 0, -1]]), [0.125, -0.125, -0.375, 0.375])
+    'xxy': (np.array([[1, 1, 0], [-1, -1, 0], [1, -1, 0], [-1, 1, 0], [0, 1, 0], [0, -1, 0]]).T, np.array([0.5, -0.5, -0.5, 0.5, -1, 1])),  # Alt -- (np.array([[2, 1, 0], [-2, -1, 0], [2, -1, 0], [-2, 1, 0], [0, 1, 0], [0, -1, 0]]), [0.125, -0.125, -0.125, 0.125, -0.25, 0.25])
+    'xxz': (np.array([[1, 0, 1], [-1, 0, -1], [1, 0, -1], [-1, 0, 1], [0, 0, 1], [0, 0, -1]]).T, np.array([0.5, -0.5, -0.5, 0.5, -1, 1])),  # Alt -- (np.array([[2, 0, 1], [-2, 0, -1], [2, 0, -1], [-2, 0, 1], [0, 0, 1], [0, 0, -1]]), [0.125, -0.125, -0.125, 0.125, -0.25, 0.25])
+    'yyx': (np.array([[1, 1, 0], [-1, -1, 0], [-1, 1, 0], [1, -1, 0], [1, 0, 0], [-1, 0, 0]]).T, np.array([0.5, -0.5, -0.5, 0.5, -1, 1])),  # Alt -- (np.array([[1, 2, 0], [-1, -2, 0], [-1, 2, 0], [1, -2, 0], [1, 0, 0], [-1, 0, 0]]), [0.125, -0.125, -0.125, 0.125, -0.25, 0.25])
+    'yyz': (np.array([[0, 1, 1], [0, -1, -1], [0, 1, -1], [0, -1, 1], [0, 0, 1], [0, 0, -1]]).T, np.array([0.5, -0.5, -0.5, 0.5, -1, 1])),  # Alt -- (np.array([[0, 2, 1], [0, -2, -1], [0, 2, -1], [0, -2, 1], [0, 0, 1], [0, 0, -1]]), [0.125, -0.125, -0.125, 0.125, -0.25, 0.25])
+    'zzx': (np.array([[1, 0, 1], [-1, 0, -1], [-1, 0, 1], [1, 0, -1], [1, 0, 0], [-1, 0, 0]]).T, np.array([0.5, -0.5, -0.5, 0.5, -1, 1])),  # Alt -- (np.array([[1, 0, 2], [-1, 0, -2], [-1, 0, 2], [1, 0, -2], [1, 0, 0], [-1, 0, 0]]), [0.125, -0.125, -0.125, 0.125, -0.25, 0.25])
+    'zzy': (np.array([[0, 1, 1], [0, -1, -1], [0, -1, 1], [0, 1, -1], [0, 1, 0], [0, -1, 0]]).T, np.array([0.5, -0.5, -0.5, 0.5, -1, 1])),  # Alt -- (np.array([[0, 1, 2], [0, -1, -2], [0, -1, 2], [0, 1, -2], [0, 1, 0], [0, -1, 0]]), [0.125, -0.125, -0.125, 0.125, -0.25, 0.25])
+    'xyz': (np.array([[1, 1, 1], [-1, -1, -1], [1, -1, -1], [-1, 1, 1], [-1, 1, -1], [1, -1, 1], [-1, -1, 1], [1, 1, -1]]).T, np.array([1, -1, 1, -1, 1, -1, 1, -1]) * 0.125),
+}
+
+
+@functools.lru_cache(maxsize=None)
+def _finite_difference_stencil(orders):
+    """Combine the finite difference stencils for the pressure derivatives.
+
+    Collects the unique shifts from the finite difference stencils of all derivatives
+    up to the requested order, so that a function can be evaluated once at each
+    shifted point. The derivatives are then calculated as a matrix product between
+    the weights and the function values.
+
+    Parameters
+    ----------
+    orders : int
+        How many orders of derivatives to include.
+
+    Returns
+    -------
+    shifts : numpy.ndarray
+        The unique shifts, in units of the step size, shape (3, S).
+    weights : numpy.ndarray
+        The weights of the shifted points for the derivatives in `~levitate.utils.pressure_derivs_order`, shape (M, S).
+
+    """
+    derivatives = utils.pressure_derivs_order[:utils.num_pressure_derivs[orders]]
+    shifts = np.unique(np.concatenate([_finite_difference_coefficients[derivative][0] for derivative in derivatives], axis=1), axis=1)
+    weights = np.zeros((len(derivatives), shifts.shape[1]))
+    for idx, derivative in enumerate(derivatives):
+        for shift, weight in zip(_finite_difference_coefficients[derivative][0].T, _finite_difference_coefficients[derivative][1]):
+            weights[idx, np.all(shifts.T == shift, axis=1)] += weight
+    return shifts, weights
 
 
 class TransducerModel:
@@ -50,6 +156,8 @@ class TransducerModel:
         Angular frequency.
     freq : float
         Wave frequency.
+    version : tuple
+        Identifies the state of the transducer and the medium, changes when any attribute is set.
 
     """
 
@@ -66,6 +174,15 @@ class TransducerModel:
     def __format__(self, fmt_spec):
         return fmt_spec.replace('%cls', self.__class__.__name__).replace('%freq', str(self.freq)).replace('%p0', str(self.p0)).replace('%mediumfull', repr(self.medium)).replace('%medium', str(self.medium))
 
+    def __setattr__(self, name, value):
+        super().__setattr__(name, value)
+        # Any change of the transducer invalidates cached calculations.
+        super().__setattr__('_version', next(_versions))
+
+    @property
+    def version(self):
+        return self._version, self.medium.version
+
     def __str__(self):
         return self._str_fmt_spec.format(self)
 
@@ -200,9 +317,22 @@ class PointSource(TransducerModel):
             The amplitude (and phase) of the directivity, shape `source_positions.shape[1:] + receiver_positions.shape[1:]`.
 
         """
-        return np.ones(np.asarray(source_positions).shape[1:2] + np.asarray(receiver_positions).shape[1:])
+        source_positions = np.asarray(source_positions)
+        receiver_positions = np.asarray(receiver_positions)
+        return np.ones(source_positions.shape[1:2] + receiver_positions.shape[1:], dtype=np.result_type(np.float32, source_positions, receiver_positions))
 
-    def pressure_derivs(self, source_positions, source_normals, receiver_positions, orders=3, **kwargs):
+    def _geometry_directivity(self, geometry):
+        """Evaluate the directivity using a `TransducerGeometry`.
+
+        Subclasses with directivities based on the quantities in the geometry
+        can override this to reuse them, see `directivity` for the output.
+
+        """
+        return self.directivity(geometry.source_positions, geometry.source_normals, geometry.receiver_positions)
+
+    _fused_block_elements = 2**15
+
+    def pressure_derivs(self, source_positions, source_normals, receiver_positions, orders=3, fused=False, out=None, geometry=None, **kwargs):
         """Calculate the spatial derivatives of the greens function.
 
         This is the combination of the derivative of the spherical spreading, and
@@ -219,6 +349,17 @@ class PointSource(TransducerModel):
             The first dimension must have length 3 and represent the coordinates of the points.
         orders : int
             How many orders of derivatives to calculate. Currently three orders are supported.
+        fused : bool, default False
+            Toggles fused evaluation of the product rule. The receivers are processed
+            in blocks, and the combined derivatives are accumulated directly in the
+            output array. This avoids the large intermediate arrays, which can dominate
+            the computational time for large numbers of sources and receivers.
+        out : numpy.ndarray, optional
+            Preallocated output array, with the same shape as the returned array.
+            Only supported for fused evaluation.
+        geometry : TransducerGeometry, optional
+            Precalculated geometry for the positions, shared with other calculations.
+            Not supported for fused evaluation.
 
         Returns
         -------
@@ -230,12 +371,20 @@ class PointSource(TransducerModel):
         receiver_positions = np.asarray(receiver_positions)
         if receiver_positions.shape[0] != 3:
             raise ValueError('Incorrect shape of positions')
-        wavefront_derivatives = self.wavefront_derivatives(source_positions, receiver_positions, orders)
+        if fused:
+            if geometry is not None:
+                raise ValueError('Fused evaluation cannot use a precalculated geometry')
+            return self._fused_pressure_derivs(source_positions, source_normals, receiver_positions, orders, out)
+        if out is not None:
+            raise ValueError('Output arrays are only supported for fused evaluation')
+        if geometry is None:
+            geometry = TransducerGeometry(source_positions, source_normals, receiver_positions)
+        wavefront_derivatives = self.wavefront_derivatives(source_positions, receiver_positions, orders, geometry=geometry)
         if type(self) == PointSource:
             return wavefront_derivatives * self.p0
-        directivity_derivatives = self.directivity_derivatives(source_positions, source_normals, receiver_positions, orders)
+        directivity_derivatives = self.directivity_derivatives(source_positions, source_normals, receiver_positions, orders, geometry=geometry)
 
-        derivatives = np.empty(wavefront_derivatives.shape, dtype=np.complex128)
+        derivatives = np.empty(wavefront_derivatives.shape, dtype=wavefront_derivatives.dtype)
         derivatives[0] = wavefront_derivatives[0] * directivity_derivatives[0]
 
         if orders > 0:
@@ -266,7 +415,56 @@ class PointSource(TransducerModel):
         derivatives *= self.p0
         return derivatives
 
-    def wavefront_derivatives(self, source_positions, receiver_positions, orders=3):
+    def _fused_pressure_derivs(self, source_positions, source_normals, receiver_positions, orders, out=None):
+        """Blocked evaluation of the pressure derivatives.
+
+        Evaluates the spherical spreading and the directivity for a block of receivers
+        at the time, and accumulates the terms of the product rule directly in the output.
+        See `pressure_derivs` for the parameters.
+
+        """
+        source_positions = np.asarray(source_positions)
+        source_normals = np.asarray(source_normals)
+        num_derivs = utils.num_pressure_derivs[orders]
+        output_shape = (num_derivs,) + source_positions.shape[1:2] + receiver_positions.shape[1:]
+        if out is None:
+            out = np.empty(output_shape, dtype=_complex_dtype(source_positions, receiver_positions))
+        elif out.shape != output_shape:
+            raise ValueError('Cannot write derivatives with shape {} to output with shape {}'.format(output_shape, out.shape))
+
+        sources = source_positions.reshape((3, -1))
+        normals = source_normals.reshape((3, -1))
+        receivers = receiver_positions.reshape((3, -1))
+        num_sources = sources.shape[1]
+        num_receivers = receivers.shape[1]
+        flat_out = out.view()
+        flat_out.shape = (num_derivs, num_sources, num_receivers)  # Raises if the output cannot be reshaped without a copy.
+
+        block_size = max(1, self._fused_block_elements // num_sources)
+        terms = _product_rule_terms(orders)
+        scratch = np.empty((num_sources, min(block_size, num_receivers)), dtype=out.dtype)
+        for start in range(0, num_receivers, block_size):
+            stop = min(start + block_size, num_receivers)
+            block_receivers = receivers[:, start:stop]
+            block_out = flat_out[:, :, start:stop]
+            block_geometry = TransducerGeometry(sources, normals, block_receivers)
+            wavefront_derivatives = self.wavefront_derivatives(sources, block_receivers, orders, geometry=block_geometry)
+            if type(self) is PointSource:
+                np.multiply(wavefront_derivatives, self.p0, out=block_out)
+                continue
+            directivity_derivatives = self.directivity_derivatives(sources, normals, block_receivers, orders, geometry=block_geometry)
+            block_scratch = scratch[:, :stop - start]
+            for derivative_out, ((_, wavefront_idx, directivity_idx), *derivative_terms) in zip(block_out, terms):
+                np.multiply(wavefront_derivatives[wavefront_idx], directivity_derivatives[directivity_idx], out=derivative_out)
+                for coefficient, wavefront_idx, directivity_idx in derivative_terms:
+                    np.multiply(wavefront_derivatives[wavefront_idx], directivity_derivatives[directivity_idx], out=block_scratch)
+                    if coefficient != 1:
+                        block_scratch *= coefficient
+                    derivative_out += block_scratch
+            block_out *= self.p0
+        return out
+
+    def wavefront_derivatives(self, source_positions, receiver_positions, orders=3, geometry=None):
         """Calculate the spatial derivatives of the spherical spreading.
 
         Parameters
@@ -278,6 +476,8 @@ class PointSource(TransducerModel):
             The first dimension must have length 3 and represent the coordinates of the points.
         orders : int
             How many orders of derivatives to calculate. Currently three orders are supported.
+        geometry : TransducerGeometry, optional
+            Precalculated geometry for the positions, shared with other calculations.
 
         Returns
         -------
@@ -286,17 +486,15 @@ class PointSource(TransducerModel):
             where `M` is the number of spatial derivatives, see `num_spatial_derivatives` and `spatial_derivative_order`.
 
         """
-        source_positions = np.asarray(source_positions)
-        receiver_positions = np.asarray(receiver_positions)
-        if receiver_positions.shape[0] != 3:
-            raise ValueError('Incorrect shape of positions')
-        diff = receiver_positions.reshape((3,) + (1,) * (source_positions.ndim - 1) + receiver_positions.shape[1:]) - source_positions.reshape(source_positions.shape[:2] + (receiver_positions.ndim - 1) * (1,))
-        r = np.sum(diff**2, axis=0)**0.5
+        if geometry is None:
+            geometry = TransducerGeometry(source_positions, None, receiver_positions)
+        diff = geometry.diff
+        r = geometry.r
         kr = self.k * r
         jkr = 1j * kr
-        phase = np.exp(jkr)
+        phase = geometry.phase(self.k)
 
-        derivatives = np.empty((utils.num_pressure_derivs[orders],) + r.shape, dtype=np.complex128)
+        derivatives = np.empty((utils.num_pressure_derivs[orders],) + r.shape, dtype=_complex_dtype(diff))
         derivatives[0] = phase / r
 
         if orders > 0:
@@ -331,13 +529,15 @@ class PointSource(TransducerModel):
 
         return derivatives
 
-    def directivity_derivatives(self, source_positions, source_normals, receiver_positions, orders=3):
+    def directivity_derivatives(self, source_positions, source_normals, receiver_positions, orders=3, geometry=None):
         """Calculate the spatial derivatives of the directivity.
 
         The default implementation uses finite difference stencils to evaluate the
         derivatives. In principle this means that customized directivity models
         does not need to implement their own derivatives, but can do so for speed
         and precision benefits.
+        The stencils evaluate the directivity at shifted positions, so the `geometry`
+        is not used by the default implementation.
 
         Parameters
         ----------
@@ -350,6 +550,8 @@ class PointSource(TransducerModel):
             The first dimension must have length 3 and represent the coordinates of the points.
         orders : int
             How many orders of derivatives to calculate. Currently three orders are supported.
+        geometry : TransducerGeometry, optional
+            Precalculated geometry for the positions, shared with other calculations.
 
         Returns
         -------
@@ -363,45 +565,20 @@ class PointSource(TransducerModel):
         receiver_positions = np.asarray(receiver_positions)
         if receiver_positions.shape[0] != 3:
             raise ValueError('Incorrect shape of positions')
-        finite_difference_coefficients = {'': (np.array([[0, 0, 0]]).T, np.array([1]))}
-        if orders > 0:
-            finite_difference_coefficients['x'] = (np.array([[1, 0, 0], [-1, 0, 0]]).T, np.array([0.5, -0.5]))
-            finite_difference_coefficients['y'] = (np.array([[0, 1, 0], [0, -1, 0]]).T, np.array([0.5, -0.5]))
-            finite_difference_coefficients['z'] = (np.array([[0, 0, 1], [0, 0, -1]]).T, np.array([0.5, -0.5]))
-        if orders > 1:
-            finite_difference_coefficients['xx'] = (np.array([[1, 0, 0], [0, 0, 0], [-1, 0, 0]]).T, np.array([1, -2, 1]))  # Alt -- (np.array([[2, 0, 0], [0, 0, 0], [-2, 0, 0]]), [0.25, -0.5, 0.25])
-            finite_difference_coefficients['yy'] = (np.array([[0, 1, 0], [0, 0, 0], [0, -1, 0]]).T, np.array([1, -2, 1]))  # Alt-- (np.array([[0, 2, 0], [0, 0, 0], [0, -2, 0]]), [0.25, -0.5, 0.25])
-            finite_difference_coefficients['zz'] = (np.array([[0, 0, 1], [0, 0, 0], [0, 0, -1]]).T, np.array([1, -2, 1]))  # Alt -- (np.array([[0, 0, 2], [0, 0, 0], [0, 0, -2]]), [0.25, -0.5, 0.25])
-            finite_difference_coefficients['xy'] = (np.array([[1, 1, 0], [-1, -1, 0], [1, -1, 0], [-1, 1, 0]]).T, np.array([0.25, 0.25, -0.25, -0.25]))
-            finite_difference_coefficients['xz'] = (np.array([[1, 0, 1], [-1, 0, -1], [1, 0, -1], [-1, 0, 1]]).T, np.array([0.25, 0.25, -0.25, -0.25]))
-            finite_difference_coefficients['yz'] = (np.array([[0, 1, 1], [0, -1, -1], [0, -1, 1], [0, 1, -1]]).T, np.array([0.25, 0.25, -0.25, -0.25]))
-        if orders > 2:
-            finite_difference_coefficients['xxx'] = (np.array([[2, 0, 0], [-2, 0, 0], [1, 0, 0], [-1, 0, 0]]).T, np.array([0.5, -0.5, -1, 1]))  # Alt -- (np.array([[3, 0, 0], [-3, 0, 0], [1, 0, 0], [-1, 0, 0]]), [0.125, -0.125, -0.375, 0.375])
-            finite_difference_coefficients['yyy'] = (np.array([[0, 2, 0], [0, -2, 0], [0, 1, 0], [0, -1, 0]]).T, np.array([0.5, -0.5, -1, 1]))  # Alt -- (np.array([[0, 3, 0], [0, -3, 0], [0, 1, 0], [0, -1, 0]]), [0.125, -0.125, -0.375, 0.375])
-            finite_difference_coefficients['zzz'] = (np.array([[0, 0, 2], [0, 0, -2], [0, 0, 1], [0, 0, -1]]).T, np.array([0.5, -0.5, -1, 1]))  # Alt -- (np.array([[0, 0, 3], [0, 0, -3], [0, 0, 1], [0, 0, -1]]), [0.125, -0.125, -0.375, 0.375])
-            finite_difference_coefficients['xxy'] = (np.array([[1, 1, 0], [-1, -1, 0], [1, -1, 0], [-1, 1, 0], [0, 1, 0], [0, -1, 0]]).T, np.array([0.5, -0.5, -0.5, 0.5, -1, 1]))  # Alt -- (np.array([[2, 1, 0], [-2, -1, 0], [2, -1, 0], [-2, 1, 0], [0, 1, 0], [0, -1, 0]]), [0.125, -0.125, -0.125, 0.125, -0.25, 0.25])
-            finite_difference_coefficients['xxz'] = (np.array([[1, 0, 1], [-1, 0, -1], [1, 0, -1], [-1, 0, 1], [0, 0, 1], [0, 0, -1]]).T, np.array([0.5, -0.5, -0.5, 0.5, -1, 1]))  # Alt -- (np.array([[2, 0, 1], [-2, 0, -1], [2, 0, -1], [-2, 0, 1], [0, 0, 1], [0, 0, -1]]), [0.125, -0.125, -0.125, 0.125, -0.25, 0.25])
-            finite_difference_coefficients['yyx'] = (np.array([[1, 1, 0], [-1, -1, 0], [-1, 1, 0], [1, -1, 0], [1, 0, 0], [-1, 0, 0]]).T, np.array([0.5, -0.5, -0.5, 0.5, -1, 1]))  # Alt -- (np.array([[1, 2, 0], [-1, -2, 0], [-1, 2, 0], [1, -2, 0], [1, 0, 0], [-1, 0, 0]]), [0.125, -0.125, -0.125, 0.125, -0.25, 0.25])
-            finite_difference_coefficients['yyz'] = (np.array([[0, 1, 1], [0, -1, -1], [0, 1, -1], [0, -1, 1], [0, 0, 1], [0, 0, -1]]).T, np.array([0.5, -0.5, -0.5, 0.5, -1, 1]))  # Alt -- (np.array([[0, 2, 1], [0, -2, -1], [0, 2, -1], [0, -2, 1], [0, 0, 1], [0, 0, -1]]), [0.125, -0.125, -0.125, 0.125, -0.25, 0.25])
-            finite_difference_coefficients['zzx'] = (np.array([[1, 0, 1], [-1, 0, -1], [-1, 0, 1], [1, 0, -1], [1, 0, 0], [-1, 0, 0]]).T, np.array([0.5, -0.5, -0.5, 0.5, -1, 1]))  # Alt -- (np.array([[1, 0, 2], [-1, 0, -2], [-1, 0, 2], [1, 0, -2], [1, 0, 0], [-1, 0, 0]]), [0.125, -0.125, -0.125, 0.125, -0.25, 0.25])
-            finite_difference_coefficients['zzy'] = (np.array([[0, 1, 1], [0, -1, -1], [0, -1, 1], [0, 1, -1], [0, 1, 0], [0, -1, 0]]).T, np.array([0.5, -0.5, -0.5, 0.5, -1, 1]))  # Alt -- (np.array([[0, 1, 2], [0, -1, -2], [0, -1, 2], [0, 1, -2], [0, 1, 0], [0, -1, 0]]), [0.125, -0.125, -0.125, 0.125, -0.25, 0.25])
-            finite_difference_coefficients['xyz'] = (np.array([[1, 1, 1], [-1, -1, -1], [1, -1, -1], [-1, 1, 1], [-1, 1, -1], [1, -1, 1], [-1, -1, 1], [1, 1, -1]]).T, np.array([1, -1, 1, -1, 1, -1, 1, -1]) * 0.125)
-
-        derivatives = np.empty((utils.num_pressure_derivs[orders],) + source_positions.shape[1:2] + receiver_positions.shape[1:], dtype=np.complex128)
+        shifts, weights = _finite_difference_stencil(orders)
         h = 1 / self.k
-        # For all derivatives needed:
-        for derivative, (shifts, weights) in finite_difference_coefficients.items():
-            # Create the finite difference grid for all positions simultaneously by inserting a new axis for them (axis 1).
-            # positions.shape = (3, n_difference_points, n_receiver_points)
-            positions = shifts.reshape([3, -1] + (receiver_positions.ndim - 1) * [1]) * h + receiver_positions[:, np.newaxis, ...]
-            # Calcualte the directivity at all positions at once, and weight them with the correct weights
-            # weighted_values.shape = (n_difference_points, n_receiver_points)
-            weighted_values = self.directivity(source_positions, source_normals, positions) * weights.reshape((source_positions.ndim - 1) * [1] + [-1] + (receiver_positions.ndim - 1) * [1])
-            # sum the finite weighted points and store in the correct position in the output array.
-            derivatives[utils.pressure_derivs_order.index(derivative)] = np.sum(weighted_values, axis=(source_positions.ndim - 1)) / h**len(derivative)
+        # Create the finite difference grid for all positions simultaneously by inserting a new axis for them (axis 1).
+        # positions.shape = (3, n_difference_points, n_receiver_points)
+        offsets = (shifts * h).astype(np.result_type(np.float32, receiver_positions))
+        positions = offsets.reshape([3, -1] + (receiver_positions.ndim - 1) * [1]) + receiver_positions[:, np.newaxis, ...]
+        # Calculate the directivity at all unique points at once, and weight them with the stencils for all derivatives.
+        # values.shape = (n_sources, n_difference_points, n_receiver_points)
+        values = self.directivity(source_positions, source_normals, positions)
+        derivatives = np.tensordot(weights.astype(values.dtype), values, axes=(1, source_positions.ndim - 1)).astype(_complex_dtype(values), copy=False)
+        derivatives /= (h**np.array([len(derivative) for derivative in utils.pressure_derivs_order[:weights.shape[0]]])).reshape((-1,) + (derivatives.ndim - 1) * (1,))
         return derivatives
 
-    def spherical_harmonics(self, source_positions, source_normals, receiver_positions, orders=0, **kwargs):
+    def spherical_harmonics(self, source_positions, source_normals, receiver_positions, orders=0, geometry=None, **kwargs):
         """Expand sound field in spherical harmonics.
 
         Performs a spherical harmonics expansion of the sound field created from the transducer model.
@@ -419,6 +596,8 @@ class PointSource(TransducerModel):
             The first dimension must have length 3 and represent the coordinates of the points.
         orders : int
             How many orders of spherical harmonics coefficients to calculate.
+        geometry : TransducerGeometry, optional
+            Precalculated geometry for the positions, shared with other calculations.
 
         Returns
         -------
@@ -429,19 +608,14 @@ class PointSource(TransducerModel):
             for details on the structure of the coefficients.
 
         """
-        source_positions = np.asarray(source_positions)
-        source_normals = np.asarray(source_normals)
-        receiver_positions = np.asarray(receiver_positions)
-        if receiver_positions.shape[0] != 3:
-            raise ValueError('Incorrect shape of positions')
+        if geometry is None:
+            geometry = TransducerGeometry(source_positions, source_normals, receiver_positions)
 
         # We need the vector from the receiver to the source, since we are calculating an expansion centered
         # at the receiving point.
-        diff = source_positions.reshape(source_positions.shape[:2] + (receiver_positions.ndim - 1) * (1,)) - receiver_positions.reshape((3,) + (1,) * (source_positions.ndim - 1) + receiver_positions.shape[1:])
-        r = np.sum(diff**2, axis=0)**0.5
+        diff = -geometry.diff
+        r = geometry.r
         kr = self.k * r
-        colatitude = np.arccos(diff[2] / r)
-        azimuth = np.arctan2(diff[1], diff[0])
         # Calculate the spherical hankel function of the second kind
         # See Williams Eq 8.22:
         # exp(jk|r-r'|) / (4pi |r-r'|) = jk sum_n j_n(k r_min) h_n(k r_max) sum_m Y_n^m (theta', phi')^* Y_n^m (theta, phi)
@@ -449,13 +623,45 @@ class PointSource(TransducerModel):
         # exp(-jk|r-r'|) / (4pi |r-r'|) = -jk sum_n j_n(k r_min) h^(2)_n(k r_max) sum_m Y_n^-m (theta', phi') Y_n^m (theta, phi)
 
         sph_idx = utils.SphericalHarmonicsIndexer(orders)
-        coefficients = np.empty((len(sph_idx),) + source_positions.shape[1:2] + receiver_positions.shape[1:], dtype=np.complex128)
-        for n in sph_idx.orders:
-            hankel_func = spherical_jn(n, kr) + 1j * spherical_yn(n, kr)
-            for m in sph_idx.modes:
-                coefficients[sph_idx(n, m)] = hankel_func * np.conj(sph_harm(m, n, azimuth, colatitude))
-        directivity = self.directivity(source_positions, source_normals, receiver_positions)
-        return self.p0 * 4 * np.pi * 1j * self.k * directivity * coefficients
+        coefficients = np.empty((len(sph_idx),) + r.shape, dtype=_complex_dtype(diff))
+
+        # Spherical hankel functions of the first kind, using upward recurrence from the closed form expressions.
+        # The recurrence is stable since it is dominated by the spherical Neumann functions.
+        phase = geometry.phase(self.k)
+        hankel_funcs = [-1j * phase / kr, -(kr + 1j) * phase / kr**2]
+        for n in range(1, orders):
+            hankel_funcs.append((2 * n + 1) / kr * hankel_funcs[n] - hankel_funcs[n - 1])
+
+        # Fully normalized associated Legendre functions, including the Condon-Shortley phase, using
+        # the standard recurrences in degree. The azimuthal part is calculated as powers of exp(i phi).
+        cos_colatitude = diff[2] / r
+        rho = (diff[0]**2 + diff[1]**2)**0.5
+        sin_colatitude = rho / r
+        with np.errstate(invalid='ignore', divide='ignore'):
+            azimuth_phase = np.where(rho == 0, 1, (diff[0] + 1j * diff[1]) / rho)
+        legendre_mm = np.full(r.shape, (4 * np.pi)**-0.5, dtype=r.dtype)
+        azimuth_phase_m = np.ones(r.shape, dtype=coefficients.dtype)
+        for m in range(orders + 1):
+            if m > 0:
+                legendre_mm = -((2 * m + 1) / (2 * m))**0.5 * sin_colatitude * legendre_mm
+                azimuth_phase_m = azimuth_phase_m * azimuth_phase
+            legendre_prev, legendre = 0, legendre_mm
+            for n in range(m, orders + 1):
+                if n == m + 1:
+                    legendre_prev, legendre = legendre, (2 * m + 3)**0.5 * cos_colatitude * legendre
+                elif n > m + 1:
+                    a = ((4 * n**2 - 1) / (n**2 - m**2))**0.5
+                    b = (((n - 1)**2 - m**2) / (4 * (n - 1)**2 - 1))**0.5
+                    legendre_prev, legendre = legendre, a * (cos_colatitude * legendre - b * legendre_prev)
+                # The expansion uses the complex conjugate of the spherical harmonics,
+                # with Y_n^-m = (-1)^m conj(Y_n^m).
+                radial_legendre = hankel_funcs[n] * legendre
+                coefficients[sph_idx(n, m)] = radial_legendre * np.conj(azimuth_phase_m)
+                if m > 0:
+                    coefficients[sph_idx(n, -m)] = (-1)**m * radial_legendre * azimuth_phase_m
+        directivity = self._geometry_directivity(geometry)
+        coefficients *= self.p0 * 4 * np.pi * 1j * self.k * directivity
+        return coefficients
 
 
 class TransducerReflector(TransducerModel):
@@ -511,6 +717,10 @@ class TransducerReflector(TransducerModel):
             and np.allclose(self.reflection_coefficient, other.reflection_coefficient)
         )
 
+    @property
+    def version(self):
+        return self._version, self._transducer.version
+
     @property
     def omega(self):
         return self._transducer.omega
@@ -584,28 +794,43 @@ class TransducerReflector(TransducerModel):
         Calculates the positions and normals of the mirror sources. Evaluates the function
         using both the real sources and the mirrored sources. Adds the two results, considering
         some arbitrary complex reflections coefficient.
+        The mirrored geometry is cached in the geometry of the real sources, so
+        calculations sharing a `geometry` will also share the mirrored geometry.
 
         """
-        source_positions = np.asarray(source_positions)
-        source_normals = np.asarray(source_normals)
-        receiver_positions = np.asarray(receiver_positions)
-        plane_normal = self.plane_normal.reshape((3,) + (1,) * (source_positions.ndim - 1))
-        plane_distance = np.sum(self.plane_normal * self.plane_intersect)
-        mirror_position = source_positions - 2 * plane_normal * ((source_positions * plane_normal).sum(axis=0) - plane_distance)
-        mirror_normal = source_normals - 2 * plane_normal * (source_normals * plane_normal).sum(axis=0)
-
-        direct = func(source_positions, source_normals, receiver_positions, *args, **kwargs)
-        reflected = func(mirror_position, mirror_normal, receiver_positions, *args, **kwargs)
+        out = kwargs.pop('out', None)
+        geometry = kwargs.pop('geometry', None)
+        if geometry is None:
+            geometry = TransducerGeometry(source_positions, source_normals, receiver_positions)
+        source_positions = geometry.source_positions
+        receiver_positions = geometry.receiver_positions
+        # Keep the mirror sources in the same precision as the real sources.
+        real_dtype = np.result_type(np.float32, source_positions, receiver_positions)
+        plane_distance = np.sum(self.plane_normal * self.plane_intersect).astype(real_dtype)
+        mirror_geometry = geometry.mirrored(self.plane_normal.astype(real_dtype), plane_distance)
+        plane_normal = self.plane_normal.astype(real_dtype).reshape((3,) + (1,) * (source_positions.ndim - 1))
+
+        if kwargs.get('fused', False):
+            # Fused evaluation works on blocks of receivers and calculates the geometry itself.
+            direct_kwargs = reflected_kwargs = kwargs
+        else:
+            direct_kwargs = dict(kwargs, geometry=geometry)
+            reflected_kwargs = dict(kwargs, geometry=mirror_geometry)
+        direct = func(source_positions, geometry.source_normals, receiver_positions, *args, **direct_kwargs)
+        reflected = func(mirror_geometry.source_positions, mirror_geometry.source_normals, receiver_positions, *args, **reflected_kwargs)
 
         source_side = np.sign((source_positions * plane_normal).sum(axis=0) - plane_distance).reshape(source_positions.shape[1:] + (1,) * (receiver_positions.ndim - 1))
-        receiver_side = np.sign(np.einsum('i...,i', receiver_positions, self.plane_normal) - plane_distance)
+        receiver_side = np.sign(np.einsum('i...,i', receiver_positions, plane_normal.reshape(3)) - plane_distance)
         # `source_side` and `receiver_side` are zero if the source or receiver is inside the plane.
         # `source_side * receiver_side` will be -1 if they are on different sides, 0 if any of them is in the plane, and 1 otherwise.
         # We should return 0 if the source and receiver is on different sides, otherwise we return the calculated expression.
         # The below expression maps (-1, 0, 1) to (0, 1, 1).
         same_side = np.sign(source_side * receiver_side + 1)
 
-        return (direct + self.reflection_coefficient * reflected) * same_side
+        if out is None:
+            return (direct + self.reflection_coefficient * reflected) * same_side
+        np.multiply(direct + self.reflection_coefficient * reflected, same_side, out=out)
+        return out
 
 
 class PlaneWaveTransducer(TransducerModel):
@@ -639,12 +864,12 @@ class PlaneWaveTransducer(TransducerModel):
         """
         source_positions = np.asarray(source_positions)
         receiver_positions = np.asarray(receiver_positions)
-        source_normals = np.asarray(source_normals, dtype=np.float64)
-        source_normals /= (source_normals**2).sum(axis=0)**0.5
+        source_normals = np.asarray(source_normals, dtype=np.result_type(np.float32, source_positions, receiver_positions))
+        source_normals = source_normals / (source_normals**2).sum(axis=0)**0.5
         diff = receiver_positions.reshape((3,) + (1,) * (source_positions.ndim - 1) + receiver_positions.shape[1:]) - source_positions.reshape(source_positions.shape[:2] + (receiver_positions.ndim - 1) * (1,))
         x_dot_n = np.einsum('i..., i...', diff, source_normals)
 
-        derivatives = np.empty((utils.num_pressure_derivs[orders],) + source_positions.shape[1:2] + receiver_positions.shape[1:], dtype=np.complex128)
+        derivatives = np.empty((utils.num_pressure_derivs[orders],) + source_positions.shape[1:2] + receiver_positions.shape[1:], dtype=_complex_dtype(source_positions, receiver_positions))
         derivatives[0] = self.p0 * np.exp(1j * self.k * x_dot_n)
 
         if orders > 0:
@@ -684,10 +909,6 @@ class CircularPiston(PointSource):
     **kwargs
         See `TransducerModel`
 
-    Note
-    ----
-    This class has no implementation of analytic jacobians yet, and is much slower to use than other models.
-
     """
 
     _repr_fmt_spec = '{:%cls(freq=%freq, p0=%p0, effective_radius=%effective_radius, medium=%mediumfull)}'
@@ -729,23 +950,66 @@ class CircularPiston(PointSource):
             The amplitude (and phase) of the directivity, shape `source_positions.shape[1:] + receiver_positions.shape[1:]`.
 
         """
-        source_positions = np.asarray(source_positions)
-        source_normals = np.asarray(source_normals)
-        receiver_positions = np.asarray(receiver_positions)
-        source_normals = source_normals.reshape(source_positions.shape[:2] + (receiver_positions.ndim - 1) * (1,))
-        diff = receiver_positions.reshape((3,) + (1,) * (source_positions.ndim - 1) + receiver_positions.shape[1:]) - source_positions.reshape(source_positions.shape[:2] + (receiver_positions.ndim - 1) * (1,))
-        dots = np.einsum('i...,i...', diff, source_normals)
-        norm1 = np.einsum('i...,i...', source_normals, source_normals)**0.5
-        norm2 = np.einsum('i...,i...', diff, diff)**0.5
-        cos_angle = np.clip(dots / norm2 / norm1, -1, 1)  # Clip needed because numrical precicion sometimes give a value slightly outside the reasonable range.
-        sin_angle = (1 - cos_angle**2)**0.5
-        ka = self.k * self.effective_radius
+        return self._geometry_directivity(TransducerGeometry(source_positions, source_normals, receiver_positions))
 
-        denom = ka * sin_angle
+    def _geometry_directivity(self, geometry):
+        ka = self.k * self.effective_radius
+        denom = ka * geometry.sin
         numer = j1(denom)
         with np.errstate(invalid='ignore'):
             return np.where(denom == 0, 1, 2 * numer / denom)
 
+    def directivity_derivatives(self, source_positions, source_normals, receiver_positions, orders=3, geometry=None):
+        """Calculate the spatial derivatives of the directivity.
+
+        Explicit implementation of the derivatives of the directivity, based
+        on analytical differentiation.
+
+        Parameters
+        ----------
+        source_positions : numpy.ndarray
+            The location of the transducer, as a (3, ...) shape array.
+        source_normals : numpy.ndarray
+            The look direction of the transducer, as a (3, ...) shape array.
+        receiver_positions : numpy.ndarray
+            The location(s) at which to evaluate the radiation, shape (3, ...).
+            The first dimension must have length 3 and represent the coordinates of the points.
+        orders : int
+            How many orders of derivatives to calculate. Currently three orders are supported.
+        geometry : TransducerGeometry, optional
+            Precalculated geometry for the positions, shared with other calculations.
+
+        Returns
+        -------
+        derivatives : numpy.ndarray
+            Array with the calculated derivatives. Has the shape `(M,) + source_positions.shape[1:] + receiver_positions.shape[1:]`.
+            where `M` is the number of spatial derivatives, see `num_spatial_derivatives` and `spatial_derivative_order`.
+
+        """
+        if geometry is None:
+            geometry = TransducerGeometry(source_positions, source_normals, receiver_positions)
+        return _axisymmetric_directivity_derivatives(geometry, orders, self._angle_derivatives)
+
+    def _angle_derivatives(self, cos, sin, orders):
+        r"""Calculate the derivatives of the directivity with respect to the cosine of the off-axis angle.
+
+        Uses :math:`d/d\xi (J_n(\xi) / \xi^n) = -J_{n+1}(\xi) / \xi^n`, with :math:`\xi = ka\sin\theta`.
+
+        """
+        ka = self.k * self.effective_radius
+        _, J1_xi, *J_xi = _scaled_bessel(orders + 1, ka * sin)
+        derivatives = [2 * J1_xi]
+        if orders > 0:
+            J2_xi2 = J_xi[0]
+            derivatives.append(2 * J2_xi2 * ka**2 * cos)
+        if orders > 1:
+            J3_xi3 = J_xi[1]
+            derivatives.append(2 * (J3_xi3 * ka**4 * cos**2 + J2_xi2 * ka**2))
+        if orders > 2:
+            J4_xi4 = J_xi[2]
+            derivatives.append(2 * (J4_xi4 * ka**6 * cos**3 + 3 * J3_xi3 * ka**4 * cos))
+        return derivatives
+
 
 class CircularRing(PointSource):
     r"""Circular ring transducer model.
@@ -800,20 +1064,13 @@ class CircularRing(PointSource):
             The amplitude (and phase) of the directivity, shape `source_positions.shape[1:] + receiver_positions.shape[1:]`.
 
         """
-        source_positions = np.asarray(source_positions)
-        source_normals = np.asarray(source_normals)
-        receiver_positions = np.asarray(receiver_positions)
-        source_normals = source_normals.reshape(source_positions.shape[:2] + (receiver_positions.ndim - 1) * (1,))
-        diff = receiver_positions.reshape((3,) + (1,) * (source_positions.ndim - 1) + receiver_positions.shape[1:]) - source_positions.reshape(source_positions.shape[:2] + (receiver_positions.ndim - 1) * (1,))
-        dots = np.einsum('i...,i...', diff, source_normals)
-        norm1 = np.einsum('i...,i...', source_normals, source_normals)**0.5
-        norm2 = np.einsum('i...,i...', diff, diff)**0.5
-        cos_angle = np.clip(dots / norm2 / norm1, -1, 1)  # Clip needed because numrical precicion sometimes give a value slightly outside the reasonable range.
-        sin_angle = (1 - cos_angle**2)**0.5
+        return self._geometry_directivity(TransducerGeometry(source_positions, source_normals, receiver_positions))
+
+    def _geometry_directivity(self, geometry):
         ka = self.k * self.effective_radius
-        return j0(ka * sin_angle)
+        return j0(ka * geometry.sin)
 
-    def directivity_derivatives(self, source_positions, source_normals, receiver_positions, orders=3):
+    def directivity_derivatives(self, source_positions, source_normals, receiver_positions, orders=3, geometry=None):
         """Calculate the spatial derivatives of the directivity.
 
         Explicit implementation of the derivatives of the directivity, based
@@ -830,6 +1087,8 @@ class CircularRing(PointSource):
             The first dimension must have length 3 and represent the coordinates of the points.
         orders : int
             How many orders of derivatives to calculate. Currently three orders are supported.
+        geometry : TransducerGeometry, optional
+            Precalculated geometry for the positions, shared with other calculations.
 
         Returns
         -------
@@ -838,83 +1097,291 @@ class CircularRing(PointSource):
             where `M` is the number of spatial derivatives, see `num_spatial_derivatives` and `spatial_derivative_order`.
 
         """
-        source_positions = np.asarray(source_positions)
-        source_normals = np.asarray(source_normals)
-        receiver_positions = np.asarray(receiver_positions)
-        source_normals = source_normals.reshape(source_positions.shape[:2] + (receiver_positions.ndim - 1) * (1,))
-        diff = receiver_positions.reshape((3,) + (1,) * (source_positions.ndim - 1) + receiver_positions.shape[1:]) - source_positions.reshape(source_positions.shape[:2] + (receiver_positions.ndim - 1) * (1,))
-        dot = np.einsum('i...,i...', diff, source_normals)
-        # r = np.einsum('...i,...i', diff, diff)**0.5
-        r = np.sum(diff**2, axis=0)**0.5
-        n = source_normals
-        norm = np.einsum('i...,i...', n, n)**0.5
-        cos = np.clip(dot / r / norm, -1, 1)  # Clip needed because numrical precicion sometimes give a value slightly outside the reasonable range.
-        sin = (1 - cos**2)**0.5
+        if geometry is None:
+            geometry = TransducerGeometry(source_positions, source_normals, receiver_positions)
+        return _axisymmetric_directivity_derivatives(geometry, orders, self._angle_derivatives)
+
+    def _angle_derivatives(self, cos, sin, orders):
+        r"""Calculate the derivatives of the directivity with respect to the cosine of the off-axis angle.
+
+        Uses :math:`d/d\xi (J_n(\xi) / \xi^n) = -J_{n+1}(\xi) / \xi^n`, with :math:`\xi = ka\sin\theta`.
+
+        """
         ka = self.k * self.effective_radius
         ka_sin = ka * sin
-
-        derivatives = np.empty((utils.num_pressure_derivs[orders],) + source_positions.shape[1:2] + receiver_positions.shape[1:], dtype=np.complex128)
         J0 = j0(ka_sin)
-        derivatives[0] = J0
+        derivatives = [J0]
         if orders > 0:
-            r2 = r**2
-            r3 = r**3
-            cos_dx = (r2 * n[0] - diff[0] * dot) / r3 / norm
-            cos_dy = (r2 * n[1] - diff[1] * dot) / r3 / norm
-            cos_dz = (r2 * n[2] - diff[2] * dot) / r3 / norm
-
             with np.errstate(invalid='ignore'):
                 J1_xi = np.where(sin == 0, 0.5, j1(ka_sin) / ka_sin)
-            first_order_const = J1_xi * ka**2 * cos
-            derivatives[1] = first_order_const * cos_dx
-            derivatives[2] = first_order_const * cos_dy
-            derivatives[3] = first_order_const * cos_dz
-
+            derivatives.append(J1_xi * ka**2 * cos)
         if orders > 1:
-            r5 = r2 * r3
-            cos_dx2 = (3 * diff[0]**2 * dot - 2 * diff[0] * n[0] * r2 - dot * r2) / r5 / norm
-            cos_dy2 = (3 * diff[1]**2 * dot - 2 * diff[1] * n[1] * r2 - dot * r2) / r5 / norm
-            cos_dz2 = (3 * diff[2]**2 * dot - 2 * diff[2] * n[2] * r2 - dot * r2) / r5 / norm
-            cos_dxdy = (3 * diff[0] * diff[1] * dot - r2 * (n[0] * diff[1] + n[1] * diff[0])) / r5 / norm
-            cos_dxdz = (3 * diff[0] * diff[2] * dot - r2 * (n[0] * diff[2] + n[2] * diff[0])) / r5 / norm
-            cos_dydz = (3 * diff[1] * diff[2] * dot - r2 * (n[1] * diff[2] + n[2] * diff[1])) / r5 / norm
-
             with np.errstate(invalid='ignore'):
                 J2_xi2 = np.where(sin == 0, 0.125, (2 * J1_xi - J0) / ka_sin**2)
-            second_order_const = J2_xi2 * ka**4 * cos**2 + J1_xi * ka**2
-            derivatives[4] = second_order_const * cos_dx**2 + first_order_const * cos_dx2
-            derivatives[5] = second_order_const * cos_dy**2 + first_order_const * cos_dy2
-            derivatives[6] = second_order_const * cos_dz**2 + first_order_const * cos_dz2
-            derivatives[7] = second_order_const * cos_dx * cos_dy + first_order_const * cos_dxdy
-            derivatives[8] = second_order_const * cos_dx * cos_dz + first_order_const * cos_dxdz
-            derivatives[9] = second_order_const * cos_dy * cos_dz + first_order_const * cos_dydz
-
+            derivatives.append(J2_xi2 * ka**4 * cos**2 + J1_xi * ka**2)
         if orders > 2:
-            r4 = r2**2
-            r7 = r5 * r2
-            cos_dx3 = (-15 * diff[0]**3 * dot + 9 * r2 * (diff[0]**2 * n[0] + diff[0] * dot) - 3 * r4 * n[0]) / r7 / norm
-            cos_dy3 = (-15 * diff[1]**3 * dot + 9 * r2 * (diff[1]**2 * n[1] + diff[1] * dot) - 3 * r4 * n[1]) / r7 / norm
-            cos_dz3 = (-15 * diff[2]**3 * dot + 9 * r2 * (diff[2]**2 * n[2] + diff[2] * dot) - 3 * r4 * n[2]) / r7 / norm
-            cos_dx2dy = (-15 * diff[0]**2 * diff[1] * dot + 3 * r2 * (diff[0]**2 * n[1] + 2 * diff[0] * diff[1] * n[0] + diff[1] * dot) - r4 * n[1]) / r7 / norm
-            cos_dx2dz = (-15 * diff[0]**2 * diff[2] * dot + 3 * r2 * (diff[0]**2 * n[2] + 2 * diff[0] * diff[2] * n[0] + diff[2] * dot) - r4 * n[2]) / r7 / norm
-            cos_dy2dx = (-15 * diff[1]**2 * diff[0] * dot + 3 * r2 * (diff[1]**2 * n[0] + 2 * diff[1] * diff[0] * n[1] + diff[0] * dot) - r4 * n[0]) / r7 / norm
-            cos_dy2dz = (-15 * diff[1]**2 * diff[2] * dot + 3 * r2 * (diff[1]**2 * n[2] + 2 * diff[1] * diff[2] * n[1] + diff[2] * dot) - r4 * n[2]) / r7 / norm
-            cos_dz2dx = (-15 * diff[2]**2 * diff[0] * dot + 3 * r2 * (diff[2]**2 * n[0] + 2 * diff[2] * diff[0] * n[2] + diff[0] * dot) - r4 * n[0]) / r7 / norm
-            cos_dz2dy = (-15 * diff[2]**2 * diff[1] * dot + 3 * r2 * (diff[2]**2 * n[1] + 2 * diff[2] * diff[1] * n[2] + diff[1] * dot) - r4 * n[1]) / r7 / norm
-            cos_dxdydz = (-15 * diff[0] * diff[1] * diff[2] * dot + 3 * r2 * (n[0] * diff[1] * diff[2] + n[1] * diff[0] * diff[2] + n[2] * diff[0] * diff[1])) / r7 / norm
-
             with np.errstate(invalid='ignore'):
                 J3_xi3 = np.where(sin == 0, 1 / 48, (4 * J2_xi2 - J1_xi) / ka_sin**2)
-            third_order_const = J3_xi3 * ka**6 * cos**3 + 3 * J2_xi2 * ka**4 * cos
-            derivatives[10] = third_order_const * cos_dx**3 + 3 * second_order_const * cos_dx2 * cos_dx + first_order_const * cos_dx3
-            derivatives[11] = third_order_const * cos_dy**3 + 3 * second_order_const * cos_dy2 * cos_dy + first_order_const * cos_dy3
-            derivatives[12] = third_order_const * cos_dz**3 + 3 * second_order_const * cos_dz2 * cos_dz + first_order_const * cos_dz3
-            derivatives[13] = third_order_const * cos_dx**2 * cos_dy + second_order_const * (cos_dx2 * cos_dy + 2 * cos_dxdy * cos_dx) + first_order_const * cos_dx2dy
-            derivatives[14] = third_order_const * cos_dx**2 * cos_dz + second_order_const * (cos_dx2 * cos_dz + 2 * cos_dxdz * cos_dx) + first_order_const * cos_dx2dz
-            derivatives[15] = third_order_const * cos_dy**2 * cos_dx + second_order_const * (cos_dy2 * cos_dx + 2 * cos_dxdy * cos_dy) + first_order_const * cos_dy2dx
-            derivatives[16] = third_order_const * cos_dy**2 * cos_dz + second_order_const * (cos_dy2 * cos_dz + 2 * cos_dydz * cos_dy) + first_order_const * cos_dy2dz
-            derivatives[17] = third_order_const * cos_dz**2 * cos_dx + second_order_const * (cos_dz2 * cos_dx + 2 * cos_dxdz * cos_dz) + first_order_const * cos_dz2dx
-            derivatives[18] = third_order_const * cos_dz**2 * cos_dy + second_order_const * (cos_dz2 * cos_dy + 2 * cos_dydz * cos_dz) + first_order_const * cos_dz2dy
-            derivatives[19] = third_order_const * cos_dx * cos_dy * cos_dz + second_order_const * (cos_dx * cos_dydz + cos_dy * cos_dxdz + cos_dz * cos_dxdy) + first_order_const * cos_dxdydz
-
+            derivatives.append(J3_xi3 * ka**6 * cos**3 + 3 * J2_xi2 * ka**4 * cos)
         return derivatives
+
+
+class TransducerGeometry:
+    """Geometric relations between transducers and receivers.
+
+    Calculates and caches quantities which are shared between the different
+    calculations in the transducer models, e.g. the distances between the
+    transducers and the receivers, and the angles relative to the transducer normals.
+    The quantities are only calculated when they are first used.
+    Pass an object of this class as the `geometry` argument to the methods of
+    the transducer models to reuse the quantities between multiple calculations
+    for the same positions.
+
+    Parameters
+    ----------
+    source_positions : numpy.ndarray
+        The location of the transducer, as a (3, ...) shape array.
+    source_normals : numpy.ndarray
+        The look direction of the transducer, as a (3, ...) shape array.
+    receiver_positions : numpy.ndarray
+        The location(s) of the receivers, shape (3, ...).
+
+    Attributes
+    ----------
+    diff : numpy.ndarray
+        The vectors from the transducers to the receivers, shape `(3,) + source_positions.shape[1:] + receiver_positions.shape[1:]`.
+    r : numpy.ndarray
+        The distances from the transducers to the receivers.
+    normals : numpy.ndarray
+        The transducer normals, reshaped to broadcast with `diff`.
+    normal_norm : numpy.ndarray
+        The lengths of the transducer normals.
+    dot : numpy.ndarray
+        The scalar product between `diff` and the transducer normals.
+    cos : numpy.ndarray
+        The cosine of the angle between the transducer normal and `diff`.
+    sin : numpy.ndarray
+        The sine of the angle between the transducer normal and `diff`.
+
+    """
+
+    def __init__(self, source_positions, source_normals, receiver_positions):
+        self.source_positions = np.asarray(source_positions)
+        self.source_normals = np.asarray(source_normals) if source_normals is not None else None
+        self.receiver_positions = np.asarray(receiver_positions)
+        if self.receiver_positions.shape[0] != 3:
+            raise ValueError('Incorrect shape of positions')
+        self._mirrored = {}
+
+    @property
+    def diff(self):
+        try:
+            return self._diff
+        except AttributeError:
+            self._diff = (
+                self.receiver_positions.reshape((3,) + (1,) * (self.source_positions.ndim - 1) + self.receiver_positions.shape[1:])
+                - self.source_positions.reshape(self.source_positions.shape[:2] + (self.receiver_positions.ndim - 1) * (1,))
+            )
+            return self._diff
+
+    @property
+    def r(self):
+        try:
+            return self._r
+        except AttributeError:
+            self._r = np.sum(self.diff**2, axis=0)**0.5
+            return self._r
+
+    @property
+    def normals(self):
+        return self.source_normals.reshape(self.source_positions.shape[:2] + (self.receiver_positions.ndim - 1) * (1,))
+
+    @property
+    def normal_norm(self):
+        try:
+            return self._normal_norm
+        except AttributeError:
+            self._normal_norm = np.einsum('i...,i...', self.normals, self.normals)**0.5
+            return self._normal_norm
+
+    @property
+    def dot(self):
+        try:
+            return self._dot
+        except AttributeError:
+            self._dot = np.einsum('i...,i...', self.diff, self.normals)
+            return self._dot
+
+    @property
+    def cos(self):
+        try:
+            return self._cos
+        except AttributeError:
+            # Clip needed because numerical precision sometimes give a value slightly outside the reasonable range.
+            self._cos = np.clip(self.dot / self.r / self.normal_norm, -1, 1)
+            return self._cos
+
+    @property
+    def sin(self):
+        try:
+            return self._sin
+        except AttributeError:
+            self._sin = (1 - self.cos**2)**0.5
+            return self._sin
+
+    def phase(self, k):
+        """Calculate the propagation phase :math:`e^{ikr}`, cached for the last used wavenumber."""
+        try:
+            cached_k, phase = self._phase
+        except AttributeError:
+            pass
+        else:
+            if cached_k == k:
+                return phase
+        phase = np.exp(1j * k * self.r)
+        self._phase = (k, phase)
+        return phase
+
+    def mirrored(self, plane_normal, plane_distance):
+        """Geometry for the transducers mirrored in a plane.
+
+        Parameters
+        ----------
+        plane_normal : numpy.ndarray
+            Unit normal of the mirror plane, shape (3,).
+        plane_distance : float
+            The distance from the origin to the plane, along the normal.
+
+        Returns
+        -------
+        geometry : TransducerGeometry
+            The geometry for the mirrored transducers and the same receivers.
+            The mirrored geometry is cached, so repeated calls with the same plane
+            return the same object.
+
+        """
+        key = (tuple(plane_normal), float(plane_distance))
+        try:
+            return self._mirrored[key]
+        except KeyError:
+            pass
+        plane_normal = plane_normal.reshape((3,) + (1,) * (self.source_positions.ndim - 1))
+        mirror_position = self.source_positions - 2 * plane_normal * ((self.source_positions * plane_normal).sum(axis=0) - plane_distance)
+        mirror_normal = self.source_normals - 2 * plane_normal * (self.source_normals * plane_normal).sum(axis=0)
+        geometry = self._mirrored[key] = TransducerGeometry(mirror_position, mirror_normal, self.receiver_positions)
+        return geometry
+
+
+def _scaled_bessel(orders, xi):
+    r"""Evaluate :math:`J_n(\xi) / \xi^n` for :math:`n = 0, \ldots, orders`.
+
+    Large arguments use upward recurrence from :math:`J_0` and :math:`J_1`.
+    The recurrence suffers from cancellation for small arguments, where the power series is used instead.
+
+    """
+    small = xi < 2
+    xi_large = np.where(small, 2, xi)
+    values = [j0(xi_large), j1(xi_large) / xi_large]
+    for n in range(1, orders):
+        values.append((2 * n * values[n] - values[n - 1]) / xi_large**2)
+    t = -xi**2 / 4
+    for n in range(orders + 1):
+        series = 0
+        for k in reversed(range(12)):
+            series = series * t + 1 / (math.factorial(k) * math.factorial(n + k) * 2**n)
+        values[n] = np.where(small, series, values[n])
+    return values
+
+
+def _axisymmetric_directivity_derivatives(geometry, orders, angle_derivatives):
+    """Calculate the spatial derivatives of axisymmetric directivities.
+
+    Implements the chain rule for directivities which only depend on the
+    angle between the transducer normal and the vector from the transducer to the receiver.
+    The spatial derivatives of the cosine of the angle are calculated analytically,
+    and combined with the derivatives of the directivity with respect to the cosine.
+
+    Parameters
+    ----------
+    geometry : TransducerGeometry
+        The geometry of the transducers and receivers.
+    orders : int
+        How many orders of derivatives to calculate. Currently three orders are supported.
+    angle_derivatives : callable
+        Called as `angle_derivatives(cos, sin, orders)`, should return a sequence with the
+        directivity and its derivatives with respect to the cosine of the angle, up to `orders`.
+
+    Returns
+    -------
+    derivatives : numpy.ndarray
+        Array with the calculated derivatives. Has the shape `(M,) + source_positions.shape[1:] + receiver_positions.shape[1:]`.
+        where `M` is the number of spatial derivatives, see `num_spatial_derivatives` and `spatial_derivative_order`.
+
+    """
+    diff = geometry.diff
+    dot = geometry.dot
+    r = geometry.r
+    n = geometry.normals
+    norm = geometry.normal_norm
+    cos = geometry.cos
+    sin = geometry.sin
+
+    derivatives = np.empty((utils.num_pressure_derivs[orders],) + r.shape, dtype=_complex_dtype(diff))
+    angle_derivatives = angle_derivatives(cos, sin, orders)
+    derivatives[0] = angle_derivatives[0]
+    if orders > 0:
+        r2 = r**2
+        r3 = r**3
+        cos_dx = (r2 * n[0] - diff[0] * dot) / r3 / norm
+        cos_dy = (r2 * n[1] - diff[1] * dot) / r3 / norm
+        cos_dz = (r2 * n[2] - diff[2] * dot) / r3 / norm
+
+        first_order_const = angle_derivatives[1]
+        derivatives[1] = first_order_const * cos_dx
+        derivatives[2] = first_order_const * cos_dy
+        derivatives[3] = first_order_const * cos_dz
+
+    if orders > 1:
+        r5 = r2 * r3
+        cos_dx2 = (3 * diff[0]**2 * dot - 2 * diff[0] * n[0] * r2 - dot * r2) / r5 / norm
+        cos_dy2 = (3 * diff[1]**2 * dot - 2 * diff[1] * n[1] * r2 - dot * r2) / r5 / norm
+        cos_dz2 = (3 * diff[2]**2 * dot - 2 * diff[2] * n[2] * r2 - dot * r2) / r5 / norm
+        cos_dxdy = (3 * diff[0] * diff[1] * dot - r2 * (n[0] * diff[1] + n[1] * diff[0])) / r5 / norm
+        cos_dxdz = (3 * diff[0] * diff[2] * dot - r2 * (n[0] * diff[2] + n[2] * diff[0])) / r5 / norm
+        cos_dydz = (3 * diff[1] * diff[2] * dot - r2 * (n[1] * diff[2] + n[2] * diff[1])) / r5 / norm
+
+        second_order_const = angle_derivatives[2]
+        derivatives[4] = second_order_const * cos_dx**2 + first_order_const * cos_dx2
+        derivatives[5] = second_order_const * cos_dy**2 + first_order_const * cos_dy2
+        derivatives[6] = second_order_const * cos_dz**2 + first_order_const * cos_dz2
+        derivatives[7] = second_order_const * cos_dx * cos_dy + first_order_const * cos_dxdy
+        derivatives[8] = second_order_const * cos_dx * cos_dz + first_order_const * cos_dxdz
+        derivatives[9] = second_order_const * cos_dy * cos_dz + first_order_const * cos_dydz
+
+    if orders > 2:
+        r4 = r2**2
+        r7 = r5 * r2
+        cos_dx3 = (-15 * diff[0]**3 * dot + 9 * r2 * (diff[0]**2 * n[0] + diff[0] * dot) - 3 * r4 * n[0]) / r7 / norm
+        cos_dy3 = (-15 * diff[1]**3 * dot + 9 * r2 * (diff[1]**2 * n[1] + diff[1] * dot) - 3 * r4 * n[1]) / r7 / norm
+        cos_dz3 = (-15 * diff[2]**3 * dot + 9 * r2 * (diff[2]**2 * n[2] + diff[2] * dot) - 3 * r4 * n[2]) / r7 / norm
+        cos_dx2dy = (-15 * diff[0]**2 * diff[1] * dot + 3 * r2 * (diff[0]**2 * n[1] + 2 * diff[0] * diff[1] * n[0] + diff[1] * dot) - r4 * n[1]) / r7 / norm
+        cos_dx2dz = (-15 * diff[0]**2 * diff[2] * dot + 3 * r2 * (diff[0]**2 * n[2] + 2 * diff[0] * diff[2] * n[0] + diff[2] * dot) - r4 * n[2]) / r7 / norm
+        cos_dy2dx = (-15 * diff[1]**2 * diff[0] * dot + 3 * r2 * (diff[1]**2 * n[0] + 2 * diff[1] * diff[0] * n[1] + diff[0] * dot) - r4 * n[0]) / r7 / norm
+        cos_dy2dz = (-15 * diff[1]**2 * diff[2] * dot + 3 * r2 * (diff[1]**2 * n[2] + 2 * diff[1] * diff[2] * n[1] + diff[2] * dot) - r4 * n[2]) / r7 / norm
+        cos_dz2dx = (-15 * diff[2]**2 * diff[0] * dot + 3 * r2 * (diff[2]**2 * n[0] + 2 * diff[2] * diff[0] * n[2] + diff[0] * dot) - r4 * n[0]) / r7 / norm
+        cos_dz2dy = (-15 * diff[2]**2 * diff[1] * dot + 3 * r2 * (diff[2]**2 * n[1] + 2 * diff[2] * diff[1] * n[2] + diff[1] * dot) - r4 * n[1]) / r7 / norm
+        cos_dxdydz = (-15 * diff[0] * diff[1] * diff[2] * dot + 3 * r2 * (n[0] * diff[1] * diff[2] + n[1] * diff[0] * diff[2] + n[2] * diff[0] * diff[1])) / r7 / norm
+
+        third_order_const = angle_derivatives[3]
+        derivatives[10] = third_order_const * cos_dx**3 + 3 * second_order_const * cos_dx2 * cos_dx + first_order_const * cos_dx3
+        derivatives[11] = third_order_const * cos_dy**3 + 3 * second_order_const * cos_dy2 * cos_dy + first_order_const * cos_dy3
+        derivatives[12] = third_order_const * cos_dz**3 + 3 * second_order_const * cos_dz2 * cos_dz + first_order_const * cos_dz3
+        derivatives[13] = third_order_const * cos_dx**2 * cos_dy + second_order_const * (cos_dx2 * cos_dy + 2 * cos_dxdy * cos_dx) + first_order_const * cos_dx2dy
+        derivatives[14] = third_order_const * cos_dx**2 * cos_dz + second_order_const * (cos_dx2 * cos_dz + 2 * cos_dxdz * cos_dx) + first_order_const * cos_dx2dz
+        derivatives[15] = third_order_const * cos_dy**2 * cos_dx + second_order_const * (cos_dy2 * cos_dx + 2 * cos_dxdy * cos_dy) + first_order_const * cos_dy2dx
+        derivatives[16] = third_order_const * cos_dy**2 * cos_dz + second_order_const * (cos_dy2 * cos_dz + 2 * cos_dydz * cos_dy) + first_order_const * cos_dy2dz
+        derivatives[17] = third_order_const * cos_dz**2 * cos_dx + second_order_const * (cos_dz2 * cos_dx + 2 * cos_dxdz * cos_dz) + first_order_const * cos_dz2dx
+        derivatives[18] = third_order_const * cos_dz**2 * cos_dy + second_order_const * (cos_dz2 * cos_dy + 2 * cos_dydz * cos_dz) + first_order_const * cos_dz2dy
+        derivatives[19] = third_order_const * cos_dx * cos_dy * cos_dz + second_order_const * (cos_dx * cos_dydz + cos_dy * cos_dxdz + cos_dz * cos_dxdy) + first_order_const * cos_dxdydz
+
+    return derivatives
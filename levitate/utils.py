@@ -1,5 +1,6 @@
 """Miscellaneous tools for small but common tasks."""
 import numpy as np
+import warnings
 
 pressure_derivs_order = ['', 'x', 'y', 'z', 'xx', 'yy', 'zz', 'xy', 'xz', 'yz', 'xxx', 'yyy', 'zzz', 'xxy', 'xxz', 'yyx', 'yyz', 'zzx', 'zzy', 'xyz']
 """Defines the order in which the pressure spatial derivatives are stored."""
@@ -176,8 +177,23 @@ class SphericalHarmonicsIndexer:
         (0, 1, 1, 1, 2, 2, 2, 2, 2)
         (0, -1, 0, 1, -2, -1, 0, 1, 2)
 
+    For vectorized computations, the orders and modes are also available as arrays,
+    and calling the object with arrays gives an array of indices::
+
+        >>> sph_idx = SphericalHarmonicsIndexer(2)
+        >>> print(sph_idx.n)
+        [0 1 1 1 2 2 2 2 2]
+        >>> print(sph_idx(sph_idx.n, -sph_idx.m))
+        [0 3 2 1 8 7 6 5 4]
+
+    The index arrays are calculated once for each combination of min and max order,
+    and are shared between all objects.
+
     """
 
+    # Index arrays for (min_order, max_order), shared between all objects.
+    _tables = {}
+
     def __init__(self, max_order=None, min_order=0):
         if max_order is None:
             max_order = float('inf')
@@ -191,6 +207,11 @@ class SphericalHarmonicsIndexer:
         self.min_order = min_order
 
     def __call__(self, order, mode):
+        if np.ndim(order) > 0 or np.ndim(mode) > 0:
+            order, mode = np.asarray(order), np.asarray(mode)
+            if np.any(np.abs(mode) > order):
+                raise ValueError('Spherical harmonics mode cannot be higher than the order')
+            return order**2 + order + mode - self._min_offset
         if abs(mode) > order:
             raise ValueError('Spherical harmonics mode cannot be higher than the order')
         try:
@@ -235,6 +256,64 @@ class SphericalHarmonicsIndexer:
         self._min_order = val
         self._min_offset = int((self.min_order - 1)**2 + 2 * self.min_order - 1)
 
+    def _table(self, key, calculate):
+        try:
+            tables = self._tables[self.min_order, self.max_order]
+        except KeyError:
+            if self.max_order == float('inf'):
+                raise ValueError('Cannot create index arrays without a maximum order') from None
+            tables = self._tables[self.min_order, self.max_order] = {}
+        try:
+            return tables[key]
+        except KeyError:
+            value = calculate()
+            for array in (value if isinstance(value, tuple) else (value,)):
+                array.setflags(write=False)
+            tables[key] = value
+            return value
+
+    @property
+    def n(self):
+        """The orders of all coefficients, as an array."""
+        return self._table('n', lambda: np.repeat(
+            np.arange(self.min_order, self.max_order + 1),
+            2 * np.arange(self.min_order, self.max_order + 1) + 1))
+
+    @property
+    def m(self):
+        """The modes of all coefficients, as an array."""
+        return self._table('m', lambda: np.arange(len(self)) + self._min_offset - self.n**2 - self.n)
+
+    def neighbours(self, order_shift, mode_shift):
+        """Get the indices of neighbouring coefficients.
+
+        Gives the indices of the coefficients with order `n + order_shift` and
+        mode `m + mode_shift` for all the coefficients `(n, m)` in the indexer.
+        The neighbours do not exist if the shifted mode is higher than the shifted order,
+        or if the shifted order is lower than the minimum order of the indexer,
+        and the indices are set to zero for these coefficients.
+
+        Parameters
+        ----------
+        order_shift : int
+            The shift of the order, e.g. 1 for the next order.
+        mode_shift : int
+            The shift of the mode, e.g. -1 for the previous mode.
+
+        Returns
+        -------
+        indices : numpy.ndarray
+            The indices of the neighbours.
+        valid : numpy.ndarray
+            Boolean mask which is True where the neighbour exists.
+
+        """
+        def calculate():
+            order, mode = self.n + order_shift, self.m + mode_shift
+            valid = (np.abs(mode) <= order) & (order >= self.min_order)
+            return np.where(valid, order**2 + order + mode - self._min_offset, 0), valid
+        return self._table((order_shift, mode_shift), calculate)
+
     @property
     def orders(self):
         """Iterate over orders.
@@ -294,10 +373,12 @@ class SphericalHarmonicsIndexer:
             else:
                 raise ValueError('Cannot find axis of length {} in the given values!'.format(len(self)))
 
+        starts = self._table('starts', lambda: np.arange(self.min_order, self.max_order + 2)**2 - self._min_offset)
+        if values.size <= 256 * values.shape[axis]:
+            return np.add.reduceat(values, starts[:-1], axis=axis)
+        # For many values per coefficient, contiguous sums over the slices for each order are faster than `reduceat`.
         values = np.moveaxis(values, axis, 0)
-        output = np.zeros((self.max_order - self.min_order + 1, ) + values.shape[1:], dtype=values.dtype)
-        for idx, order in enumerate(self.orders):
-            output[idx] = np.sum(values[self(order, -order):self(order, order) + 1], axis=0)
+        output = np.stack([np.sum(values[start:stop], axis=0) for start, stop in zip(starts[:-1], starts[1:])])
         return np.moveaxis(output, 0, axis)
 
 
@@ -339,31 +420,247 @@ def find_trap(array, start_position, complex_transducer_amplitudes, tolerance=10
             The found trap position, or the path from the starting position to the trap position.
 
         """
-        from scipy.integrate import solve_ivp
-        from numpy.linalg import lstsq
-        if 'radius' in kwargs:
-            from .fields import SphericalHarmonicsForce as Force, SphericalHarmonicsForceGradient as ForceGradient
-        else:
-            from .fields import RadiationForce as Force, RadiationForceGradient as ForceGradient
-        evaluator = Force(array, **kwargs) + ForceGradient(array, **kwargs)
-        mg = evaluator.fields[0].field.mg
-
-        def f(t, x):
-            F = evaluator(complex_transducer_amplitudes, x)[0]
-            F[2] -= mg
-            return F
-
-        def bead_close(t, x):
-            F, dF = evaluator(complex_transducer_amplitudes, x)
-            F[2] -= mg
-            dx = lstsq(dF, F, rcond=None)[0]
-            distance = np.sum(dx**2, axis=0)**0.5
-            return np.clip(distance - tolerance, 0, None)
-        bead_close.terminal = True
-        outs = solve_ivp(f, (0, time_interval), np.asarray(start_position), events=bead_close, vectorized=True, dense_output=path_points > 1)
+        evaluate = _trap_force_evaluator(array, complex_transducer_amplitudes, **kwargs)
+        outs = _follow_force(evaluate, start_position, tolerance, time_interval, path_points)
         if outs.message != 'A termination event occurred.':
             print('End criterion not met. Final path position might not be close to trap location.')
         if path_points > 1:
             return outs.sol(np.linspace(0, outs.sol.t_max, path_points))
         else:
             return outs.y[:, -1]
+
+
+def refine_trap(array, start_position, complex_transducer_amplitudes, tolerance=10e-6, max_iterations=20, max_step=None, time_interval=50, **kwargs):
+    r"""Find the location of a levitation trap using Newton iterations.
+
+    Solves :math:`\vec F(x) = 0`, where the weight of the bead is included in the force, using damped
+    Newton iterations with the force gradient. Each step is limited to `max_step`, and a backtracking
+    line search ensures that the magnitude of the force decreases. Close to a trap this converges in a
+    few evaluations, compared to the many evaluations needed to follow the force with `find_trap`.
+    In regions where the trap is not stable, Newton steps lead towards unstable equilibria,
+    so the absolute values of the stiffness eigenvalues are used for the steps there instead.
+    The iterations have converged when the Newton step is shorter than the tolerance, and the
+    trap is stable, i.e. all the stiffness eigenvalues are negative.
+
+    If the iterations do not converge, e.g. if the starting point is far from a trap, the force is
+    followed from the starting point as in `find_trap`, and the end of the path is refined with
+    Newton iterations. A `RuntimeWarning` is issued if these iterations do not converge either.
+
+    Parameters
+    ----------
+    array : TrasducerArray
+        The transducer array to use for the solving.
+    start_position : array_like, 3 elements
+        The starting point for the solving.
+    complex_transducer_amplitudes: complex array like
+        The complex transducer amplitudes to use for the solving.
+    tolerance : numeric, default 10e-6
+        The approximate tolerance of the solution, i.e. how close should
+        the found position be to the true position, in meters.
+    max_iterations : int, default 20
+        The maximum number of Newton iterations.
+    max_step : numeric, optional
+        The longest Newton step, in meters. Defaults to a quarter of the wavelength.
+    time_interval : numeric, default 50
+        The unphysical time to follow the force for if the Newton iterations do not converge, see `find_trap`.
+
+    Returns
+    -------
+    trap_pos : numpy.ndarray
+        The found trap position.
+    stiffness : numpy.ndarray
+        The eigenvalues of the symmetric part of the force gradient at the trap, in ascending order.
+    evaluations : int
+        The number of evaluations of the force and the force gradient.
+
+    """
+    force_evaluator = _trap_force_evaluator(array, complex_transducer_amplitudes, **kwargs)
+    if max_step is None:
+        max_step = array.wavelength / 4
+    evaluations = 0
+
+    def evaluate(x):
+        nonlocal evaluations
+        evaluations += np.shape(x)[1] if np.ndim(x) > 1 else 1
+        return force_evaluator(x)
+
+    def stiffness(dF):
+        return np.linalg.eigh(0.5 * (dF + dF.T))
+
+    def newton(x):
+        F, dF = evaluate(x)
+        for _ in range(max_iterations):
+            eigenvalues, eigenvectors = stiffness(dF)
+            stable = np.all(eigenvalues < 0)
+            if stable:
+                step = -np.linalg.lstsq(dF, F, rcond=None)[0]
+            else:
+                # Newton steps lead towards unstable equilibria. Taking the absolute value of the
+                # stiffness eigenvalues gives steps along the force instead.
+                step = eigenvectors @ ((eigenvectors.T @ F) / np.maximum(np.abs(eigenvalues), np.finfo(float).tiny))
+            length = np.sum(step**2)**0.5
+            if stable and length < tolerance:
+                return x + step, dF, True
+            step *= min(1, max_step / length)
+            if not stable:
+                # The magnitude of the force usually increases on the way to the trap, so no line search.
+                x = x + step
+                F, dF = evaluate(x)
+                continue
+            residual = np.sum(F**2)
+            alpha = 1
+            while True:
+                F_new, dF_new = evaluate(x + alpha * step)
+                if np.sum(F_new**2) < (1 - 2e-4 * alpha) * residual:
+                    break
+                alpha /= 2
+                if alpha < 1e-3:
+                    # The force cannot be decreased along the Newton step.
+                    return x, dF, False
+            x, F, dF = x + alpha * step, F_new, dF_new
+        return x, dF, False
+
+    position, dF, converged = newton(np.asarray(start_position, dtype=float))
+    if not converged:
+        outs = _follow_force(evaluate, start_position, tolerance, time_interval, path_points=1)
+        position, dF, converged = newton(outs.y[:, -1])
+        if not converged:
+            warnings.warn('End criterion not met. Final position might not be close to trap location.', RuntimeWarning, stacklevel=2)
+    return position, stiffness(dF)[0], evaluations
+
+
+def _trap_force_evaluator(array, complex_transducer_amplitudes, **kwargs):
+    """Create a function evaluating the force, with gravity subtracted, and the force gradient."""
+    if 'radius' in kwargs:
+        from .fields import SphericalHarmonicsForce as Force, SphericalHarmonicsForceGradient as ForceGradient
+    else:
+        from .fields import RadiationForce as Force, RadiationForceGradient as ForceGradient
+    evaluator = Force(array, **kwargs) + ForceGradient(array, **kwargs)
+    mg = evaluator.fields[0].field.mg
+
+    def evaluate(x):
+        F, dF = evaluator(complex_transducer_amplitudes, x)
+        F[2] -= mg
+        return F, dF
+    return evaluate
+
+
+def _follow_force(evaluate, start_position, tolerance, time_interval, path_points):
+    """Integrate the force as a velocity field, see `find_trap`."""
+    from scipy.integrate import solve_ivp
+    from numpy.linalg import lstsq
+
+    def f(t, x):
+        return evaluate(x)[0]
+
+    def bead_close(t, x):
+        F, dF = evaluate(x)
+        dx = lstsq(dF, F, rcond=None)[0]
+        distance = np.sum(dx**2, axis=0)**0.5
+        return np.clip(distance - tolerance, 0, None)
+    bead_close.terminal = True
+    return solve_ivp(f, (0, time_interval), np.asarray(start_position), events=bead_close, vectorized=True, dense_output=path_points > 1)
+
+
+def find_traps(array, start_positions, complex_transducer_amplitudes, tolerance=10e-6, time_interval=50, merge_distance=None, **kwargs):
+    r"""Find the levitation traps reached from many starting points.
+
+    Batch version of `find_trap`. The differential equation :math:`d\vec x/dt  = \vec F(x,t)` is
+    integrated for all starting points together, using an adaptive Runge-Kutta method of order 3
+    with individual step sizes. The force at all the active points is evaluated in a single call.
+    Points which meet the tolerance, evaluated in the same way as in `find_trap`,
+    are removed from the integration. The found positions are then merged into
+    a list of unique traps.
+
+    Parameters
+    ----------
+    array : TrasducerArray
+        The transducer array to use for the solving.
+    start_positions : array_like
+        The starting points for the solving, shape (3, K).
+    complex_transducer_amplitudes: complex array like
+        The complex transducer amplitudes to use for the solving.
+    tolerance : numeric, default 10e-6
+        The approximate tolerance of the solution, i.e. how close should
+        the found positions be to the true positions, in meters.
+    time_interval : numeric, default 50
+        The unphysical time of the solution range in the differential equation above.
+        Points which have not met the tolerance at the end of the interval are discarded.
+    merge_distance : numeric, optional
+        Found positions closer than this to a trap are merged into the trap.
+        Defaults to ten times the tolerance.
+
+    Returns
+    -------
+    traps : numpy.ndarray
+        The unique trap positions, shape (3, T).
+    stiffness : numpy.ndarray
+        The non-mixed derivatives of the force at the traps, shape (3, T), see `~levitate.fields.RadiationForceStiffness`.
+    labels : numpy.ndarray
+        The index of the trap reached from each starting point, or -1 if the tolerance was not met, shape (K,).
+
+    """
+    if 'radius' in kwargs:
+        from .fields import SphericalHarmonicsForce as Force, SphericalHarmonicsForceGradient as ForceGradient
+    else:
+        from .fields import RadiationForce as Force, RadiationForceGradient as ForceGradient
+    force = Force(array, **kwargs)
+    evaluator = force + ForceGradient(array, **kwargs)
+    mg = force.field.mg
+    if merge_distance is None:
+        merge_distance = 10 * tolerance
+
+    def f(x):
+        F = force(complex_transducer_amplitudes, x)
+        F[2] -= mg
+        return F
+
+    def f_close(x):
+        F, dF = evaluator(complex_transducer_amplitudes, x)
+        F[2] -= mg
+        dx = np.einsum('kij, jk -> ik', np.linalg.pinv(np.moveaxis(dF, -1, 0)), F)
+        return F, np.sum(dx**2, axis=0)**0.5 < tolerance
+
+    x = np.array(start_positions, dtype=float).reshape((3, -1))
+    found = np.full(x.shape, np.nan)
+    active = np.arange(x.shape[1])
+    t = np.zeros(x.shape[1])
+    F, close = f_close(x)
+    found[:, close] = x[:, close]
+    active, x, F = active[~close], x[:, ~close], F[:, ~close]
+    # Initial steps which move the points ten times the tolerance.
+    h = np.minimum(time_interval, 10 * tolerance / np.maximum(np.sum(F**2, axis=0)**0.5, np.finfo(float).tiny))
+    while active.size > 0:
+        # Bogacki-Shampine pair, with the force at the new point reused as the first stage in the next step.
+        k2 = f(x + 0.5 * h * F)
+        k3 = f(x + 0.75 * h * k2)
+        x_new = x + h * (2 * F + 3 * k2 + 4 * k3) / 9
+        F_new, close = f_close(x_new)
+        error = np.sum((h * (-5 * F / 72 + k2 / 12 + k3 / 9 - F_new / 8))**2, axis=0)**0.5 / (0.1 * tolerance)
+        accepted = error <= 1
+        t = np.where(accepted, t + h, t)
+        x = np.where(accepted, x_new, x)
+        F = np.where(accepted, F_new, F)
+        close &= accepted
+        found[:, active[close]] = x[:, close]
+        h = h * np.clip(0.9 * np.maximum(error, np.finfo(float).tiny)**(-1 / 3), 0.2, 5)
+        h = np.minimum(h, time_interval - t)
+        remaining = ~close & (t < time_interval) & (h > 0)
+        active, x, F, t, h = active[remaining], x[:, remaining], F[:, remaining], t[remaining], h[remaining]
+
+    labels = np.full(found.shape[1], -1)
+    traps = []
+    for idx in np.flatnonzero(~np.isnan(found[0])):
+        for trap_idx, trap in enumerate(traps):
+            if np.sum((found[:, idx] - trap[0])**2)**0.5 < merge_distance:
+                trap.append(found[:, idx])
+                labels[idx] = trap_idx
+                break
+        else:
+            labels[idx] = len(traps)
+            traps.append([found[:, idx]])
+    traps = np.array([np.mean(trap, axis=0) for trap in traps]).T.reshape((3, -1))
+    if traps.shape[1] == 0:
+        return traps, np.zeros((3, 0)), labels
+    stiffness = np.einsum('iik -> ik', evaluator(complex_transducer_amplitudes, traps)[1])
+    return traps, stiffness, labels
@@ -223,6 +223,36 @@ def test_Array_visualizer():
     np.testing.assert_allclose(signature, array.signature(pos, phase))
 
 
+def test_find_traps():
+    array = levitate.arrays.RectangularArray(shape=8)
+    pos = np.array([0, 0, 0.06])
+    amps = levitate.utils.complex(array.focus_phases(pos) + array.signature(stype='twin'))
+    trap = np.array([0, 0, 0.0573])
+    starts = trap[:, None] + np.array([[0, 0, 0], [0.5, 0, 0], [0, -0.5, 0.5], [0, 0, -1], [40, 40, 0]]).T * 1e-3
+    traps, stiffness, labels = levitate.utils.find_traps(array, starts, amps, time_interval=2e5)
+    # All starting points close to the trap are merged, the far point is not close to a trap at the end.
+    np.testing.assert_array_equal(labels, [0, 0, 0, 0, -1])
+    assert traps.shape == stiffness.shape == (3, 1)
+    np.testing.assert_allclose(traps[:, 0], trap, atol=0.2e-3)
+    assert np.all(stiffness < 0)
+    np.testing.assert_allclose(stiffness, (levitate.fields.RadiationForceStiffness(array) @ traps)(amps))
+
+
+def test_refine_trap():
+    array = levitate.arrays.RectangularArray(shape=8)
+    pos = np.array([0, 0, 0.06])
+    amps = levitate.utils.complex(array.focus_phases(pos) + array.signature(stype='twin'))
+    trap = levitate.utils.find_traps(array, np.array([0, 0, 0.0573]), amps, time_interval=2e5)[0][:, 0]
+    position, stiffness, evaluations = levitate.utils.refine_trap(array, trap + [0.5e-3, -0.5e-3, 1e-3], amps)
+    np.testing.assert_allclose(position, trap, atol=20e-6)
+    assert evaluations < 20
+    assert np.all(stiffness < 0)
+    gradient = (levitate.fields.RadiationForceGradient(array) @ position)(amps)
+    np.testing.assert_allclose(stiffness, np.linalg.eigvalsh(0.5 * (gradient + gradient.T)), rtol=1e-3)
+    with pytest.warns(RuntimeWarning):
+        levitate.utils.refine_trap(array, trap + [0, 0, 5e-3], amps, max_iterations=1, time_interval=1)
+
+
 def test_Array_calculations():
     array = levitate.arrays.RectangularArray(shape=2)
     pos = np.array([0.1, -0.2, 0.3])
@@ -267,3 +297,101 @@ def test_Array_calculations():
         [-5.094954128769e+01 - 2.904389528692e+01j, -1.140045085313e+01 + 5.677575520142e+01j, +1.490296577659e+01 + 5.804879605259e+01j, +5.070404281442e+01 - 3.078708333006e+01j],
         [-4.271062938279e-01 + 1.767003324465e+01j, +1.653992786475e+01 - 4.314652112229e+00j, +1.406441459177e+01 - 1.245188798563e+01j, -1.514361128043e+01 - 1.016477803538e+01j]])
     np.testing.assert_allclose(array.spherical_harmonics(pos, orders=3), expected_result)
+
+
+def test_Array_precision():
+    array = levitate.arrays.RectangularArray(shape=2)
+    pos = np.array([[0.1, -0.2, 0.3], [0.01, 0.02, 0.05]]).T
+    double = array.request({'pressure_derivs': 3, 'spherical_harmonics_gradient': 2}, pos)
+    array.precision = 'single'
+    single = array.request({'pressure_derivs': 3, 'spherical_harmonics_gradient': 2}, pos)
+    for key in double:
+        assert double[key].dtype == np.complex128
+        assert single[key].dtype == np.complex64
+        scale = np.max(np.abs(double[key]))
+        np.testing.assert_allclose(single[key] / scale, double[key] / scale, atol=1e-5)
+    assert levitate.arrays.DoublesidedArray(array, separation=0.1).precision == 'single'
+    with pytest.raises(ValueError):
+        array.precision = 'half'
+
+
+def test_RequestCache():
+    cache = levitate.arrays.RequestCache()
+    array = levitate.arrays.RectangularArray(shape=2)
+    pos = np.array([[0.1, -0.2, 0.3], [0.01, 0.02, 0.05]]).T
+    expected = array.request({'pressure_derivs': 3, 'spherical_harmonics_gradient': 2}, pos)
+    first_key = cache.key(array, pos)
+
+    high = cache.request(array, {'pressure_derivs': 3, 'spherical_harmonics_gradient': 2}, pos)
+    low = cache.request(array, {'pressure_derivs_summed': 1, 'spherical_harmonics': 1}, pos)
+    assert (cache.hits, cache.misses) == (1, 1)
+    for key in high:
+        np.testing.assert_allclose(high[key], expected[key])
+    np.testing.assert_allclose(low['pressure_derivs'], expected['pressure_derivs'][:4])
+    np.testing.assert_allclose(low['spherical_harmonics'], expected['spherical_harmonics'][:4])
+    # The shared arrays cannot be modified in place.
+    for key in high:
+        assert not high[key].flags.writeable
+    for key in low:
+        assert not low[key].flags.writeable
+    with pytest.raises(ValueError):
+        low['pressure_derivs'] *= 0
+
+    # Changes to the array or the positions are not served from the cache.
+    cache.request(array, {'pressure_derivs': 1}, pos[:, :1])
+    array.transducer.freq = 41e3
+    cache.request(array, {'pressure_derivs': 1}, pos)
+    assert (cache.hits, cache.misses) == (1, 3)
+    assert len(cache) == 3
+
+    # Least recently used entries are evicted.
+    cache.max_bytes = cache.nbytes
+    cache.request(array, {'pressure_derivs': 1}, pos[:, :1])
+    cache.request(array, {'pressure_derivs': 1}, pos[:, 1:])
+    assert cache.nbytes <= cache.max_bytes
+    # The first request is the least recently used one.
+    assert first_key not in cache._entries
+    assert cache.key(array, pos) in cache._entries
+    assert cache.key(array, pos[:, :1]) in cache._entries
+
+    cache.clear()
+    assert (len(cache), cache.nbytes, cache.hits, cache.misses) == (0, 0, 0, 0)
+
+
+def test_shared_request_cache():
+    array = levitate.arrays.RectangularArray(shape=2)
+    pos = np.array([0.01, 0.02, 0.05])
+    levitate.arrays.request_cache.clear()
+    (levitate.fields.GorkovLaplacian(array) @ pos)(np.ones(4))
+    (levitate.fields.Pressure(array) @ pos)(np.ones(4))
+    (levitate.fields.RadiationForce(array) @ pos)(np.ones(4))
+    assert levitate.arrays.request_cache.misses == 1
+    assert levitate.arrays.request_cache.hits == 2
+
+
+def test_Array_version():
+    array = levitate.arrays.RectangularArray(shape=2, transducer=levitate.transducers.CircularPiston(effective_radius=3e-3))
+    pos = np.array([0.01, 0.02, 0.05])
+    field = levitate.fields.Pressure(array) @ pos
+    amps = np.ones(4)
+
+    def check_updated():
+        version = array.version
+        assert not np.allclose(field(amps), reference)
+        np.testing.assert_allclose(field(amps), (levitate.fields.Pressure(array) @ pos)(amps))
+        assert array.version == version
+        return field(amps)
+
+    reference = field(amps)
+    array.freq = 41e3
+    reference = check_updated()
+    array.transducer.effective_radius = 4e-3
+    reference = check_updated()
+    array.positions = array.positions + np.array([0, 0, 1e-3]).reshape(3, 1)
+    reference = check_updated()
+    c, rho = levitate.materials.air.c, levitate.materials.air.rho
+    try:
+        levitate.materials.air.update_properties(temperature=30)
+        reference = check_updated()
+    finally:
+        levitate.materials.air.c, levitate.materials.air.rho = c, rho
@@ -41,6 +41,21 @@ no_jacobians_fields = [
 
 values_fields = has_jabobians_fields + no_jacobians_fields
 
+# Bound fields and combinations of fields, built from one of the fields above.
+bound_fields = [
+    lambda field: field @ pos_both,
+    lambda field: abs(field) * 1e3 @ pos_0,
+    lambda field: (field * 1e3 + levitate.fields.GorkovPotential(array) * 1) @ pos_both,
+    lambda field: field @ pos_0 + levitate.fields.Pressure(array) @ pos_1,
+    lambda field: field * 1e3 @ pos_0 + (levitate.fields.GorkovPotential(array) - 1e-6) * 1 @ pos_1,
+    lambda field: field * 1e3 @ pos_0 + (levitate.fields.GorkovPotential(array) - 1e-6) * 1 @ pos_1 + field * 1e3 @ pos_1,
+    lambda field: abs(field) @ pos_0,
+    lambda field: (field + levitate.fields.Pressure(array)) @ pos_0,
+    lambda field: field * 1e3 @ pos_both,
+    lambda field: (field * 1e3 + abs(field) * 1 + levitate.fields.GorkovPotential(array) * 1) @ pos_both,
+    lambda field: field * 1e3 @ pos_0 + (levitate.fields.GorkovPotential(array) - 1e-6) * 1 @ pos_1 + (field * 1e3 + abs(levitate.fields.Pressure(array)) * 1) @ pos_1,
+]
+
 
 @pytest.mark.parametrize("func", values_fields)
 def test_Field(func):
@@ -293,3 +308,207 @@ def test_MultiCostFieldMultiPoint(func0, func1, pos0, pos1, weight0, weight1):
 
     np.testing.assert_allclose(val0 + val1, val_both)
     np.testing.assert_allclose(jac0 + jac1, jac_both)
+
+
+@pytest.mark.parametrize("make_field", [
+    lambda field: field,
+    lambda field: field * 1e3,
+    lambda field: abs(field) * 1e3,
+    lambda field: field + levitate.fields.GorkovPotential(array),
+    lambda field: field * 1e3 + levitate.fields.GorkovPotential(array) * 1,
+])
+@pytest.mark.parametrize("func", has_jabobians_fields)
+def test_chunked_evaluation(func, make_field, monkeypatch):
+    field = make_field(func(array))
+    positions = np.random.uniform(-0.05, 0.05, (3, 5, 7)) + np.array([0, 0, 0.1]).reshape(3, 1, 1)
+    expected = field(amps, positions)
+    # Room for three positions at the time, which will not split evenly.
+    monkeypatch.setattr(array, 'memory_budget', 3 * array._request_memory(field.requires))
+    assert field._chunk_size(positions) == 3
+    chunked = field(amps, positions)
+    levitate._field_wrappers._map_arrays(np.testing.assert_allclose, chunked, expected)
+
+
+def test_lazy_requirements():
+    field = levitate.fields.SphericalHarmonicsExpansionGradient(array, orders=2) * 1
+    positions = np.random.uniform(-0.05, 0.05, (3, 5, 7)) + np.array([0, 0, 0.1]).reshape(3, 1, 1)
+    requests = array.request(field.requires, positions)
+    requirements = field.evaluate_requirements(amps, positions)
+    assert set(requirements) == {
+        'spherical_harmonics_individual', 'spherical_harmonics_summed',
+        'spherical_harmonics_gradient_individual', 'spherical_harmonics_gradient_summed'}
+    # Only accessed requirements are evaluated.
+    assert requirements['spherical_harmonics_summed'] is requirements['spherical_harmonics_summed']
+    assert list(requirements._evaluated) == ['spherical_harmonics_summed']
+    for name, axis in [('spherical_harmonics', 1), ('spherical_harmonics_gradient', 2)]:
+        individual = np.einsum('i,...i->...i', amps, np.moveaxis(requests[name], axis, -1))
+        np.testing.assert_allclose(requirements[name + '_individual'], np.moveaxis(individual, -1, axis))
+        np.testing.assert_allclose(requirements[name + '_summed'], np.sum(individual, axis=-1))
+
+
+def test_stacked_multi_point_evaluation():
+    positions = [np.random.uniform(-0.05, 0.05, 3) + np.array([0, 0, 0.1]) for _ in range(4)]
+    grid = np.random.uniform(-0.05, 0.05, (3, 2, 3)) + np.array([0, 0, 0.1]).reshape(3, 1, 1)
+    points = [
+        levitate.fields.GorkovPotential(array) * 1 @ positions[0],
+        (levitate.fields.Pressure(array) - 1e2) * 1 @ positions[1],
+        (levitate.fields.GorkovGradient(array) * (1, 1, 1) + levitate.fields.Velocity(array) * (1, 1, 1)) @ positions[2],
+        levitate.fields.SphericalHarmonicsForce(array, orders=2, radius=1e-3) * (1, 1, 1) @ positions[3],
+    ]
+    field = sum(points[1:], points[0])
+    assert type(field) == levitate._field_wrappers.MultiCostFieldMultiPoint
+    val, jac = field(amps)
+    np.testing.assert_allclose(val, sum(point(amps)[0] for point in points))
+    np.testing.assert_allclose(jac, sum(point(amps)[1] for point in points))
+
+    # Adding more points should update the stacked positions and requirements.
+    grid_point = levitate.fields.Pressure(array) @ grid
+    field = (levitate.fields.SphericalHarmonicsExpansion(array, orders=1) @ positions[0]) + (levitate.fields.GorkovPotential(array) @ positions[1])
+    field(amps)
+    field += grid_point
+    assert field.position.shape == (3, 8)
+    values = field(amps)
+    np.testing.assert_allclose(values[2], grid_point(amps))
+    np.testing.assert_allclose(values[0], (levitate.fields.SphericalHarmonicsExpansion(array, orders=1) @ positions[0])(amps))
+
+    # Fields which only differ in position are evaluated together.
+    traps = [(levitate.fields.GorkovPotential(array) * 1 + abs(levitate.fields.Pressure(array)) * 1e-3) @ pos for pos in positions]
+    other = levitate.fields.GorkovPotential(array) * 2 @ grid[:, 0, 0]
+    field = sum(traps[1:], traps[0]) + other
+    assert field._groups == [[0, 1, 2, 3], [4]]
+    val, jac = field(amps)
+    np.testing.assert_allclose(val, sum(trap(amps)[0] for trap in traps) + other(amps)[0])
+    np.testing.assert_allclose(jac, sum(trap(amps)[1] for trap in traps) + other(amps)[1])
+    points = [(levitate.fields.Pressure(array) + levitate.fields.Velocity(array)) @ pos for pos in positions]
+    field = sum(points[1:], points[0])
+    assert field._groups == [[0, 1, 2, 3]]
+    for point, values in zip(points, field(amps)):
+        levitate._field_wrappers._map_arrays(np.testing.assert_allclose, values, point(amps))
+
+
+@pytest.mark.parametrize("make_field", bound_fields)
+@pytest.mark.parametrize("func", has_jabobians_fields)
+def test_multiple_states(func, make_field):
+    field = make_field(func(array))
+    states = amps[:, None] * np.exp(1j * np.random.uniform(-np.pi, np.pi, (array.num_transducers, 3)))
+    batched = field(states)
+    for state_idx in range(states.shape[1]):
+        levitate._field_wrappers._map_arrays(
+            lambda batched, expected: np.testing.assert_allclose(batched[..., state_idx], expected),
+            batched, field(states[:, state_idx]))
+
+
+def test_multiple_states_unbound(monkeypatch):
+    field = levitate.fields.GorkovGradient(array) * (1, 1, 1)
+    positions = np.random.uniform(-0.05, 0.05, (3, 5, 7)) + np.array([0, 0, 0.1]).reshape(3, 1, 1)
+    states = amps[:, None] * np.exp(1j * np.random.uniform(-np.pi, np.pi, (array.num_transducers, 3)))
+    val, jac = field(states, positions)
+    assert val.shape == (5, 7, 3)
+    assert jac.shape == (array.num_transducers, 5, 7, 3)
+    for state_idx in range(states.shape[1]):
+        state_val, state_jac = field(states[:, state_idx], positions)
+        np.testing.assert_allclose(val[..., state_idx], state_val)
+        np.testing.assert_allclose(jac[..., state_idx], state_jac)
+    monkeypatch.setattr(array, 'memory_budget', 3 * array._request_memory(field.requires))
+    chunked_val, chunked_jac = field(states, positions)
+    np.testing.assert_allclose(chunked_val, val)
+    np.testing.assert_allclose(chunked_jac, jac)
+    quadratic_form = (field @ pos_0).quadratic_form()
+    val, jac = quadratic_form(states)
+    for state_idx in range(states.shape[1]):
+        state_val, state_jac = quadratic_form(states[:, state_idx])
+        np.testing.assert_allclose(val[state_idx], state_val)
+        np.testing.assert_allclose(jac[:, state_idx], state_jac)
+
+
+@pytest.mark.parametrize("make_field", [
+    lambda field: field * np.ones((1,) * field.ndim) @ pos_0,
+    lambda field: (field * np.ones((1,) * field.ndim) + levitate.fields.RadiationForceStiffness(array) * (1, 2, 3)) @ pos_0,
+    lambda field: (field * np.ones((1,) * field.ndim) + abs(levitate.fields.Pressure(array)) * 1) @ pos_0,
+    lambda field: (field * np.ones((1,) * field.ndim) + (levitate.fields.Velocity(array) - (1e-3, 2e-3, 1e-3)) * (1, 1, 1)) @ pos_0,
+    lambda field: field * np.ones((1,) * field.ndim) @ pos_0 + levitate.fields.GorkovPotential(array) * 1 @ pos_1,
+])
+@pytest.mark.parametrize("func", has_jabobians_fields)
+def test_quadratic_form(func, make_field):
+    field = make_field(func(array))
+    val, jac = field(amps)
+    quad_val, quad_jac = field.quadratic_form()(amps)
+    np.testing.assert_allclose(quad_val, val, rtol=1e-5)
+    np.testing.assert_allclose(quad_jac, jac, rtol=1e-5, atol=1e-9 * np.max(np.abs(jac)))
+
+
+def test_quadratic_form_errors():
+    with pytest.raises(ValueError):
+        (levitate.fields.Pressure(array) * 1 @ pos_0).quadratic_form()
+    with pytest.raises(ValueError):
+        # The squared magnitude of a quadratic form is not a quadratic form.
+        (abs(levitate.fields.GorkovPotential(array)) * 1 @ pos_0).quadratic_form()
+    with pytest.raises(ValueError):
+        (levitate.fields.GorkovPotential(array) * 1 @ pos_both).quadratic_form()
+
+
+@pytest.mark.parametrize("make_field", bound_fields)
+@pytest.mark.parametrize("func", has_jabobians_fields)
+def test_constrained_field(func, make_field):
+    field = make_field(func(array))
+    constrain_transducers = [0, 3, 7, 8]
+    constrained = field.constrain(constrain_transducers, amps)
+    free = constrained.free_transducers
+    np.testing.assert_equal(free, np.delete(np.arange(array.num_transducers), constrain_transducers))
+    expected = field(amps)
+    if field._is_cost:
+        expected = (expected[0], expected[1][free])
+    levitate._field_wrappers._map_arrays(np.testing.assert_allclose, constrained(amps[free]), expected)
+    # The constrained transducers keep their amplitudes for all states of the free transducers.
+    states = amps[:, None] * np.exp(1j * np.random.uniform(-np.pi, np.pi, (array.num_transducers, 3)))
+    states[constrain_transducers] = amps[constrain_transducers, None]
+    expected = field(states)
+    if field._is_cost:
+        expected = (expected[0], expected[1][free])
+    levitate._field_wrappers._map_arrays(np.testing.assert_allclose, constrained(states[free]), expected)
+
+
+def test_constrained_hessians_and_quadratic_form():
+    field = (levitate.fields.GorkovLaplacian(array) * (1, 1, 1) + abs(levitate.fields.Pressure(array)) * 1) @ pos_0
+    constrain_transducers = slice(0, 10)
+    constrained = field.constrain(constrain_transducers, amps)
+    hessians, conjugate_hessians = field.evaluate_hessians(amps)
+    constrained_hessians, constrained_conjugate_hessians = constrained.evaluate_hessians(amps[10:])
+    np.testing.assert_allclose(constrained_hessians, hessians[10:, 10:])
+    np.testing.assert_allclose(constrained_conjugate_hessians, conjugate_hessians[10:, 10:])
+    quadratic_form = field.quadratic_form().constrain(constrain_transducers, amps)
+    val, jac = field(amps)
+    quad_val, quad_jac = quadratic_form(amps[10:])
+    np.testing.assert_allclose(quad_val, val, rtol=1e-5)
+    np.testing.assert_allclose(quad_jac, jac[10:], rtol=1e-5, atol=1e-9 * np.max(np.abs(jac)))
+    with pytest.raises(TypeError):
+        levitate.fields.Pressure(array).constrain(constrain_transducers, amps)
+
+
+@pytest.mark.parametrize("make_field", bound_fields)
+@pytest.mark.parametrize("func", has_jabobians_fields)
+def test_evaluation_plan(func, make_field):
+    field = make_field(func(array))
+    plan = field.compile()
+    states = amps[:, None] * np.exp(1j * np.random.uniform(-np.pi, np.pi, (array.num_transducers, 3)))
+    for amplitudes in [amps, states, 0.5 * amps]:
+        levitate._field_wrappers._map_arrays(np.testing.assert_allclose, plan(amplitudes), field(amplitudes))
+
+
+def test_evaluation_plan_structure():
+    field = (levitate.fields.GorkovPotential(array) * 1 + (levitate.fields.GorkovPotential(array) - 1e-6) * 1) @ pos_0
+    plan = field.compile()
+    # The values of the implementation are shared between the fields.
+    assert [kind for implementation, kind in plan._units[0].calls] == ['values', 'jacobians']
+    val, jac = plan(amps)
+    assert plan(amps)[0] is val
+    with pytest.raises(TypeError):
+        levitate.fields.Pressure(array).compile()
+    # Changes to the array are detected.
+    local_array = levitate.arrays.RectangularArray(shape=2)
+    field = levitate.fields.GorkovGradient(local_array) * (1, 1, 1) @ pos_0
+    plan = field.compile()
+    val = plan(np.ones(4))[0].copy()
+    local_array.freq = 41e3
+    assert not np.allclose(plan(np.ones(4))[0], val, atol=0)
+    levitate._field_wrappers._map_arrays(np.testing.assert_allclose, plan(np.ones(4)), field(np.ones(4)))
@@ -200,3 +200,46 @@ def test_field(field, kwargs, value_at_pos_1, jacobian_at_pos_1):
         jac_12 = field.jacobians(**{key: requirements[key] for key in field.jacobians_require})
         np.testing.assert_allclose(jac_1, jacobian_at_pos_1, atol=1e-20)
         np.testing.assert_allclose(jac_12, np.stack([jac_1, jac_2], -1))
+
+
+# Relative accuracy of the fields in single precision, compared to double precision.
+# The errors are normalized with the largest magnitude of the double precision values.
+@pytest.mark.parametrize("field, kwargs, rtol", [
+    (levitate.fields.Pressure, {}, 1e-5),
+    (levitate.fields.Velocity, {}, 1e-5),
+    (levitate.fields.GorkovPotential, {}, 1e-5),
+    (levitate.fields.GorkovGradient, {}, 1e-4),
+    (levitate.fields.GorkovLaplacian, {}, 1e-3),
+    (levitate.fields.RadiationForce, {}, 1e-5),
+    (levitate.fields.RadiationForceStiffness, {}, 1e-3),
+    (levitate.fields.RadiationForceCurl, {}, 1e-4),
+    (levitate.fields.RadiationForceGradient, {}, 1e-4),
+    (levitate.fields.SphericalHarmonicsForceDecomposition, {'radius': 1e-3, 'orders': 2}, 1e-4),
+    (levitate.fields.SphericalHarmonicsForce, {'radius': 1e-3, 'orders': 2}, 1e-4),
+    (levitate.fields.SphericalHarmonicsForceGradient, {'radius': 1e-3, 'orders': 2}, 1e-4),
+    (levitate.fields.SphericalHarmonicsExpansion, {'orders': 2}, 1e-5),
+    (levitate.fields.SphericalHarmonicsExpansionGradient, {'orders': 2}, 1e-5),
+])
+def test_field_single_precision(field, kwargs, rtol):
+    array = levitate.arrays.RectangularArray(shape=(4, 4), transducer=levitate.transducers.CircularPiston(effective_radius=3e-3))
+    positions = np.array([[1, 2, 50], [-3, 1, 40], [0, 0, 60]]).T * 1e-3
+    amps = levitate.utils.complex(array.focus_phases(positions[:, 0]), np.linspace(0.5, 1, array.num_transducers))
+    field = field(array, **kwargs) * 1
+
+    def evaluate():
+        requirements = field.evaluate_requirements(amps, positions)
+        values = field.values(**{key: requirements[key] for key in field.values_require})
+        jacobians = field.jacobians(**{key: requirements[key] for key in field.jacobians_require})
+        return values, jacobians
+
+    values_double, jacobians_double = evaluate()
+    array.precision = 'single'
+    values_single, jacobians_single = evaluate()
+
+    assert values_single.dtype in (np.float32, np.complex64)
+    assert jacobians_single.dtype == np.complex64
+    np.testing.assert_allclose(values_single, values_double, rtol=0, atol=rtol * np.max(np.abs(values_double)))
+    np.testing.assert_allclose(jacobians_single, jacobians_double, rtol=0, atol=rtol * np.max(np.abs(jacobians_double)))
+    if field._has_hessians:
+        requirements = field.evaluate_requirements(amps, positions)
+        assert field.hessians(**{key: requirements[key] for key in field.hessians_require}).dtype == np.complex64
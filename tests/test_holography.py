@@ -0,0 +1,102 @@
+import pytest
+import numpy as np
+import levitate
+
+# Tests created with these air properties
+from levitate.materials import air
+air.c = 343
+air.rho = 1.2
+
+array = levitate.arrays.RectangularArray(shape=(8, 8))
+positions = np.array([[10, -5, 60], [-15, 5, 70], [0, 20, 80]]).T * 1e-3
+target = np.array([1500, 1000, 1200])
+solvers = [levitate.holography.Backpropagation, levitate.holography.GerchbergSaxton, levitate.holography.WeightedGerchbergSaxton, levitate.holography.LevenbergMarquardt]
+
+
+@pytest.mark.parametrize('solver', solvers)
+@pytest.mark.parametrize('variable_amplitudes', [False, True])
+def test_hologram_constraints(solver, variable_amplitudes):
+    solver = solver(array, positions, variable_amplitudes=variable_amplitudes)
+    result = solver(target)
+    assert result.shape == (array.num_transducers,)
+    np.testing.assert_allclose(solver.propagation_matrix @ result, array.pressure_derivs(positions, orders=0)[0].T @ result)
+    if variable_amplitudes:
+        assert np.all(np.abs(result) <= 1 + 1e-12)
+    else:
+        np.testing.assert_allclose(np.abs(result), 1)
+    # The result is usable with the rest of the package.
+    pressure = abs(levitate.fields.Pressure(array)) @ positions
+    np.testing.assert_allclose(pressure(result), np.abs(solver.propagation_matrix @ result)**2)
+
+
+def test_hologram_start_values():
+    solver = levitate.holography.Backpropagation(array, positions)
+    start = levitate.utils.complex(array.focus_phases(positions[:, 0]))
+    np.testing.assert_allclose(solver(target, start_values=start), start)
+
+
+@pytest.mark.parametrize('solver', solvers[1:])
+def test_hologram_relative_magnitudes(solver):
+    result = solver(array, positions, iterations=100)(target)
+    magnitudes = np.abs(array.pressure_derivs(positions, orders=0)[0].T @ result)
+    ratio = magnitudes / target
+    assert np.ptp(ratio) / np.mean(ratio) < 0.1
+
+
+@pytest.mark.parametrize('variable_amplitudes', [False, True])
+def test_levenberg_marquardt(variable_amplitudes):
+    solver = levitate.holography.LevenbergMarquardt(array, positions, variable_amplitudes=variable_amplitudes)
+    result = solver(target)
+    np.testing.assert_allclose(np.abs(solver.propagation_matrix @ result), target, rtol=1e-6)
+
+
+def test_hologram_library(tmpdir):
+    library = levitate.holography.HologramLibrary()
+    template = abs(levitate.fields.Pressure(array)) * 1 + levitate.fields.RadiationForceStiffness(array) * (1, 1, 1)
+    states = np.exp(1j * np.random.RandomState(0).uniform(-np.pi, np.pi, (3, array.num_transducers)))
+    for idx, state in enumerate(states):
+        library.add(template @ positions[:, idx], state)
+    assert len(library) == 3
+    np.testing.assert_allclose(library.query(template @ (positions[:, 1] + 1e-3)), states[1])
+    # Different signatures are stored separately.
+    assert library.query(abs(levitate.fields.Pressure(array)) * 1 @ positions[:, 1]) is None
+    assert library.query(template @ positions) is None
+    library.add(template @ positions, states[0])
+    np.testing.assert_allclose(library.query(template @ positions), states[0])
+    # Identical positions replace the stored solution.
+    library.add(template @ positions[:, 2], states[0])
+    assert len(library) == 4
+    np.testing.assert_allclose(library.query(template @ positions[:, 2]), states[0])
+    with pytest.raises(TypeError):
+        library.query(template)
+
+    library.max_distance = 1e-3
+    assert library.query(template @ (positions[:, 1] + 1e-3)) is None
+
+    # The least recently used solution is evicted.
+    library.query(template @ positions[:, 0])
+    library.evict(3)
+    assert len(library) == 3
+    assert library.query(template @ positions[:, 1]) is None
+
+    library.save(str(tmpdir.join('library.npz')))
+    loaded = levitate.holography.HologramLibrary.load(str(tmpdir.join('library.npz')), max_entries=2)
+    assert len(loaded) == 2
+    np.testing.assert_allclose(loaded.query(template @ positions[:, 2]), states[0])
+    np.testing.assert_allclose(loaded.query(template @ positions[:, 0]), states[0])
+    assert loaded.query(template @ positions) is None
+
+
+def test_minimize_library():
+    library = levitate.holography.HologramLibrary()
+    small_array = levitate.arrays.RectangularArray(shape=2)
+    trap = abs(levitate.fields.Pressure(small_array)) * 1 + levitate.fields.RadiationForceStiffness(small_array) * (1, 1, 1)
+    start = np.exp(1j * np.random.RandomState(0).uniform(-np.pi, np.pi, small_array.num_transducers))
+    result = levitate.optimization.minimize(trap @ positions[:, 0], small_array, start_values=start, library=library)
+    assert len(library) == 1
+    np.testing.assert_allclose(library.query(trap @ positions[:, 0]), result)
+    nearby = trap @ (positions[:, 0] + 1e-4)
+    np.testing.assert_allclose(
+        levitate.optimization.minimize(nearby, small_array, library=library),
+        levitate.optimization.minimize(nearby, small_array, start_values=result))
+    assert len(library) == 2
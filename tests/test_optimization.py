@@ -18,6 +18,10 @@ def test_minimize_phases_amplitudes():
     result = levitate.optimization.minimize(trap, array, start_values=amps)
     result = levitate.optimization.minimize(trap, array, variable_amplitudes=True, start_values=0.5 * amps, basinhopping=3)
     result = levitate.optimization.minimize(trap, array, constrain_transducers=[0, 3])
+    result = levitate.optimization.minimize(trap, array, start_values=0.5 * amps, constrain_transducers=[0, 3], variable_amplitudes=True)
+    np.testing.assert_allclose(result[[0, 3]], 0.5 * amps[[0, 3]])
+    result = levitate.optimization.minimize(trap.quadratic_form(), array, start_values=0.5 * amps, constrain_transducers=[1])
+    np.testing.assert_allclose(result[1], 0.5 * amps[1])
 
 
 def test_minimize_sequence():
@@ -28,6 +32,39 @@ def test_minimize_sequence():
     result, status = levitate.optimization.minimize([trap, trap + quiet_zone], array, basinhopping=True, minimize_kwargs={'tol': 1e-6}, callback=lambda **kwargs: False, return_optim_status=True)
 
 
+def test_minimize_real_imag():
+    trap = abs(levitate.fields.Pressure(array)) * 1 @ pos + levitate.fields.RadiationForceStiffness(array) * (1, 1, 1) @ pos
+    start = levitate.utils.complex(np.random.RandomState(0).uniform(-np.pi, np.pi, array.num_transducers))
+    result = levitate.optimization.minimize(trap, array, start_values=start, use_real_imag=True)
+    assert trap(result)[0] < trap(start)[0]
+    np.testing.assert_allclose(np.abs(result), 1)
+    result = levitate.optimization.minimize(trap, array, start_values=0.5 * start, use_real_imag=True, variable_amplitudes=True)
+    assert np.all(np.abs(result) <= 1 + 1e-12)
+    result = levitate.optimization.minimize(trap, array, start_values=0.5 * start, use_real_imag=True, constrain_transducers=[0, 3])
+    np.testing.assert_allclose(result[[0, 3]], 0.5 * start[[0, 3]])
+    np.testing.assert_allclose(np.abs(result[[1, 2]]), 1)
+    result = levitate.optimization.minimize(trap, array, start_values=start, use_real_imag=True, variable_amplitudes=[False, True], basinhopping=2)
+    result = levitate.optimization.minimize([trap, trap], array, start_values=start, use_real_imag=[False, True])
+    assert result.shape == (2, array.num_transducers)
+
+
+def test_minimize_multistart():
+    trap = abs(levitate.fields.Pressure(array)) * 1 @ pos + levitate.fields.RadiationForceStiffness(array) * (1, 1, 1) @ pos
+    results, values, status = levitate.optimization.minimize_multistart(trap, array, num_starts=3, processes=2, seed=0, return_optim_status=True)
+    assert results.shape == (3, array.num_transducers)
+    assert np.all(np.diff(values) >= 0)
+    assert len(status) == 3
+    serial_results, serial_values = levitate.optimization.minimize_multistart(trap, array, num_starts=3, processes=1, seed=0)
+    np.testing.assert_allclose(serial_values, values)
+    np.testing.assert_allclose(serial_results, results)
+    for result, value in zip(results, values):
+        np.testing.assert_allclose(trap(result)[0], value)
+
+    starts = np.stack([amps, 0.5 * amps], axis=1)
+    results, values = levitate.optimization.minimize_multistart((f for f in [trap, trap]), array, start_values=starts, processes=2, variable_amplitudes=[False, True], basinhopping=2)
+    assert results.shape == (2, 2, array.num_transducers)
+
+
 large_array = levitate.arrays.RectangularArray(shape=9)
 phases = np.random.uniform(-np.pi, np.pi, large_array.num_transducers)
 magnitudes = np.random.uniform(1e-3, 1, large_array.num_transducers)
@@ -153,3 +190,115 @@ def test_jacobian_accuracy(func, kwargs, take_abs, weight):
         cplx_amps[idx] += 1j * 1e-6
         imag_jacobians[idx] = (upper_val - lower_val) / 2e-6
     np.testing.assert_allclose(imag_jacobians, -np.imag(values_at_operating_point[1] / cplx_amps), 1e-5, 1e-8)
+
+
+@pytest.mark.parametrize("func, take_abs, weight", [
+    (levitate.fields.GorkovPotential, False, np.random.uniform(-10, 10)),
+    (levitate.fields.GorkovGradient, False, np.random.uniform(-10, 10, 3)),
+    (levitate.fields.GorkovLaplacian, False, np.random.uniform(-10, 10, 3)),
+    (levitate.fields.RadiationForce, False, np.random.uniform(-10, 10, 3)),
+    (levitate.fields.RadiationForceStiffness, False, np.random.uniform(-10, 10, 3)),
+    (levitate.fields.RadiationForceCurl, False, np.random.uniform(-10, 10, 3)),
+    (levitate.fields.RadiationForceGradient, False, np.random.uniform(-10, 10, (3, 3))),
+    (levitate.fields.Pressure, True, np.random.uniform(-10, 10)),
+    (levitate.fields.Velocity, True, np.random.uniform(-10, 10, 3)),
+    (levitate.fields.GorkovGradient, True, np.random.uniform(-10, 10, 3)),
+])
+def test_hessian_accuracy(func, take_abs, weight):
+    point = func(large_array, weight=weight, position=pos)
+    if take_abs:
+        point = abs(point)
+    num_transducers = large_array.num_transducers
+
+    def phase_amplitude_jacobians(phases, magnitudes):
+        jacobians = point(levitate.utils.complex(phases, magnitudes))[1]
+        return np.concatenate([-jacobians.imag, jacobians.real / magnitudes])
+
+    values, jacobians = point(cplx_amps)
+    hessians, conjugate_hessians = point.evaluate_hessians(cplx_amps)
+    analytical = levitate.optimization._phase_amplitude_hessians(hessians, conjugate_hessians, jacobians, magnitudes, True)
+    np.testing.assert_allclose(analytical, analytical.T, 1e-8, 1e-12 * np.max(np.abs(analytical)))
+
+    numerical = np.zeros((2 * num_transducers, 2 * num_transducers))
+    for idx in range(num_transducers):
+        phases[idx] += 1e-6
+        upper_val = phase_amplitude_jacobians(phases, magnitudes)
+        phases[idx] -= 2e-6
+        lower_val = phase_amplitude_jacobians(phases, magnitudes)
+        phases[idx] += 1e-6
+        numerical[:, idx] = (upper_val - lower_val) / 2e-6
+        magnitudes[idx] += 1e-6
+        upper_val = phase_amplitude_jacobians(phases, magnitudes)
+        magnitudes[idx] -= 2e-6
+        lower_val = phase_amplitude_jacobians(phases, magnitudes)
+        magnitudes[idx] += 1e-6
+        numerical[:, num_transducers + idx] = (upper_val - lower_val) / 2e-6
+    np.testing.assert_allclose(analytical, numerical, 1e-4, 1e-6 * np.max(np.abs(numerical)))
+
+
+def test_minimize_hessians():
+    trap = abs(levitate.fields.Pressure(array)) * 1 @ pos + levitate.fields.RadiationForceStiffness(array) * (1, 1, 1) @ pos
+    start = levitate.utils.complex(np.random.RandomState(0).uniform(-np.pi, np.pi, array.num_transducers))
+    result = levitate.optimization.minimize(trap, array, start_values=start, minimize_kwargs={'method': 'trust-exact'})
+    assert trap(result)[0] < trap(start)[0]
+    result = levitate.optimization.minimize(trap, array, variable_amplitudes=True, start_values=0.5 * amps, minimize_kwargs={'method': 'trust-constr'})
+    assert np.all(np.abs(result) <= 1 + 1e-9)
+    with pytest.raises(ValueError):
+        levitate.optimization.minimize(trap, array, variable_amplitudes=True, minimize_kwargs={'method': 'trust-ncg'})
+    # The spherical harmonics force has no hessians.
+    with pytest.raises(TypeError):
+        levitate.optimization.minimize(levitate.fields.SphericalHarmonicsForce(array, radius=1e-3, orders=2) * (1, 1, 1) @ pos, array, minimize_kwargs={'method': 'trust-exact'})
+
+
+def test_minimize_trajectory():
+    template = abs(levitate.fields.Pressure(array)) * 1 + levitate.fields.RadiationForceStiffness(array) * (1, 1, 1)
+    path = pos[:, None] + np.array([[0, 0, 0], [1, 0, 0], [2, 1, 0]]).T * 1e-3
+    levitate.arrays.request_cache.clear()
+    states, status = levitate.optimization.minimize_trajectory(template, array, path, start_values=amps, return_optim_status=True)
+    assert states.shape == (3, array.num_transducers)
+    assert len(status) == 3
+    assert levitate.arrays.request_cache.misses == 3
+    # Each waypoint is warm started from the previous result.
+    start_values = amps
+    for idx in range(3):
+        start_values = levitate.optimization.minimize(template @ path[:, idx], array, start_values=start_values)
+        np.testing.assert_allclose(states[idx], start_values)
+    assert levitate.arrays.request_cache.misses == 3
+
+    states = levitate.optimization.minimize_trajectory(template, array, path, start_values=amps, prefetch=0, variable_amplitudes=True)
+    assert states.shape == (3, array.num_transducers)
+    assert np.all(np.abs(states) <= 1 + 1e-9)
+
+
+def test_minimize_budget():
+    trap = abs(levitate.fields.Pressure(array)) * 1 @ pos + levitate.fields.RadiationForceStiffness(array) * (1, 1, 1) @ pos
+    start = np.exp(1j * np.random.RandomState(0).uniform(-np.pi, np.pi, array.num_transducers))
+    result, status = levitate.optimization.minimize_budget(trap, array, max_evaluations=5, start_values=start, return_optim_status=True)
+    assert status.budget_exhausted
+    assert status.nfev == 5
+    assert status.fun == trap(result)[0] <= trap(start)[0]
+    assert status.elapsed > 0
+
+    # Unlimited budgets give the same result as `minimize`.
+    result, status = levitate.optimization.minimize_budget(trap, array, start_values=start, return_optim_status=True)
+    assert not status.budget_exhausted
+    np.testing.assert_allclose(result, levitate.optimization.minimize(trap, array, start_values=start))
+
+    result, status = levitate.optimization.minimize_budget(trap, array, time_budget=0, start_values=start, return_optim_status=True)
+    assert status.nfev == 1
+    np.testing.assert_allclose(result, start)
+
+    result = levitate.optimization.minimize_budget(trap, array, max_evaluations=20, start_values=start, constrain_transducers=[0], variable_amplitudes=True)
+    np.testing.assert_allclose(result[0], start[0])
+
+    # Streaming, stopping after three improved iterates.
+    published = []
+
+    def callback(result, value, **kwargs):
+        published.append(value)
+        return len(published) < 3
+    result, status = levitate.optimization.minimize_budget(trap, array, callback=callback, start_values=start, return_optim_status=True)
+    assert len(published) == 3
+    assert np.all(np.diff(published) < 0)
+    assert status.fun == published[-1]
+    assert status.message == 'Stopped by callback'